@@ -1,11 +1,28 @@
-from flask import Flask, render_template, send_file, request, jsonify
+from flask import Flask, g, render_template, send_file, send_from_directory, request, jsonify
+import bulk_export
+import circuit_breaker
+import concurrent.futures
 import datetime
-import io
-import requests
-import re
+import math
+import os
 import logging
-import sys
 import json
+import itertools
+import mimetypes
+import threading
+import requests
+import deck_cache
+import hebrew_calendar
+import http_cache
+import http_client
+import http_headers
+import jobs
+import parasha_schedule
+import prefetch
+import range_plan
+import singleflight
+import tracing
+import verse_store
 
 # Import the functions from your existing script
 # Make sure the script is saved as 'parashat_generator.py' in the same directory
@@ -15,12 +32,89 @@ except ImportError:
     print("Error: Could not import 'parashat_generator.py'. Make sure the file exists and is in the same directory.")
     exit()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; LOG_LEVEL=DEBUG turns on the per-range pipeline details
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+@app.before_request
+def start_trace():
+    """Trace this request if it is sampled or sent in debug mode (see tracing.py)."""
+    g.trace_token = tracing.start(f"{request.method} {request.path}", request.headers.get(tracing.DEBUG_HEADER))
+
+@app.after_request
+def finish_trace(response):
+    token = g.pop("trace_token", None)
+    if token is not None:
+        response.headers["Server-Timing"] = tracing.finish(token).server_timing()
+    return response
+
+@app.teardown_request
+def abandon_trace(exc):
+    # after_request is skipped when a view raises; still end its trace
+    token = g.pop("trace_token", None)
+    if token is not None:
+        tracing.finish(token)
+
+@app.after_request
+def cache_and_compress(response):
+    """Cache-Control, a validator and compression for the response (see http_headers.py)."""
+    if request.path.startswith("/static/") and request.args.get("v") and response.status_code in (200, 206, 304):
+        cache_control = http_headers.STATIC_IMMUTABLE
+    else:
+        cache_control = http_headers.policy(request.path, stale=http_headers.is_stale(response.headers),
+                                            status=response.status_code)
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+    # Files (decks, static assets) and streams are sent as they are
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or request.method not in ("GET", "HEAD") or not http_headers.compressible(response.mimetype)):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    etag = None
+    if http_headers.cacheable(cache_control):
+        etag = http_headers.body_etag(body)
+        response.set_etag(etag, weak=True)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+    encoding = http_headers.negotiate(request.headers.get("Accept-Encoding"))
+    if encoding and len(body) >= http_headers.COMPRESS_MIN_BYTES:
+        response.set_data(http_headers.compress(body, encoding, etag))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+@app.url_defaults
+def version_static_urls(endpoint, values):
+    # A content hash in static URLs lets them be cached as immutable
+    if endpoint == "static" and "v" not in values:
+        version = http_headers.static_version(app.static_folder, values.get("filename", ""))
+        if version:
+            values["v"] = version
+
+def static_file(filename):
+    """Flask's static view, but sending a precompressed copy when the client accepts one."""
+    copy = http_headers.precompressed(app.static_folder, filename, request.headers.get("Accept-Encoding"))
+    if copy is None:
+        response = app.send_static_file(filename)
+    else:
+        encoding, compressed_name = copy
+        response = send_from_directory(app.static_folder, compressed_name, mimetype=mimetypes.guess_type(filename)[0])
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+app.view_functions["static"] = static_file
+
+# Bounded pool shared by all requests for fetching split chapter ranges, and the
+# time a single /generate request may spend waiting on it
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "8"))
+FETCH_DEADLINE = float(os.environ.get("FETCH_DEADLINE", "20"))
+fetch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+
 @app.route("/")
 def index():
     """
@@ -30,37 +124,21 @@ def index():
     
     # Pass basic data to the HTML template (no API calls)
     return render_template("index.html", 
-                           gregorian_date=now.strftime("%A, %B %d, %Y"))
+                           gregorian_date=now.strftime("%A, %B %d, %Y"),
+                           job_threshold=jobs.THRESHOLD_CHAPTERS)
 
 def get_hebrew_date_for_gregorian(year, month, day):
     """
-    Get Hebrew date for a given Gregorian date using a Hebrew calendar API.
+    Get Hebrew date for a given Gregorian date using the local Hebrew calendar engine.
     """
     try:
-        # Use hebcal API to get Hebrew date
-        url = f"https://www.hebcal.com/converter?cfg=json&gy={year}&gm={month}&gd={day}&g2h=1"
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            # Get the full Hebrew date in English transliteration
-            hebrew_year = data.get('hy', '')
-            hebrew_month = data.get('hm', '')
-            hebrew_day = data.get('hd', '')
-            
-            if hebrew_year and hebrew_month and hebrew_day:
-                # Format as "26th of Sivan, 5785"
-                day_suffix = get_day_suffix(hebrew_day)
-                return f"{hebrew_day}{day_suffix} of {hebrew_month}, {hebrew_year}"
-            
-            # Fallback to the original format if individual components aren't available
-            eng_date = data.get('hy', '')
-            if eng_date:
-                return eng_date
-            hebrew_date = data.get('hebrew', '')
-            if hebrew_date:
-                return hebrew_date
-    except Exception as e:
-        print(f"Error getting Hebrew date: {e}")
+        hebrew = hebrew_calendar.from_gregorian(year, month, day)
+        hebrew_month = hebrew_calendar.month_name(hebrew.month, hebrew.year)
+        # Format as "26th of Sivan, 5785"
+        day_suffix = get_day_suffix(hebrew.day)
+        return f"{hebrew.day}{day_suffix} of {hebrew_month}, {hebrew.year}"
+    except (ValueError, OverflowError) as e:
+        logger.warning("Error getting Hebrew date: %s", e)
     
     # Fallback: return a formatted date
     return f"Hebrew date not available"
@@ -74,22 +152,20 @@ def get_day_suffix(day):
         suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
     return suffix
 
-@app.route("/get_next_4_weeks")
-def get_next_4_weeks():
+def weekly_listing(weeks):
     """
-    Returns parashat names and dates for the next 4 weeks (current week + 3 future weeks).
+    Parashat names and display dates for the given weeks ahead.
+    Shared by the Flask routes and the ASGI server.
     """
     results = []
-    for i in range(0, 4):  # 0 = current week, 1-3 = next 3 weeks
+    for i in weeks:
         try:
             target_date = parashat_generator.get_next_shabbat_date(i)
             year = target_date.year
             month = target_date.month
             day = target_date.day
             
-            cal_url = f"https://www.sefaria.org/api/calendars?year={year}&month={month}&day={day}"
-            cal = requests.get(cal_url).json()
-            parashat_item = next(j for j in cal["calendar_items"] if j["title"]["en"] == "Parashat Hashavua")
+            reading = parasha_schedule.reading_for_date(target_date)
             
             # Get Hebrew date in English format
             hebrew_date = get_hebrew_date_for_gregorian(year, month, day)
@@ -103,98 +179,272 @@ def get_next_4_weeks():
             
             results.append({
                 'weeks_ahead': i,
-                'title': parashat_item["displayValue"]["en"],
+                'title': reading.title,
                 'date_display': date_display,
                 'gregorian_date': gregorian_str,
                 'hebrew_date': hebrew_date
             })
         except Exception as e:
-            print(f"Error getting parashat for week {i}: {e}")
+            logger.warning("Error getting parashat for week %s: %s", i, e)
             continue
-    return jsonify(results)
+    return results
 
-@app.route("/get_parashat_data/<int:weeks_ahead>")
-def get_parashat_data(weeks_ahead):
+@app.route("/get_next_4_weeks")
+def get_next_4_weeks():
     """
-    API endpoint to get parashat data for a specific week.
+    Returns parashat names and dates for the next 4 weeks (current week + 3 future weeks).
+    """
+    return jsonify(weekly_listing(range(0, 4)))  # 0 = current week, 1-3 = next 3 weeks
+
+def parashat_data_payload(weeks_ahead, parashat_data):
+    """
+    JSON body and status for /get_parashat_data, given week_reading's result.
     """
-    parashat_data = parashat_generator.get_parasha_data(weeks_ahead=weeks_ahead)
-    
     if not parashat_data:
-        return jsonify({"error": "Could not fetch Parashat data from Sefaria."}), 500
-    
-    # Get Hebrew date for this week
-    target_date = parashat_generator.get_next_shabbat_date(weeks_ahead)
-    hebrew_date = get_hebrew_date_for_gregorian(target_date.year, target_date.month, target_date.day)
+        return {"error": "Could not fetch Parashat data from Sefaria."}, 500
     
     # Prepare preview data
     preview_verses = parashat_data['verses'][:3] if parashat_data.get('verses') else []
-    english_preview = " ".join([v['en'] for v in preview_verses])
-    hebrew_preview = " ".join([v['he'] for v in preview_verses])
+    english_preview = " ".join([v.en for v in preview_verses])
+    hebrew_preview = " ".join([v.he for v in preview_verses])
     
-    return jsonify({
+    return {
         "title": parashat_data.get('title_en', 'Unknown'),
-        "hebrew_date": hebrew_date,
+        "hebrew_date": parashat_data.get('hebrew_date', ''),
         "gregorian_date": parashat_data.get('gregorian_date', ''),
         "ref": parashat_data.get('parasha_ref', 'Unknown'),
         "total_verses": len(parashat_data.get('verses', [])),
         "english_preview": english_preview,
         "hebrew_preview": hebrew_preview,
+        "first_verse": parashat_data['verses'][0] if parashat_data.get('verses') else None,
+        "last_verse": parashat_data['verses'][-1] if parashat_data.get('verses') else None,
         "verses": parashat_data.get('verses', []),
         "book": parashat_data.get('book', 'Unknown')
-    })
+    }, 200
+
+def verse_view(payload, status, args, verses_by_default=True):
+    """
+    Narrow a verse endpoint's (payload, status) by its query arguments:
+      fields=title,ref,...  only these top-level keys
+      preview=1             no verses, just the previews and totals
+      chapter=5 or 5-7      only the verses of these chapters
+      offset=N, limit=N     a page of those verses, described under "page"
+    Verses are included by default when verses_by_default is set, otherwise
+    only when a chapter, offset or limit is given or fields asks for them.
+    args is Flask's or Starlette's query arguments.
+    """
+    if status != 200:
+        return payload, status
+    try:
+        offset = int(args.get('offset') or 0)
+        limit = int(args['limit']) if args.get('limit') else None
+        chapters = args.get('chapter', '')
+        if chapters:
+            first_chapter, _, last_chapter = chapters.partition('-')
+            first_chapter, last_chapter = int(first_chapter), int(last_chapter or first_chapter)
+    except ValueError:
+        return {"error": "offset, limit and chapter must be integers"}, 400
+    if offset < 0 or (limit is not None and limit < 0):
+        return {"error": "offset and limit must not be negative"}, 400
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()]
+
+    payload = dict(payload)
+    verses = payload.pop("verses", [])
+    paged = bool(chapters or offset or limit is not None)
+    preview = args.get('preview', '').lower() in ('1', 'true', 'yes')
+    if not preview and (verses_by_default or paged or "verses" in fields):
+        if chapters:
+            verses = [v for v in verses if first_chapter <= v.chapter <= last_chapter]
+        if paged:
+            end = len(verses) if limit is None else offset + limit
+            payload["page"] = {"offset": offset, "limit": limit, "total": len(verses),
+                               "next_offset": end if end < len(verses) else None}
+            verses = verses[offset:end]
+        payload["verses"] = verses
+
+    if fields:
+        payload = {key: value for key, value in payload.items() if key in fields}
+    return payload, 200
+
+# week_reading results by Shabbat date and verse store revision, warmed by the
+# prefetch scheduler so the upcoming weeks are a dictionary lookup
+_week_cache = {}
+_week_cache_lock = threading.Lock()
+WEEK_CACHE_SIZE = 64
+
+def _week_key(weeks_ahead):
+    shabbat = parashat_generator.get_next_shabbat_date(weeks_ahead).date()
+    return shabbat, verse_store.read_manifest().get("revision", 0)
+
+def cached_parasha_data(weeks_ahead):
+    """The cached week_reading result for a week, or None."""
+    return _week_cache.get(_week_key(weeks_ahead))
+
+def read_reading(ref, text_data=None):
+    """
+    Read and clean a whole reference the way collect_deck cleans a deck's
+    ranges, from one verse store read, or from text_data when the caller
+    already has the text. Returns (range_objs, groups, complete), where
+    range_objs is the reference as /generate ranges (None if it does not
+    parse) and groups are collect_deck's per-range verse groups.
+    """
+    range_objs = range_plan.range_objs_for(ref)
+    if range_objs is None:
+        return None, [], False
+    if text_data is None:
+        with tracing.span("fetch", ref):
+            text_data = verse_store.get_text(ref)
+    if not text_data or "error" in text_data:
+        logger.error("Verse store has no text for %s: %s", ref, text_data)
+        return range_objs, [], False
+    groups, complete = range_plan.assemble(range_plan.plan(range_objs), range_plan.chapter_texts(text_data))
+    return range_objs, groups, complete
+
+def week_reading(weeks_ahead, text_data=None):
+    """
+    Resolve a week's reading: its schedule entry, its dates and its verses,
+    read once with read_reading. Returns None when there is no text. Besides
+    the fields /get_parashat_data shows, the result keeps the reading's deck
+    ranges (range_objs, ranges), so /generate renders the whole reading
+    without reading it again, and whether it was read in full (complete).
+    """
+    target_date = parashat_generator.get_next_shabbat_date(weeks_ahead)
+    reading = parasha_schedule.reading_for_date(target_date)
+    tracing.debug(logger, "Reading for %s (weeks_ahead: %s): %s", target_date.date(), weeks_ahead, reading.ref)
+    range_objs, groups, complete = read_reading(reading.ref, text_data)
+    verses = [verse for group in groups for verse in group['verses']]
+    if not verses:
+        logger.error("No verses for %s", reading.ref)
+        return None
+    return {
+        "title_en": reading.title,
+        "hebrew_date": get_hebrew_date_for_gregorian(target_date.year, target_date.month, target_date.day),
+        "gregorian_date": target_date.strftime("%A, %B %d, %Y"),
+        "parasha_ref": reading.ref,
+        "book": range_objs[0]['book'],
+        "verses": verses,
+        "range_objs": range_objs,
+        "ranges": groups,
+        "complete": complete,
+    }
+
+def parasha_data_for_week(weeks_ahead, text_data=None):
+    """
+    week_reading for a week, from the cache when it has been built before.
+    Results are shared between requests, so callers must not change them.
+    """
+    key = _week_key(weeks_ahead)
+    parashat_data = _week_cache.get(key)
+    if parashat_data is not None:
+        return parashat_data
+
+    def build():
+        parashat_data = _week_cache.get(key)  # finished while this caller was waiting
+        if parashat_data is None:
+            parashat_data = week_reading(weeks_ahead, text_data)
+            if parashat_data and parashat_data['complete']:
+                with _week_cache_lock:
+                    if len(_week_cache) >= WEEK_CACHE_SIZE:
+                        _week_cache.pop(min(_week_cache))  # the earliest Shabbat
+                    _week_cache[key] = parashat_data
+        return parashat_data
+
+    # Concurrent requests for the same week build it once
+    return singleflight.do(f"week {key[0]} {key[1]}", build)[0]
+
+@app.route("/get_parashat_data/<int:weeks_ahead>")
+def get_parashat_data(weeks_ahead):
+    """
+    API endpoint to get parashat data for a specific week.
+    """
+    parashat_data = parasha_data_for_week(weeks_ahead)
+    payload, status = verse_view(*parashat_data_payload(weeks_ahead, parashat_data), request.args)
+    return jsonify(payload), status
+
+def full_parasha_ranges(parashat_data):
+    """The verse_ranges JSON /generate uses for a whole week's reading."""
+    first = parashat_data['verses'][0]
+    last = parashat_data['verses'][-1]
+    return json.dumps([{"book": parashat_data['book'], "range": f"{first.chapter}:{first.verse}-{last.chapter}:{last.verse}"}])
+
+def week_deck(parashat_data, range_objs, verse_ranges):
+    """collect_deck's result for a deck of a week's whole reading, from the week's verses; None for other decks."""
+    if range_objs != parashat_data['range_objs']:
+        return None
+    return deck_data(parashat_data['book'], verse_ranges, parashat_data['ranges']), parashat_data['complete']
 
 @app.route("/generate")
 def generate_pptx():
     """
     Generates the PPTX file for the current week or future week with optional verse ranges.
     Supports both weeks_ahead (for dropdown) and ref (for date picker) parameters.
-    Now supports multiple, arbitrary ranges and logs all steps for debugging.
+    Now supports multiple, arbitrary ranges; each step is logged at DEBUG level
+    or, for a single request, in trace debug mode. With mode=job the deck is
+    built in the background instead (see /jobs/<job_id>).
     """
-    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
-    logger = logging.getLogger("generate_pptx")
+    deck_request, error = generate_request(request.args)
+    if error:
+        return error
+    range_objs, default_book, verse_ranges, collected = deck_request
 
-    # Get parameters from request
-    weeks_ahead = request.args.get('weeks_ahead', type=int)
-    sefaria_ref = request.args.get('ref', '')
-    verse_ranges = request.args.get('verse_ranges', '')  # Can be JSON array or old string
+    # The deck depends only on the ranges, the stored text and the layout, so a
+    # hash of those is both the cache key and a strong ETag
+    filename = f"{default_book}_verses.pptx"
+    deck_key = deck_cache.key_for(range_objs)
+    if request.args.get('mode') == 'job':
+        return start_deck_job(deck_key, range_objs, default_book, verse_ranges, filename, collected)
+    if deck_key in request.if_none_match:
+        logger.info("Deck %s not modified", deck_key)
+        response = app.response_class(status=304)
+        response.set_etag(deck_key)
+        return response
+    cached_path = deck_cache.lookup(deck_key)
+    if cached_path is not None:
+        logger.info("Serving cached deck %s", deck_key)
+        try:
+            return send_deck(cached_path, filename, deck_key)
+        except FileNotFoundError:
+            logger.info("Deck %s was evicted by another worker; rendering it again", deck_key)
+
+    path, complete = build_deck(deck_key, range_objs, default_book, verse_ranges, collected=collected)
+    if complete:
+        return send_deck(path, filename, deck_key)
+    # Not cached: the open handle keeps the spool file readable until it is sent
+    try:
+        deck_file = open(path, "rb")
+    finally:
+        os.unlink(path)
+    return send_deck(deck_file, filename, deck_key)
 
-    logger.info(f"Received request: ref={sefaria_ref}, verse_ranges={verse_ranges}, weeks_ahead={weeks_ahead}")
+def generate_request(args):
+    """
+    Parse /generate's parameters into (range_objs, default_book, verse_ranges,
+    collected). Returns (that, None), or (None, (error, status)). collected is
+    collect_deck's result when the deck is a whole week's reading, whose
+    verses were read with the week, and None otherwise.
+    """
+    weeks_ahead = args.get('weeks_ahead', type=int)
+    sefaria_ref = args.get('ref', '')
+    verse_ranges = args.get('verse_ranges', '')  # Can be JSON array or old string
 
-    # Helper to fetch and log a single range
-    def fetch_range(book, range_str):
-        ref = f"{book} {range_str}"
-        url = f"https://www.sefaria.org/api/texts/{ref}?context=0"
-        logger.info(f"Fetching Sefaria API: {url}")
-        resp = requests.get(url)
-        logger.info(f"Sefaria API response for {ref}: {resp.status_code}")
-        try:
-            data = resp.json()
-            logger.info(f"Sefaria API JSON for {ref}: {data}")
-        except Exception as e:
-            logger.error(f"Failed to parse JSON for {ref}: {e}")
-            data = {}
-        return data
+    logger.info("Received request: ref=%s, verse_ranges=%s, weeks_ahead=%s", sefaria_ref, verse_ranges, weeks_ahead)
 
     # Determine which method to use
     if weeks_ahead is not None:
-        logger.info(f"Fetching data for week {weeks_ahead} weeks ahead and generating presentation...")
-        parashat_data = parashat_generator.get_parasha_data(weeks_ahead=weeks_ahead)
+        tracing.debug(logger, "Fetching data for week %s weeks ahead and generating presentation...", weeks_ahead)
+        parashat_data = parasha_data_for_week(weeks_ahead)
         if not parashat_data:
-            return "Error: Could not fetch parashat data.", 500
+            return None, ("Error: Could not fetch parashat data.", 500)
         default_book = parashat_data['book']
         # If no verse_ranges, use the full parashat range
         if not verse_ranges:
-            first = parashat_data['verses'][0]
-            last = parashat_data['verses'][-1]
-            verse_ranges = json.dumps([{"book": default_book, "range": f"{first['chapter']}:{first['verse']}-{last['chapter']}:{last['verse']}"}])
+            verse_ranges = full_parasha_ranges(parashat_data)
     elif sefaria_ref:
         default_book = sefaria_ref
     else:
-        return "Error: Either weeks_ahead or ref parameter is required.", 400
+        return None, ("Error: Either weeks_ahead or ref parameter is required.", 400)
 
     # Parse and fetch all ranges
-    all_verses = []
     # Try to parse as JSON array first
     try:
         range_objs = json.loads(verse_ranges)
@@ -204,65 +454,172 @@ def generate_pptx():
         # Fallback: treat as old comma-separated string, all from default_book
         range_list = [r.strip() for r in verse_ranges.split(',') if r.strip()]
         range_objs = [{"book": default_book, "range": r} for r in range_list]
-    logger.info(f"Parsed range objects: {range_objs}")
+    tracing.debug(logger, "Parsed range objects: %s", range_objs)
+    collected = week_deck(parashat_data, range_objs, verse_ranges) if weeks_ahead is not None else None
+    return (range_objs, default_book, verse_ranges, collected), None
+
+def start_deck_job(deck_key, range_objs, default_book, verse_ranges, filename, collected=None):
+    """Queue a deck as a background job and answer 202 with where to poll."""
+    def build(progress):
+        path = deck_cache.lookup(deck_key)
+        if path is not None:
+            return path, True
+        return build_deck(deck_key, range_objs, default_book, verse_ranges, progress, collected)
+
+    job_id = jobs.submit(build, filename, deck_key)
+    logger.info("Queued deck %s as job %s", deck_key, job_id)
+    return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}",
+                    "download_url": f"/jobs/{job_id}/download"}), 202
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """
+    Status of a /generate?mode=job job: queued, running, done or failed, with
+    chapters fetched and slides rendered so far under progress.
+    """
+    state = jobs.status(job_id)
+    if state is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    if state["status"] == "done":
+        state["download_url"] = f"/jobs/{job_id}/download"
+    return jsonify(state)
+
+@app.route("/jobs/<job_id>/download")
+def job_download(job_id):
+    state = jobs.status(job_id)
+    if state is None:
+        return "Error: Unknown or expired job.", 404
+    if state["status"] != "done":
+        return f"Error: Job is {state['status']}.", 409
+    try:
+        return send_deck(jobs.deck_path(job_id), state["filename"], state["etag"])
+    except FileNotFoundError:
+        return "Error: Unknown or expired job.", 404
 
-    # Process each verse range
-    for range_obj in range_objs:
-        book = range_obj['book']
-        range_str = range_obj['range']
-        
-        logger.info(f"Processing range: {book} {range_str}")
-        
-        # Split multi-chapter ranges to avoid Sefaria API issues
-        split_ranges = split_multi_chapter_range(range_str)
-        range_verses = []
-        
-        for split_range in split_ranges:
-            logger.info(f"Fetching split range: {book} {split_range}")
-            data = fetch_range(book, split_range)
-            
-            if not data or not isinstance(data, dict):
-                logger.error(f"Failed to fetch data for {book} {split_range}")
-                continue
-            
-            # Process the fetched data
-            verses_for_range = process_verse_data(data, split_range, book)
-            range_verses.extend(verses_for_range)
-        
-        # Add all verses for this range to the combined list
-        if range_verses:
-            all_verses.append({
-                'range': range_str,
-                'book': book,
-                'verses': range_verses
-            })
-            logger.info(f"Added {len(range_verses)} verses for range {range_str}")
+def build_deck(deck_key, range_objs, default_book, verse_ranges, progress=None, collected=None):
+    """
+    Render a deck into the deck cache, once for all concurrent requests for it
+    (and across workers with SINGLEFLIGHT_SCOPE=host). Returns (path,
+    complete); an incomplete deck is an uncached spool file owned by the caller.
+    progress and collected are passed to render_deck when this caller does
+    the rendering.
+    """
+    def render():
+        spool_path, complete = render_deck(range_objs, default_book, verse_ranges, progress, collected)
+        if complete:
+            return deck_cache.commit(deck_key, spool_path), True
+        return spool_path, False
+
+    def rendered_elsewhere():
+        path = deck_cache.lookup(deck_key)
+        return (path, True) if path else None
+
+    (path, complete), shared = singleflight.do(f"deck {deck_key}", render, check=rendered_elsewhere)
+    if shared and not complete:
+        # Another request's incomplete spool file is not ours to send
+        return render()
+    return path, complete
+
+def _fetch_chapter(book, chapter):
+    """Read one whole chapter from the verse store ({} when it has no text)."""
+    ref = range_plan.chapter_ref(book, chapter)
+    tracing.debug(logger, "Reading verse store: %s", ref)
+    with tracing.span("fetch", ref):
+        data = verse_store.get_text(ref)
+    if not data or "error" in data:
+        logger.error("Verse store has no text for %s: %s", ref, data)
+        data = {}
+    return data
+
+def render_deck(range_objs, default_book, verse_ranges, progress=None, collected=None):
+    """
+    Fetch and clean every range and render the deck into a new spool file.
+    Returns (spool_path, complete); a deck missing any range is not complete
+    and should be sent but not cached. progress, if given, is called with
+    ("chapters", fetched, total) and ("slides", rendered, total). collected,
+    if given, is collect_deck's result for the deck, already at hand.
+    """
+    parashat_data, complete = collected or collect_deck(range_objs, default_book, verse_ranges, progress)
+    # Render into a spool file on disk rather than memory, then send it from there
+    spool_path = deck_cache.spool()
+    try:
+        # Pass the original verse_ranges for slide splitting
+        slide_progress = (lambda done, total: progress("slides", done, total)) if progress else None
+        parashat_generator.create_presentation(parashat_data, output=spool_path, verse_ranges=verse_ranges,
+                                               progress=slide_progress)
+    except BaseException:
+        os.unlink(spool_path)
+        raise
+    return spool_path, complete
+
+def collect_deck(range_objs, default_book, verse_ranges, progress=None):
+    """
+    Fetch and clean every range of a deck. Returns (parashat_data, complete),
+    where parashat_data is what create_presentation takes. progress, if given,
+    is called with ("chapters", fetched, total) as the chapters arrive.
+    """
+    # Merge the ranges and fetch every chapter they touch once, concurrently
+    # on the shared pool
+    fetch_plan = range_plan.plan(range_objs)
+    tracing.debug(logger, "Planned %s chapter fetches for %s ranges", len(fetch_plan.spans), len(range_objs))
+    futures = {
+        key: fetch_pool.submit(tracing.propagate(_fetch_chapter), *key)
+        for key in fetch_plan.spans
+    }
+
+    if progress:
+        progress("chapters", 0, len(futures))
+        fetched = itertools.count(1)
+        for future in futures.values():
+            future.add_done_callback(lambda _: progress("chapters", next(fetched), len(futures)))
+    _, not_done = concurrent.futures.wait(futures.values(), timeout=FETCH_DEADLINE)
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        logger.error("%s of %s fetches missed the %ss deadline", len(not_done), len(futures), FETCH_DEADLINE)
+
+    # Fan the chapters back out to the ranges, in the order given. A deck
+    # missing any range is still sent, but not cached.
+    texts = {}
+    for key, future in futures.items():
+        if future in not_done or future.exception() is not None:
+            logger.error("Failed to fetch data for %s", range_plan.chapter_ref(*key))
+            texts[key] = None
         else:
-            logger.warning(f"No verses found for range {range_str}")
+            texts[key] = future.result()
+    all_verses, complete = range_plan.assemble(fetch_plan, texts)
+    for group in all_verses:
+        tracing.debug(logger, "Added %s verses for range %s", len(group['verses']), group['range'])
 
-    logger.info(f"All combined verses for presentation: {all_verses}")
-    # Prepare data for presentation generator
+    tracing.debug(logger, "All combined verses for presentation: %s", all_verses)
+    return deck_data(default_book, verse_ranges, all_verses), complete
+
+def deck_data(default_book, verse_ranges, all_verses):
+    """create_presentation's input for a deck's per-range verse groups."""
     # Flatten all verses for legacy compatibility, but keep range info for slides
     flat_verses = []
     for group in all_verses:
         flat_verses.extend(group['verses'])
-    parashat_data = {
+    return {
         "title_en": f"{default_book} {verse_ranges}",
         "parasha_ref": default_book,
         "book": default_book,
         "verses": flat_verses,
         "ranges": all_verses  # Pass the grouped ranges for correct slide splitting
     }
-    file_stream = io.BytesIO()
-    # Pass the original verse_ranges for slide splitting
-    parashat_generator.create_presentation(parashat_data, output=file_stream, verse_ranges=verse_ranges)
-    file_stream.seek(0)
-    filename = f"{default_book}_verses.pptx"
+
+def send_deck(deck, filename, deck_key):
+    """
+    Send a rendered deck (a path or an open file) as a download, tagged with
+    the deck's strong ETag. Paths go out through the server's file wrapper,
+    which uses sendfile under gunicorn.
+    """
     return send_file(
-        file_stream,
+        deck,
         as_attachment=True,
         download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
+        mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        etag=deck_key
     )
 
 @app.route("/get_parashat_names")
@@ -270,38 +627,133 @@ def get_parashat_names():
     """
     Returns a list of future parashat names (weeks_ahead, title) for weeks 1-52.
     """
-    results = []
-    for i in range(1, 53):
+    return jsonify(weekly_listing(range(1, 53)))
+
+@app.route("/export")
+def export_decks():
+    """
+    Stream a ZIP of full-reading decks, one per Shabbat from start to end
+    (YYYY-MM-DD), or one per repeated ref parameter, with a manifest.json.
+    """
+    refs = request.args.getlist('ref')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    if refs:
+        export_jobs = bulk_export.jobs_for_refs(refs)
+        filename = "readings.zip"
+    elif start and end:
         try:
-            target_date = parashat_generator.get_next_shabbat_date(i)
-            year = target_date.year
-            month = target_date.month
-            day = target_date.day
-            cal_url = f"https://www.sefaria.org/api/calendars?year={year}&month={month}&day={day}"
-            cal = requests.get(cal_url).json()
-            parashat_item = next(j for j in cal["calendar_items"] if j["title"]["en"] == "Parashat Hashavua")
-            
-            # Get Hebrew date in English format
-            hebrew_date = get_hebrew_date_for_gregorian(year, month, day)
-            
-            # Format the date string
-            gregorian_str = target_date.strftime("%a, %d %B %Y")
-            if hebrew_date and hebrew_date != "Hebrew date not available":
-                date_display = f"{gregorian_str} · {hebrew_date}"
-            else:
-                date_display = gregorian_str
-            
-            results.append({
-                'weeks_ahead': i,
-                'title': parashat_item["displayValue"]["en"],
-                'date_display': date_display,
-                'gregorian_date': gregorian_str,
-                'hebrew_date': hebrew_date
-            })
-        except Exception as e:
-            print(f"Error getting parashat for week {i}: {e}")
-            continue
-    return jsonify(results)
+            start_date = datetime.date.fromisoformat(start)
+            end_date = datetime.date.fromisoformat(end)
+        except ValueError:
+            return "Error: Invalid date format. Use YYYY-MM-DD", 400
+        export_jobs = bulk_export.jobs_between(start_date, end_date)
+        filename = f"parashot_{start_date.isoformat()}_{end_date.isoformat()}.zip"
+    else:
+        return "Error: Either start and end, or ref parameters are required.", 400
+
+    if not export_jobs:
+        return "Error: No readings in that span.", 400
+    if len(export_jobs) > bulk_export.MAX_DECKS:
+        return f"Error: At most {bulk_export.MAX_DECKS} decks per export.", 400
+
+    try:
+        chunks = bulk_export.start(export_jobs, collect_deck)
+    except bulk_export.ExportFailed as e:
+        logger.error("Export of %s deck(s) failed: %s", len(export_jobs), e)
+        return f"Error: {e}", 503
+
+    return app.response_class(
+        chunks,
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+SEFARIA_CALENDAR_URL = f"{verse_store.SEFARIA_API_URL}/calendars"
+
+def calendar_url(target_date):
+    """Sefaria calendar API URL for a date."""
+    return f"{SEFARIA_CALENDAR_URL}?year={target_date.year}&month={target_date.month}&day={target_date.day}"
+
+def pick_calendar_reading(cal):
+    """
+    The primary Torah reading in a Sefaria calendar response, or None.
+    """
+    reading = None
+    if cal.get("calendar_items"):
+        # Look for any Torah reading (not just "Parashat Hashavua")
+        for item in cal["calendar_items"]:
+            # Check if it's a Torah reading (has a ref and is not a special event)
+            if "ref" in item and item.get("category") != "mevarchim":
+                # Prioritize "Parashat Hashavua" but accept any Torah reading
+                if item.get("title", {}).get("en") == "Parashat Hashavua":
+                    reading = item
+                    break
+                elif not reading:  # Take the first Torah reading if no "Parashat Hashavua" found
+                    reading = item
+    return reading
+
+def parashat_for_date_payload(target_date, reading, text_data):
+    """
+    JSON body and status for /get_parashat_for_date, given the calendar reading
+    picked for the date and the text of its reference.
+    """
+    if not reading:
+        return {"error": f"No Torah portion found for {target_date.strftime('%A, %B %d, %Y')}. This may be a day without a designated public reading."}, 404
+
+    if not text_data or "error" in text_data:
+        return {"error": "Could not fetch Torah text from Sefaria."}, 500
+    
+    _, groups, _ = read_reading(reading["ref"], text_data)
+    all_verses = [verse for group in groups for verse in group['verses']]
+    if not all_verses:
+        return {"error": "No verses found in the Torah portion."}, 500
+    
+    # Get Hebrew date for this date
+    hebrew_date = get_hebrew_date_for_gregorian(target_date.year, target_date.month, target_date.day)
+    
+    # Format the date string for display
+    gregorian_str = target_date.strftime("%a, %d %B %Y")
+    date_display = f"{gregorian_str} · {hebrew_date}" if hebrew_date and hebrew_date != "Hebrew date not available" else gregorian_str
+    
+    # Prepare preview data
+    preview_verses = all_verses[:3] if all_verses else []
+    english_preview = " ".join([v.en for v in preview_verses])
+    hebrew_preview = " ".join([v.he for v in preview_verses])
+    
+    return {
+        "title": reading["displayValue"]["en"],
+        "ref": reading["ref"],
+        "date_display": date_display,
+        "gregorian_date": gregorian_str,
+        "hebrew_date": hebrew_date,
+        "total_verses": len(all_verses),
+        "english_preview": english_preview,
+        "hebrew_preview": hebrew_preview,
+        "first_verse": all_verses[0],
+        "last_verse": all_verses[-1],
+        "verses": all_verses,  # left out by verse_view unless asked for
+        "weeks_ahead": None  # This is not a weekly reading
+    }, 200
+
+def stale_headers(payload, status, upstream_response):
+    """
+    Headers for a payload built from an upstream response. One served stale
+    (the upstream being down, see http_cache.py) is marked in the payload and
+    with a Warning header.
+    """
+    if not upstream_response.stale or status != 200:
+        return {}
+    payload["stale"] = True
+    return {"Warning": http_headers.STALE_WARNING}
+
+def upstream_unavailable(error):
+    """JSON body, status and headers for an upstream that is down with nothing cached to fall back on."""
+    logger.warning("Upstream unavailable: %s", error)
+    headers = {}
+    if isinstance(error, circuit_breaker.CircuitOpen):
+        headers["Retry-After"] = str(max(1, math.ceil(error.retry_in)))
+    return {"error": "Sefaria cannot be reached right now. Please try again shortly."}, 503, headers
 
 @app.route("/get_parashat_for_date")
 def get_parashat_for_date():
@@ -318,100 +770,38 @@ def get_parashat_for_date():
         target_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
         
         # Use Sefaria's calendar API to find the reading for that day
-        cal_url = f"https://www.sefaria.org/api/calendars?year={target_date.year}&month={target_date.month}&day={target_date.day}"
-        cal_res = requests.get(cal_url)
+        cal_res = http_cache.get(calendar_url(target_date))
         cal_res.raise_for_status()
-        cal = cal_res.json()
-
-        # Find the primary Torah reading
-        reading = None
-        if cal.get("calendar_items"):
-            # Look for any Torah reading (not just "Parashat Hashavua")
-            for item in cal["calendar_items"]:
-                # Check if it's a Torah reading (has a ref and is not a special event)
-                if "ref" in item and item.get("category") != "mevarchim":
-                    # Prioritize "Parashat Hashavua" but accept any Torah reading
-                    if item.get("title", {}).get("en") == "Parashat Hashavua":
-                        reading = item
-                        break
-                    elif not reading:  # Take the first Torah reading if no "Parashat Hashavua" found
-                        reading = item
-
-        if not reading:
-            return jsonify({"error": f"No Torah portion found for {target_date.strftime('%A, %B %d, %Y')}. This may be a day without a designated public reading."}), 404
-
-        # Get the reference and fetch the text data
-        parasha_ref = reading["ref"]
-        
-        # Use the existing parashat_generator to get the text data
-        # We'll need to modify the approach since we don't have weeks_ahead
-        # Let's fetch the text directly using the reference
-        text_version = "vtitle=The_Contemporary_Torah,_JPS,_2006"
-        text_url = f"https://www.sefaria.org/api/texts/{parasha_ref}?{text_version}&context=0"
-        text_response = requests.get(text_url)
-        
-        if text_response.status_code != 200:
-            return jsonify({"error": "Could not fetch Torah text from Sefaria."}), 500
-            
-        text_data = text_response.json()
-        
-        # Process the text data similar to parashat_generator
-        all_verses = []
-        for chap_idx, chapter_ref in enumerate(text_data.get('sections', [])):
-            chapter_num = int(chapter_ref)
-            
-            if chap_idx >= len(text_data.get('text', [])) or chap_idx >= len(text_data.get('he', [])):
-                continue
-
-            en_verses_for_chap = text_data['text'][chap_idx]
-            he_verses_for_chap = text_data['he'][chap_idx]
-
-            try:
-                start_vs = int(text_data['sectionNames'][chap_idx].split(':')[1])
-            except (IndexError, ValueError):
-                start_vs = 1
-
-            for verse_idx, (en, he) in enumerate(zip(en_verses_for_chap, he_verses_for_chap)):
-                verse_num = start_vs + verse_idx
-                all_verses.append({
-                    "chapter": chapter_num,
-                    "verse": verse_num,
-                    "en": parashat_generator.clean_text(en),
-                    "he": parashat_generator.clean_text(he)
-                })
-
-        if not all_verses:
-            return jsonify({"error": "No verses found in the Torah portion."}), 500
-        
-        # Get Hebrew date for this date
-        hebrew_date = get_hebrew_date_for_gregorian(target_date.year, target_date.month, target_date.day)
-        
-        # Format the date string for display
-        gregorian_str = target_date.strftime("%a, %d %B %Y")
-        date_display = f"{gregorian_str} · {hebrew_date}" if hebrew_date and hebrew_date != "Hebrew date not available" else gregorian_str
-        
-        # Prepare preview data
-        preview_verses = all_verses[:3] if all_verses else []
-        english_preview = " ".join([v['en'] for v in preview_verses])
-        hebrew_preview = " ".join([v['he'] for v in preview_verses])
-        
-        return jsonify({
-            "title": reading["displayValue"]["en"],
-            "ref": parasha_ref,
-            "date_display": date_display,
-            "gregorian_date": gregorian_str,
-            "hebrew_date": hebrew_date,
-            "total_verses": len(all_verses),
-            "english_preview": english_preview,
-            "hebrew_preview": hebrew_preview,
-            "weeks_ahead": None  # This is not a weekly reading
-        })
+        reading = pick_calendar_reading(cal_res.json())
+
+        # Read the text data from the local verse store
+        text_data = verse_store.get_text(reading["ref"]) if reading else None
+        payload, status = verse_view(*parashat_for_date_payload(target_date, reading, text_data), request.args,
+                                     verses_by_default=False)
+        headers = stale_headers(payload, status, cal_res)
+        return jsonify(payload), status, headers
         
     except ValueError:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+    except requests.exceptions.RequestException as e:
+        payload, status, headers = upstream_unavailable(e)
+        return jsonify(payload), status, headers
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+@app.route("/cache_stats")
+def cache_stats():
+    """
+    Hit/miss counters for the shared upstream HTTP cache, plus per-host
+    connection reuse for the pooled HTTP client, the upstream circuit
+    breakers, the rendered-deck cache, the cleaned-verse cache, the prefetch
+    scheduler, request coalescing and background jobs.
+    """
+    return jsonify({**http_cache.stats(), "connections": http_client.stats(), "breakers": circuit_breaker.stats(),
+                    "decks": deck_cache.stats(), "verses": parashat_generator.verse_cache_stats(),
+                    "prefetch": prefetch.stats(),
+                    "singleflight": singleflight.stats(), "jobs": jobs.stats()})
+
 @app.route("/get_special_readings")
 def get_special_readings():
     """
@@ -461,331 +851,125 @@ def get_special_readings():
     }
     return jsonify(special_readings)
 
+def custom_verses_ref(args):
+    """
+    Build the reference for /get_custom_verses from its query arguments.
+    Returns (ref, None) or (None, (error_payload, status)).
+    """
+    book = args.get('book', '').strip()
+    start_chapter = args.get('start_chapter', '').strip()
+    start_verse = args.get('start_verse', '').strip()
+    end_chapter = args.get('end_chapter', '').strip()
+    end_verse = args.get('end_verse', '').strip()
+    
+    # Validate inputs
+    if not all([book, start_chapter, start_verse, end_chapter, end_verse]):
+        return None, ({"error": "All fields are required: book, start_chapter, start_verse, end_chapter, end_verse"}, 400)
+    
+    # Validate that inputs are numbers
+    try:
+        int(start_chapter)
+        int(start_verse)
+        int(end_chapter)
+        int(end_verse)
+    except ValueError:
+        return None, ({"error": "Chapter and verse numbers must be integers"}, 400)
+    
+    # Build Sefaria reference
+    if start_chapter == end_chapter:
+        ref = f"{book} {start_chapter}:{start_verse}-{end_verse}"
+    else:
+        ref = f"{book} {start_chapter}:{start_verse}-{end_chapter}:{end_verse}"
+    return ref, None
+
+def custom_verses_payload(ref, text_data):
+    """
+    JSON body and status for /get_custom_verses, given the text of the reference.
+    """
+    if not text_data or "error" in text_data:
+        return {"error": f"Could not fetch Torah text for reference: {ref}"}, 500
+    
+    _, groups, _ = read_reading(ref, text_data)
+    all_verses = [verse for group in groups for verse in group['verses']]
+    if not all_verses:
+        return {"error": "No verses found for the specified reference."}, 500
+    
+    # Prepare preview data
+    preview_verses = all_verses[:3] if all_verses else []
+    english_preview = " ".join([v.en for v in preview_verses])
+    hebrew_preview = " ".join([v.he for v in preview_verses])
+    
+    return {
+        "title": f"Custom Reading: {ref}",
+        "ref": ref,
+        "date_display": f"Custom selection: {ref}",
+        "gregorian_date": f"Custom: {ref}",
+        "hebrew_date": "Custom selection",
+        "total_verses": len(all_verses),
+        "english_preview": english_preview,
+        "hebrew_preview": hebrew_preview,
+        "first_verse": all_verses[0],
+        "last_verse": all_verses[-1],
+        "verses": all_verses,  # left out by verse_view unless asked for
+        "weeks_ahead": None  # This is a custom selection
+    }, 200
+
 @app.route("/get_custom_verses")
 def get_custom_verses():
     """
     Get verses for user-specified reference (book, chapter, verse range).
     """
     try:
-        book = request.args.get('book', '').strip()
-        start_chapter = request.args.get('start_chapter', '').strip()
-        start_verse = request.args.get('start_verse', '').strip()
-        end_chapter = request.args.get('end_chapter', '').strip()
-        end_verse = request.args.get('end_verse', '').strip()
-        
-        # Validate inputs
-        if not all([book, start_chapter, start_verse, end_chapter, end_verse]):
-            return jsonify({"error": "All fields are required: book, start_chapter, start_verse, end_chapter, end_verse"}), 400
-        
-        # Validate that inputs are numbers
-        try:
-            int(start_chapter)
-            int(start_verse)
-            int(end_chapter)
-            int(end_verse)
-        except ValueError:
-            return jsonify({"error": "Chapter and verse numbers must be integers"}), 400
+        ref, error = custom_verses_ref(request.args)
+        if error:
+            payload, status = error
+            return jsonify(payload), status
         
-        # Build Sefaria reference
-        if start_chapter == end_chapter:
-            ref = f"{book} {start_chapter}:{start_verse}-{end_verse}"
-        else:
-            ref = f"{book} {start_chapter}:{start_verse}-{end_chapter}:{end_verse}"
-        
-        print(f"Fetching custom verses for ref: {ref}")
-        
-        # Fetch the text data using the same logic as date-based approach
-        text_version = "vtitle=The_Contemporary_Torah,_JPS,_2006"
-        text_url = f"https://www.sefaria.org/api/texts/{ref}?{text_version}&context=0"
-        text_response = requests.get(text_url)
-        
-        if text_response.status_code != 200:
-            return jsonify({"error": f"Could not fetch Torah text for reference: {ref}"}), 500
-            
-        text_data = text_response.json()
-        
-        # Process the text data similar to parashat_generator
-        all_verses = []
-        for chap_idx, chapter_ref in enumerate(text_data.get('sections', [])):
-            chapter_num = int(chapter_ref)
-            
-            if chap_idx >= len(text_data.get('text', [])) or chap_idx >= len(text_data.get('he', [])):
-                continue
-
-            en_verses_for_chap = text_data['text'][chap_idx]
-            he_verses_for_chap = text_data['he'][chap_idx]
-
-            try:
-                start_vs = int(text_data['sectionNames'][chap_idx].split(':')[1])
-            except (IndexError, ValueError):
-                start_vs = 1
-
-            for verse_idx, (en, he) in enumerate(zip(en_verses_for_chap, he_verses_for_chap)):
-                verse_num = start_vs + verse_idx
-                all_verses.append({
-                    "chapter": chapter_num,
-                    "verse": verse_num,
-                    "en": parashat_generator.clean_text(en),
-                    "he": parashat_generator.clean_text(he)
-                })
-
-        if not all_verses:
-            return jsonify({"error": "No verses found for the specified reference."}), 500
+        tracing.debug(logger, "Fetching custom verses for ref: %s", ref)
         
-        # Prepare preview data
-        preview_verses = all_verses[:3] if all_verses else []
-        english_preview = " ".join([v['en'] for v in preview_verses])
-        hebrew_preview = " ".join([v['he'] for v in preview_verses])
-        
-        return jsonify({
-            "title": f"Custom Reading: {ref}",
-            "ref": ref,
-            "date_display": f"Custom selection: {ref}",
-            "gregorian_date": f"Custom: {ref}",
-            "hebrew_date": "Custom selection",
-            "total_verses": len(all_verses),
-            "english_preview": english_preview,
-            "hebrew_preview": hebrew_preview,
-            "weeks_ahead": None  # This is a custom selection
-        })
+        # Read the text data from the local verse store
+        text_data = verse_store.get_text(ref)
+        payload, status = verse_view(*custom_verses_payload(ref, text_data), request.args,
+                                     verses_by_default=False)
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
-def split_multi_chapter_range(range_str):
-    """Split multi-chapter ranges that might cause issues with Sefaria API"""
-    if ':' not in range_str or '-' not in range_str:
-        return [range_str]
-    
-    try:
-        start_part, end_part = range_str.split('-')
-        start_chapter, start_verse = map(int, start_part.split(':'))
-        end_chapter, end_verse = map(int, end_part.split(':'))
-        
-        if start_chapter == end_chapter:
-            # Single chapter range, no need to split
-            return [range_str]
-        
-        # Multi-chapter range - split into individual chapter requests
-        ranges = []
-        
-        # First chapter: from start_verse to end of chapter
-        ranges.append(f"{start_chapter}:{start_verse}-{start_chapter}:999")
-        
-        # Middle chapters (if any): entire chapters
-        for chapter in range(start_chapter + 1, end_chapter):
-            ranges.append(f"{chapter}:1-{chapter}:999")
-        
-        # Last chapter: from beginning to end_verse
-        ranges.append(f"{end_chapter}:1-{end_chapter}:{end_verse}")
-        
-        logger.info(f"Split multi-chapter range {range_str} into: {ranges}")
-        return ranges
-        
-    except (ValueError, IndexError) as e:
-        logger.warning(f"Could not parse range {range_str}: {e}")
-        return [range_str]
-
-def process_verse_data(data, range_str, book):
-    """Process verse data from Sefaria API response"""
-    verses = []
-    text_verses = data.get('text', [])
-    hebrew_verses = data.get('he', [])
-    sections = data.get('sections', [])
-    section_names = data.get('sectionNames', [])
-    
-    logger.info(f"Raw API response structure for {range_str}:")
-    logger.info(f"  text_verses type: {type(text_verses)}, length: {len(text_verses) if isinstance(text_verses, list) else 'N/A'}")
-    logger.info(f"  hebrew_verses type: {type(hebrew_verses)}, length: {len(hebrew_verses) if isinstance(hebrew_verses, list) else 'N/A'}")
-    logger.info(f"  sections: {sections}")
-    logger.info(f"  section_names: {section_names}")
-    
-    # Parse the range to get start/end chapters and verses
-    range_match = re.match(r'(\d+):(\d+)-(\d+):(\d+)', range_str)
-    if range_match:
-        start_chapter = int(range_match.group(1))
-        start_verse = int(range_match.group(2))
-        end_chapter = int(range_match.group(3))
-        end_verse = int(range_match.group(4))
-        logger.info(f"Parsed multi-chapter range: {start_chapter}:{start_verse}-{end_chapter}:{end_verse}")
-    else:
-        # Single chapter range
-        range_match = re.match(r'(\d+):(\d+)-(\d+)', range_str)
-        if range_match:
-            start_chapter = int(range_match.group(1))
-            start_verse = int(range_match.group(2))
-            end_chapter = start_chapter
-            end_verse = int(range_match.group(3))
-            logger.info(f"Parsed single-chapter range: {start_chapter}:{start_verse}-{end_verse}")
-        else:
-            logger.error(f"Could not parse range: {range_str}")
-            return verses
-    
-    # If text_verses is a list of lists (multi-chapter), enumerate by chapter
-    if text_verses and isinstance(text_verses[0], list):
-        logger.info(f"Detected multi-chapter structure for {range_str}")
-        logger.info(f"Sefaria sections array: {sections}")
-        logger.info(f"Number of chapters in response: {len(text_verses)}")
-        
-        # Create a mapping of expected chapters to their data
-        expected_chapters = list(range(start_chapter, end_chapter + 1))
-        logger.info(f"Expected chapters for range {range_str}: {expected_chapters}")
-        
-        # Track which chapters we actually process
-        processed_chapters = []
-        
-        for chap_idx, (en_chap, he_chap) in enumerate(zip(text_verses, hebrew_verses)):
-            logger.info(f"Processing chapter index {chap_idx}")
-            
-            # Try to determine chapter number from sections array first
-            if sections and chap_idx < len(sections):
-                chapter_num = sections[chap_idx]
-                logger.info(f"Using chapter number from sections array: {chapter_num}")
-            else:
-                # Fallback: assume chapters are in order starting from start_chapter
-                chapter_num = start_chapter + chap_idx
-                logger.info(f"Using fallback chapter number: {chapter_num}")
-            
-            logger.info(f"Processing chapter {chapter_num} (start_chapter={start_chapter}, end_chapter={end_chapter})")
-            
-            # Only process chapters within our expected range
-            if chapter_num not in expected_chapters:
-                logger.info(f"Skipping chapter {chapter_num} - not in expected chapters {expected_chapters}")
-                continue
-            
-            processed_chapters.append(chapter_num)
-            
-            # Determine verse start/end for this chapter
-            if chapter_num == start_chapter:
-                verse_start = start_verse
-            else:
-                verse_start = 1
-            if chapter_num == end_chapter:
-                verse_end = end_verse
-            else:
-                # For intermediate chapters, get all verses
-                verse_end = len(en_chap)
-            
-            logger.info(f"Chapter {chapter_num}: verses {verse_start}-{verse_end} (chapter has {len(en_chap)} verses)")
-            
-            for verse_idx, (en, he) in enumerate(zip(en_chap, he_chap), start=1):
-                verse_num = verse_idx
-                if verse_num < verse_start or verse_num > verse_end:
-                    logger.info(f"Skipping verse {chapter_num}:{verse_num} - outside range {verse_start}-{verse_end}")
-                    continue
-                clean_en = parashat_generator.clean_text(en)
-                clean_he = parashat_generator.clean_text(he)
-                verses.append({
-                    'chapter': chapter_num,
-                    'verse': verse_num,
-                    'en': clean_en,
-                    'he': clean_he
-                })
-                logger.info(f"Added verse {chapter_num}:{verse_num}")
-            
-            # Stop if we've processed all expected chapters
-            if len(verses) > 0 and chapter_num == end_chapter:
-                logger.info(f"Reached end chapter {end_chapter}, stopping enumeration")
-                break
-        
-        # Check for missing chapters
-        missing_chapters = [ch for ch in expected_chapters if ch not in processed_chapters]
-        if missing_chapters:
-            logger.warning(f"Missing chapters for range {range_str}: {missing_chapters}. Sefaria only returned chapters: {processed_chapters}")
-            
-            # Try to fetch missing chapters individually
-            logger.info(f"Attempting to fetch missing chapters individually...")
-            for missing_chapter in missing_chapters:
-                if missing_chapter == start_chapter:
-                    # First chapter: fetch from start_verse to end of chapter
-                    individual_range = f"{missing_chapter}:{start_verse}-{missing_chapter}:999"
-                elif missing_chapter == end_chapter:
-                    # Last chapter: fetch from beginning to end_verse
-                    individual_range = f"{missing_chapter}:1-{missing_chapter}:{end_verse}"
-                else:
-                    # Middle chapter: fetch entire chapter
-                    individual_range = f"{missing_chapter}:1-{missing_chapter}:999"
-                
-                logger.info(f"Fetching individual range: {individual_range}")
-                individual_data = fetch_range(book, individual_range)
-                
-                if individual_data and isinstance(individual_data, dict):
-                    individual_text = individual_data.get('text', [])
-                    individual_hebrew = individual_data.get('he', [])
-                    
-                    if individual_text and isinstance(individual_text[0], list):
-                        # Multi-chapter response, take first chapter
-                        en_chap = individual_text[0]
-                        he_chap = individual_hebrew[0]
-                    else:
-                        # Single chapter response
-                        en_chap = individual_text
-                        he_chap = individual_hebrew
-                    
-                    # Determine verse range for this chapter
-                    if missing_chapter == start_chapter:
-                        verse_start = start_verse
-                    else:
-                        verse_start = 1
-                    if missing_chapter == end_chapter:
-                        verse_end = end_verse
-                    else:
-                        verse_end = len(en_chap)
-                    
-                    logger.info(f"Adding missing chapter {missing_chapter}: verses {verse_start}-{verse_end}")
-                    
-                    for verse_idx, (en, he) in enumerate(zip(en_chap, he_chap), start=1):
-                        verse_num = verse_idx
-                        if verse_num < verse_start or verse_num > verse_end:
-                            continue
-                        clean_en = parashat_generator.clean_text(en)
-                        clean_he = parashat_generator.clean_text(he)
-                        verses.append({
-                            'chapter': missing_chapter,
-                            'verse': verse_num,
-                            'en': clean_en,
-                            'he': clean_he
-                        })
-                        logger.info(f"Added missing verse {missing_chapter}:{verse_num}")
-                else:
-                    logger.error(f"Failed to fetch individual range {individual_range}")
-    else:
-        # Single-chapter or flat list
-        logger.info(f"Detected single-chapter or flat structure for {range_str}")
-        verse_num = start_verse
-        for idx, (en, he) in enumerate(zip(text_verses, hebrew_verses)):
-            if verse_num > end_verse:
-                break
-            clean_en = parashat_generator.clean_text(en)
-            clean_he = parashat_generator.clean_text(he)
-            verses.append({
-                'chapter': start_chapter,
-                'verse': verse_num,
-                'en': clean_en,
-                'he': clean_he
-            })
-            logger.info(f"Added verse {start_chapter}:{verse_num}")
-            verse_num += 1
-    
-    logger.info(f"Cleaned verses for range {range_str}: {verses}")
-    return verses
+def warm_week(weeks_ahead):
+    """
+    Prefetch one upcoming week: its parasha data, its Sefaria calendar entry
+    and its full-parasha deck, rendered into the deck cache unless already
+    there. Returns False if the week's text is not available.
+    """
+    parashat_data = parasha_data_for_week(weeks_ahead)
+    if not parashat_data:
+        return False
 
-def fetch_range(book, range_str):
-    """Fetch verse data from Sefaria API"""
+    target_date = parashat_generator.get_next_shabbat_date(weeks_ahead).date()
     try:
-        url = f"https://www.sefaria.org/api/texts/{book}.{range_str}"
-        logger.info(f"Fetching from Sefaria: {url}")
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"Successfully fetched data for {book} {range_str}")
-        return data
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching {book} {range_str}: {e}")
-        return None
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing JSON for {book} {range_str}: {e}")
-        return None
+        http_cache.get(calendar_url(target_date))
+    except Exception as e:  # only a warm-up; /get_parashat_for_date reports its own errors
+        logger.warning("Could not prefetch the calendar for %s: %s", target_date, e)
+
+    verse_ranges = full_parasha_ranges(parashat_data)
+    range_objs = json.loads(verse_ranges)
+    deck_key = deck_cache.key_for(range_objs)
+    if not deck_cache.refresh(deck_key):
+        path, complete = build_deck(deck_key, range_objs, parashat_data['book'], verse_ranges,
+                                    collected=week_deck(parashat_data, range_objs, verse_ranges))
+        if not complete:
+            os.unlink(path)
+            return False
+    return True
+
+if verse_store.missing_books() and not verse_store.LIVE_FALLBACK:
+    # Every verse route would fail; say why once, at startup
+    logger.error("Verse store in %s is missing %s. Run `python verse_store.py sync` "
+                 "(bin/post_compile does on Heroku) or set SEFARIA_LIVE_FALLBACK=1.",
+                 verse_store.STORE_DIR, ", ".join(verse_store.missing_books()))
+
+prefetch.start(warm_week)
 
 if __name__ == "__main__":
     print("Starting Flask server. Open http://127.0.0.1:5001 in your web browser.")
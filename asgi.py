@@ -0,0 +1,190 @@
+"""
+Async serving mode: run with `uvicorn asgi:app` (or gunicorn with
+`-k uvicorn.workers.UvicornWorker asgi:app`).
+
+The read-only JSON endpoints are served on the event loop, so a slow upstream
+call parks a coroutine instead of tying up a worker, and one process can keep
+hundreds of them in flight. Their synchronous work (building week listings and
+readings) runs on the thread pool so it never stalls the loop. They share their payload builders with the Flask
+routes in app.py, so URLs, JSON bodies and caching headers are identical.
+Every other route (the page, /generate, ...) is handed to the Flask app on a
+thread pool.
+"""
+import contextlib
+import datetime
+import functools
+import logging
+
+import httpx
+import requests
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+import http_cache
+import http_client
+import http_headers
+import parasha_schedule
+import parashat_generator
+import tracing
+import verse_store
+from app import (
+    app as flask_app,
+    cached_parasha_data,
+    calendar_url,
+    custom_verses_payload,
+    custom_verses_ref,
+    parashat_data_payload,
+    parasha_data_for_week,
+    parashat_for_date_payload,
+    pick_calendar_reading,
+    stale_headers,
+    upstream_unavailable,
+    verse_view,
+    weekly_listing,
+)
+
+
+logger = logging.getLogger("asgi")
+
+
+class FlaskJSONResponse(Response):
+    """JSON rendered exactly as Flask's jsonify renders it."""
+    media_type = "application/json"
+
+    def render(self, content):
+        return (flask_app.json.dumps(content, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def traced(endpoint):
+    """Trace an async route the way app.py's request hooks trace the Flask ones."""
+    @functools.wraps(endpoint)
+    async def traced_endpoint(request):
+        token = tracing.start(f"{request.method} {request.url.path}", request.headers.get(tracing.DEBUG_HEADER))
+        if token is None:
+            return await endpoint(request)
+        try:
+            response = await endpoint(request)
+        finally:
+            trace = tracing.finish(token)
+        response.headers["Server-Timing"] = trace.server_timing()
+        return response
+    return traced_endpoint
+
+
+def cached(endpoint):
+    """Caching headers, a validator and compression, as app.py's cache_and_compress adds them."""
+    @functools.wraps(endpoint)
+    async def cached_endpoint(request):
+        response = await endpoint(request)
+        cache_control = http_headers.policy(request.url.path, stale=http_headers.is_stale(response.headers),
+                                            status=response.status_code)
+        if cache_control:
+            response.headers["Cache-Control"] = cache_control
+        if response.status_code != 200 or not http_headers.compressible(response.media_type):
+            return response
+
+        response.headers["Vary"] = "Accept-Encoding"
+        body = response.body
+        etag = None
+        if http_headers.cacheable(cache_control):
+            etag = http_headers.body_etag(body)
+            response.headers["ETag"] = f'W/"{etag}"'
+            if http_headers.etag_matches(request.headers.get("If-None-Match"), etag):
+                return Response(status_code=304, headers={name: response.headers[name]
+                                                          for name in ("Cache-Control", "ETag", "Vary")})
+        encoding = http_headers.negotiate(request.headers.get("Accept-Encoding"))
+        if encoding and len(body) >= http_headers.COMPRESS_MIN_BYTES:
+            response.body = http_headers.compress(body, encoding, etag)
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Content-Length"] = str(len(response.body))
+        return response
+    return cached_endpoint
+
+
+async def get_next_4_weeks(request):
+    return FlaskJSONResponse(await run_in_threadpool(weekly_listing, range(0, 4)))
+
+
+async def get_parashat_names(request):
+    return FlaskJSONResponse(await run_in_threadpool(weekly_listing, range(1, 53)))
+
+
+async def get_parashat_data(request):
+    weeks_ahead = request.path_params["weeks_ahead"]
+    parashat_data = cached_parasha_data(weeks_ahead)
+    if parashat_data is None:
+        target_date = parashat_generator.get_next_shabbat_date(weeks_ahead)
+        reading = parasha_schedule.reading_for_date(target_date)
+        text_data = await verse_store.get_text_async(reading.ref)
+        # An empty dict (not None) so week_reading does not look the text up again.
+        # Cleaning and numbering the reading is CPU work, so it runs off the event loop.
+        parashat_data = await run_in_threadpool(parasha_data_for_week, weeks_ahead, text_data=text_data or {})
+    payload, status = verse_view(*parashat_data_payload(weeks_ahead, parashat_data), request.query_params)
+    return FlaskJSONResponse(payload, status_code=status)
+
+
+async def get_parashat_for_date(request):
+    try:
+        date_str = request.query_params.get('date')
+        if not date_str:
+            return FlaskJSONResponse({"error": "Date parameter is required"}, status_code=400)
+
+        target_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+
+        cal_res = await http_cache.get_async(calendar_url(target_date))
+        cal_res.raise_for_status()
+        reading = pick_calendar_reading(cal_res.json())
+
+        text_data = await verse_store.get_text_async(reading["ref"]) if reading else None
+        payload, status = verse_view(*parashat_for_date_payload(target_date, reading, text_data),
+                                     request.query_params, verses_by_default=False)
+        headers = stale_headers(payload, status, cal_res)
+        return FlaskJSONResponse(payload, status_code=status, headers=headers)
+
+    except ValueError:
+        return FlaskJSONResponse({"error": "Invalid date format. Use YYYY-MM-DD"}, status_code=400)
+    except (httpx.HTTPError, requests.exceptions.RequestException) as e:
+        payload, status, headers = upstream_unavailable(e)
+        return FlaskJSONResponse(payload, status_code=status, headers=headers)
+    except Exception as e:
+        return FlaskJSONResponse({"error": f"An error occurred: {str(e)}"}, status_code=500)
+
+
+async def get_custom_verses(request):
+    try:
+        ref, error = custom_verses_ref(request.query_params)
+        if error:
+            payload, status = error
+            return FlaskJSONResponse(payload, status_code=status)
+
+        tracing.debug(logger, "Fetching custom verses for ref: %s", ref)
+
+        text_data = await verse_store.get_text_async(ref)
+        payload, status = verse_view(*custom_verses_payload(ref, text_data), request.query_params,
+                                     verses_by_default=False)
+        return FlaskJSONResponse(payload, status_code=status)
+
+    except Exception as e:
+        return FlaskJSONResponse({"error": f"An error occurred: {str(e)}"}, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await http_client.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route("/get_next_4_weeks", traced(cached(get_next_4_weeks))),
+        Route("/get_parashat_names", traced(cached(get_parashat_names))),
+        Route("/get_parashat_data/{weeks_ahead:int}", traced(cached(get_parashat_data))),
+        Route("/get_parashat_for_date", traced(cached(get_parashat_for_date))),
+        Route("/get_custom_verses", traced(cached(get_custom_verses))),
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,129 @@
+"""
+Check and benchmark parashat_generator.clean_text / clean_many.
+
+    python benchmarks/clean_text.py
+
+1. Every entry in fixtures/clean_text_corpus.json (verses in Sefaria's markup,
+   with the output of the original cleaner) must come out the same, one at a
+   time and as a batch.
+2. If the verse store has been synced, every stored verse is compared with the
+   original cleaner as well.
+3. Book-length input (the stored Genesis if synced, and corpus verses at two
+   markup densities) is cleaned a chapter at a time with the original
+   cleaner, clean_text and clean_many.
+
+Expect clean_many at about 2x the original on "markup on every verse" and 3.5x
+to 6x on "markup on 1 verse in 6"; single runs vary by a factor of two on a
+busy machine, so compare several.
+"""
+import html
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import parashat_generator  # noqa: E402
+import verse_store  # noqa: E402
+
+RUNS = 20
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "clean_text_corpus.json")
+
+
+def reference_clean_text(raw_text):
+    """The original multi-pass cleaner, kept verbatim as the reference."""
+    if not isinstance(raw_text, str):
+        return str(raw_text) if raw_text is not None else ""
+    text = re.sub(r'<sup class="footnote-marker">.*?</sup><i class="footnote">.*?</i>', '', raw_text, flags=re.DOTALL)
+    text = re.sub(r'<i class="footnote">.*?</i>', '', text, flags=re.DOTALL)
+    text = re.sub(r'<.*?>', '', text)
+    text = html.unescape(text)
+    text = text.replace('*', '')
+    text = text.replace(',,', ',')
+    return text.strip()
+
+
+def check_corpus():
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = json.load(f)
+    raw = [entry["raw"] for entry in corpus]
+    expected = [entry["clean"] for entry in corpus]
+    failures = [(r, e, parashat_generator.clean_text(r)) for r, e in zip(raw, expected)
+                if parashat_generator.clean_text(r) != e]
+    batch_ok = parashat_generator.clean_many(raw) == expected
+    for r, e, got in failures:
+        print(f"  MISMATCH {r!r}\n    expected {e!r}\n    got      {got!r}")
+    print(f"corpus: {len(corpus) - len(failures)}/{len(corpus)} verses match, batch {'matches' if batch_ok else 'DIFFERS'}")
+    return not failures and batch_ok
+
+
+def stored_chapters():
+    """Every stored chapter as a list of raw verses, English and Hebrew."""
+    for book in verse_store.TORAH_BOOKS:
+        record = verse_store.load_book(book)
+        if record:
+            for language in ("en", "he"):
+                yield from ((f"{book} {language} {n}", chapter)
+                            for n, chapter in enumerate(record[language], start=1))
+
+
+def check_store():
+    checked = mismatched = 0
+    for name, chapter in stored_chapters():
+        expected = [reference_clean_text(v) for v in chapter]
+        if parashat_generator.clean_many(chapter) != expected:
+            mismatched += 1
+            print(f"  MISMATCH in {name}")
+        checked += 1
+    if checked:
+        print(f"verse store: {checked - mismatched}/{checked} chapters match")
+    else:
+        print("verse store: not synced, skipped")
+    return not mismatched
+
+
+def book_inputs():
+    """Full-book inputs as lists of chapters, English and Hebrew."""
+    record = verse_store.load_book("Genesis")
+    if record:
+        yield "stored Genesis", record["en"] + record["he"]
+    with open(CORPUS, encoding="utf-8") as f:
+        verses = [entry["raw"] for entry in json.load(f) if isinstance(entry["raw"], str)]
+    plain = [v for v in verses if "<" not in v and "&" not in v]
+    marked = [v for v in verses if v not in plain]
+    # Genesis-sized: 50 chapters of 31 verses in each language
+    yield "markup on every verse", [(marked * 2)[:31]] * 100
+    yield "markup on 1 verse in 6", [[marked[i % len(marked)] if i % 6 == 0 else plain[i % len(plain)]
+                                      for i in range(31)]] * 100
+
+
+def best_of(runs, fn, chapters):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for chapter in chapters:
+            fn(chapter)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark():
+    for label, chapters in book_inputs():
+        verses = sum(len(chapter) for chapter in chapters)
+        timings = {
+            "original": best_of(RUNS, lambda ch: [reference_clean_text(v) for v in ch], chapters),
+            "clean_text": best_of(RUNS, lambda ch: [parashat_generator.clean_text(v) for v in ch], chapters),
+            "clean_many": best_of(RUNS, parashat_generator.clean_many, chapters),
+        }
+        print(f"full book, {label} ({verses} verses):")
+        for name, seconds in timings.items():
+            print(f"  {name:<11} {seconds * 1000:8.1f} ms  {timings['original'] / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    ok = check_corpus() & check_store()
+    benchmark()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,136 @@
+"""
+Load generator for the running app: per-endpoint latency percentiles and throughput.
+
+    python benchmarks/load.py --url http://127.0.0.1:5001 --concurrency 16 --duration 30
+    python benchmarks/load.py --endpoint generate --endpoint names --duration 10
+
+Each of --concurrency workers sends requests back to back for --duration
+seconds, cycling through the selected endpoints: the page (/),
+/get_parashat_data/<n>, /get_parashat_names and /generate?weeks_ahead=<n>,
+with n drawn from 0 to --weeks. Decks for the same week come from the deck
+cache after the first render; pass --fresh-decks to request a random verse
+range each time instead. Non-2xx responses and connection errors are counted
+as errors and left out of the percentiles.
+
+Pair it with benchmarks/upstream_server.py to include upstream latency.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+ENDPOINTS = ("index", "parashat_data", "names", "generate")
+
+
+def request_path(endpoint, weeks, fresh_decks, rng):
+    if endpoint == "index":
+        return "/"
+    if endpoint == "parashat_data":
+        return f"/get_parashat_data/{rng.randint(0, weeks)}"
+    if endpoint == "names":
+        return "/get_parashat_names"
+    if fresh_decks:
+        chapter = rng.randint(1, 49)
+        ranges = json.dumps([{"book": "Genesis", "range": f"{chapter}:1-{chapter + 1}:{rng.randint(1, 15)}"}])
+        return f"/generate?ref=Genesis&verse_ranges={requests.utils.quote(ranges)}"
+    return f"/generate?weeks_ahead={rng.randint(0, weeks)}"
+
+
+def worker(base_url, endpoints, deadline, weeks, fresh_decks, seed, latencies, errors, lock):
+    rng = random.Random(seed)
+    session = requests.Session()
+    index = seed  # workers start at different endpoints
+    while time.perf_counter() < deadline:
+        endpoint = endpoints[index % len(endpoints)]
+        index += 1
+        path = request_path(endpoint, weeks, fresh_decks, rng)
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=60)
+            response.content  # read the whole body
+            ok = 200 <= response.status_code < 300
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies[endpoint].append(elapsed)
+            else:
+                errors[endpoint] += 1
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, round(fraction * len(sorted_values) + 0.5))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def report(latencies, errors, seconds):
+    print(f"{'endpoint':<15} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'mean ms':>9}")
+    summary = {}
+    for endpoint in ENDPOINTS:
+        values = sorted(latencies.get(endpoint, []))
+        failed = errors.get(endpoint, 0)
+        if not values and not failed:
+            continue
+        row = {"requests": len(values) + failed, "errors": failed, "throughput": len(values) / seconds}
+        if values:
+            row.update({"p50": percentile(values, 0.50), "p95": percentile(values, 0.95),
+                        "p99": percentile(values, 0.99), "mean": statistics.fmean(values)})
+        summary[endpoint] = row
+        timings = "".join(f" {row[key] * 1000:>9.1f}" if key in row else f" {'-':>9}"
+                          for key in ("p50", "p95", "p99", "mean"))
+        print(f"{endpoint:<15} {row['requests']:>8} {failed:>7} {row['throughput']:>8.1f}{timings}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=os.environ.get("LOAD_URL", "http://127.0.0.1:5001"),
+                        help="Base URL of the running app")
+    parser.add_argument("--endpoint", action="append", choices=ENDPOINTS,
+                        help="Only load this endpoint (may be repeated; default all)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run")
+    parser.add_argument("--weeks", type=int, default=8, help="Highest weeks_ahead to request")
+    parser.add_argument("--fresh-decks", action="store_true",
+                        help="Request a random range from /generate so decks are rendered, not cached")
+    parser.add_argument("--save", help="Write the summary to this JSON file")
+    args = parser.parse_args()
+
+    endpoints = args.endpoint or list(ENDPOINTS)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args.url.rstrip("/"), endpoints, deadline, args.weeks,
+                                              args.fresh_decks, seed, latencies, errors, lock))
+        for seed in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    print(f"{args.concurrency} clients for {seconds:.1f}s against {args.url}")
+    summary = report(latencies, errors, seconds)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"url": args.url, "concurrency": args.concurrency, "seconds": seconds,
+                       "endpoints": summary}, f, indent=2)
+    return 1 if not summary else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Benchmark the slide renderers against each other.
+
+    python benchmarks/render_slides.py                 # 50, 500 and 5000 slides
+    python benchmarks/render_slides.py --slides 500 --repeat 5
+
+Decks are built from synthetic verses of typical length (five verses per slide,
+as in /generate). Each size is rendered with both renderers, and the two
+outputs are checked to be byte-identical.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parashat_generator  # noqa: E402
+
+EN = "And God said, “Let there be light”; and there was light. God saw how good the light was."
+HE = "וַיֹּ֥אמֶר אֱלֹהִ֖ים יְהִ֣י א֑וֹר וַֽיְהִי־אֽוֹר׃ וַיַּ֧רְא אֱלֹהִ֛ים אֶת־הָא֖וֹר כִּי־ט֑וֹב"
+
+
+def make_deck(slides):
+    """Deck data that renders to exactly `slides` slides."""
+    per_slide = parashat_generator.VERSES_PER_SLIDE
+    verses = []
+    for n in range(slides * per_slide):
+        chapter, verse = divmod(n, per_slide * 6)  # six full slides per chapter
+        verses.append(parashat_generator.Verse(chapter + 1, verse + 1, EN, HE))
+    return {"book": "Genesis", "verses": verses}
+
+
+def render(data, renderer):
+    output = io.BytesIO()
+    start = time.perf_counter()
+    parashat_generator.create_presentation(data, output=output, renderer=renderer)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--slides", type=int, action="append",
+                        help="Deck size in slides (may be repeated; default 50, 500, 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best is reported")
+    args = parser.parse_args()
+
+    # Load the clone renderer's prototype outside the timings
+    render(make_deck(1), "clone")
+
+    print(f"{'slides':>7} {'pptx s':>9} {'clone s':>9} {'speedup':>8} {'slides/s':>10}  identical")
+    for slides in args.slides or [50, 500, 5000]:
+        data = make_deck(slides)
+        best = {}
+        outputs = {}
+        for renderer in ("pptx", "clone"):
+            runs = [render(data, renderer) for _ in range(args.repeat)]
+            best[renderer] = min(seconds for seconds, _ in runs)
+            outputs[renderer] = runs[0][1]
+        print(f"{slides:>7} {best['pptx']:>9.3f} {best['clone']:>9.3f} "
+              f"{best['pptx'] / best['clone']:>7.1f}x {slides / best['clone']:>10.0f}  "
+              f"{outputs['pptx'] == outputs['clone']}")
+
+
+if __name__ == "__main__":
+    main()
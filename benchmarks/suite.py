@@ -0,0 +1,290 @@
+"""
+Offline benchmark suite for the /generate pipeline: range planning, text
+cleaning, verse assembly and deck rendering, at four input sizes.
+
+    python benchmarks/suite.py record                  # save fixtures from the verse store
+    python benchmarks/suite.py run --save after.json   # benchmark
+    python benchmarks/suite.py run --baseline before.json
+    python benchmarks/suite.py compare before.json after.json
+
+Each size is a /generate range in Genesis: one verse, one chapter, one parasha
+(Bereshit) and the whole book. `record` stores the text responses /generate
+would read for every planned chapter in fixtures/responses/ (from the synced verse
+store, or from Sefaria with SEFARIA_LIVE_FALLBACK=1), and `run` reads them from
+there without any network. Until fixtures are recorded, `run` uses Sefaria-shaped
+responses built from the clean_text corpus verses.
+
+For each benchmark the best per-call wall time of --repeat samples is reported,
+with the peak memory traced by tracemalloc during one call, the memory still
+held by what it returned and, for rendering, slides per second. Verse
+assembly is measured with an empty and with a warm verse cache.
+`compare` (or `run --baseline`) flags anything more than --threshold slower and
+exits with status 1 if there is any.
+"""
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("PREFETCH_WEEKS", "0")  # no background rendering during timings
+
+import parashat_generator  # noqa: E402
+import range_plan  # noqa: E402
+import verse_store  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESPONSES = os.path.join(FIXTURES, "responses")
+CORPUS = os.path.join(FIXTURES, "clean_text_corpus.json")
+
+BOOK = "Genesis"
+SIZES = {
+    "verse": "1:1-1",
+    "chapter": "1:1-31",
+    "parasha": "1:1-6:8",
+    "book": "1:1-50:26",
+}
+# Verses per chapter of Genesis, for the synthetic fixtures
+GENESIS_VERSES = [31, 25, 24, 26, 32, 22, 24, 22, 29, 32, 32, 20, 18, 24, 21, 16, 27, 33, 38, 18, 34, 24, 20,
+                  67, 34, 35, 46, 22, 35, 43, 54, 33, 20, 31, 29, 43, 36, 30, 23, 23, 57, 38, 34, 34, 28, 34,
+                  31, 22, 33, 26]
+SAMPLE_SECONDS = 0.05  # each timing sample loops until it takes at least this long
+
+
+def range_objs(range_str):
+    return [{"book": BOOK, "range": range_str}]
+
+
+def chapter_refs(range_str):
+    return [range_plan.chapter_ref(*key) for key in range_plan.plan(range_objs(range_str)).spans]
+
+
+def record():
+    os.makedirs(RESPONSES, exist_ok=True)
+    for size, range_str in SIZES.items():
+        responses = {}
+        for ref in chapter_refs(range_str):
+            data = verse_store.get_text(ref)
+            if not data or "error" in data:
+                sys.exit(f"No text for {ref}: sync the verse store or set SEFARIA_LIVE_FALLBACK=1")
+            responses[ref] = data
+        with open(os.path.join(RESPONSES, f"{size}.json"), "w", encoding="utf-8") as f:
+            json.dump({"range": range_str, "responses": responses}, f, ensure_ascii=False)
+        print(f"{size}: recorded {len(responses)} responses")
+
+
+def synthetic_responses(range_str):
+    """Responses shaped like verse_store.get_text's, with corpus verses as the text."""
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = json.load(f)
+    # Typical verses only: the corpus's edge cases (empty text, stray newlines)
+    # would send every deck down the python-pptx fallback
+    raw = [entry["raw"] for entry in corpus
+           if isinstance(entry["raw"], str) and entry["clean"] and entry["clean"].isprintable()]
+    he = "בְּרֵאשִׁ֖ית בָּרָ֣א אֱלֹהִ֑ים אֵ֥ת הַשָּׁמַ֖יִם וְאֵ֥ת הָאָֽרֶץ׃"
+    responses = {}
+    for ref in chapter_refs(range_str):
+        book, start_chapter, start_verse, _, end_verse = verse_store.parse_ref(ref)
+        last = min(end_verse or 999, GENESIS_VERSES[start_chapter - 1])
+        numbers = range(start_verse, last + 1)
+        responses[ref] = {
+            "ref": f"{book} {start_chapter}",
+            "book": book,
+            "sections": [start_chapter, start_verse],
+            "toSections": [start_chapter, last],
+            "sectionNames": ["Chapter", "Verse"],
+            "versionTitle": verse_store.TEXT_VERSION,
+            "text": [raw[(start_chapter * 7 + n) % len(raw)] for n in numbers],
+            "he": [he for _ in numbers],
+        }
+    return responses
+
+
+def load_fixtures():
+    """{size: (range, responses)} and a label saying where they came from."""
+    fixtures = {}
+    recorded = all(os.path.exists(os.path.join(RESPONSES, f"{size}.json")) for size in SIZES)
+    for size, range_str in SIZES.items():
+        if recorded:
+            with open(os.path.join(RESPONSES, f"{size}.json"), encoding="utf-8") as f:
+                fixture = json.load(f)
+            fixtures[size] = (fixture["range"], fixture["responses"])
+        else:
+            fixtures[size] = (range_str, synthetic_responses(range_str))
+    digest = hashlib.sha256(json.dumps(fixtures, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return fixtures, f"{'recorded' if recorded else 'synthetic'}:{digest}"
+
+
+def process(range_str, responses):
+    """Plan the range and assemble its verses from the chapter responses, as /generate does."""
+    fetch_plan = range_plan.plan(range_objs(range_str))
+    texts = {key: responses[range_plan.chapter_ref(*key)] for key in fetch_plan.spans}
+    groups, _ = range_plan.assemble(fetch_plan, texts)
+    return [verse for group in groups for verse in group["verses"]]
+
+
+def deck_data(range_str, verses):
+    verse_ranges = json.dumps(range_objs(range_str))
+    data = {
+        "title_en": f"{BOOK} {verse_ranges}",
+        "parasha_ref": BOOK,
+        "book": BOOK,
+        "verses": verses,
+        "ranges": [{"range": range_str, "book": BOOK, "verses": verses}],
+    }
+    return data, verse_ranges
+
+
+def measure(fn, repeat):
+    """
+    Best and median per-call seconds over `repeat` samples, and the peak bytes
+    of one call and the bytes its return value (and any cache growth) retains.
+    """
+    fn()  # warm up
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= SAMPLE_SECONDS:
+            break
+        loops = max(loops * 2, int(loops * SAMPLE_SECONDS / max(elapsed, 1e-9)) + 1)
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+
+    tracemalloc.start()
+    value = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return {"seconds": min(samples), "median_seconds": statistics.median(samples), "peak_bytes": peak,
+            "retained_bytes": retained}
+
+
+def run(sizes, repeat):
+    fixtures, source = load_fixtures()
+    results = {}
+    for size in sizes:
+        range_str, responses = fixtures[size]
+        raw = [text for data in responses.values() for language in ("text", "he") for text in data[language]]
+
+        def process_cold():
+            parashat_generator.clear_verse_cache()
+            return process(range_str, responses)
+
+        data, verse_ranges = deck_data(range_str, process_cold())
+        slides = len(list(parashat_generator.iter_slides(data, verse_ranges)))
+        benchmarks = {
+            "plan": lambda: range_plan.plan(range_objs(range_str)),
+            "clean_text": lambda: [parashat_generator.clean_text(text) for text in raw],
+            "assemble": process_cold,
+            "assemble_cached": lambda: process(range_str, responses),
+            "create_presentation": lambda: parashat_generator.create_presentation(
+                data, output=io.BytesIO(), verse_ranges=verse_ranges),
+        }
+        for name, fn in benchmarks.items():
+            result = measure(fn, repeat)
+            if name == "create_presentation":
+                result["slides"] = slides
+                result["slides_per_sec"] = slides / result["seconds"]
+            results[f"{size}/{name}"] = result
+            print_result(f"{size}/{name}", result)
+    return {
+        "meta": {
+            "fixtures": source,
+            "python": platform.python_version(),
+            "renderer": parashat_generator.SLIDE_RENDERER,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def print_result(name, result):
+    rate = f"{result['slides_per_sec']:>10.0f} slides/s" if "slides_per_sec" in result else ""
+    print(f"{name:<34} {result['seconds'] * 1000:>10.3f} ms {result['peak_bytes'] / 1024:>10.1f} KiB peak "
+          f"{result.get('retained_bytes', 0) / 1024:>10.1f} KiB held {rate}")
+
+
+def compare(old, new, threshold):
+    """Print old against new; return the names that got slower by more than threshold."""
+    if old["meta"].get("fixtures") != new["meta"].get("fixtures"):
+        print(f"warning: runs used different fixtures ({old['meta'].get('fixtures')} vs {new['meta'].get('fixtures')})")
+    print(f"{'benchmark':<34} {'old ms':>10} {'new ms':>10} {'change':>8} {'old KiB':>10} {'new KiB':>10}")
+    regressions = []
+    for name, before in old["results"].items():
+        after = new["results"].get(name)
+        if after is None:
+            continue
+        change = after["seconds"] / before["seconds"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<34} {before['seconds'] * 1000:>10.3f} {after['seconds'] * 1000:>10.3f} {change:>+8.1%} "
+              f"{before['peak_bytes'] / 1024:>10.1f} {after['peak_bytes'] / 1024:>10.1f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("record", help="Save the fixtures from the verse store")
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--size", action="append", choices=list(SIZES),
+                            help="Only this input size (may be repeated)")
+    run_parser.add_argument("--repeat", type=int, default=5, help="Timing samples per benchmark")
+    run_parser.add_argument("--save", help="Write the results to this JSON file")
+    run_parser.add_argument("--baseline", help="Compare with the results saved in this JSON file")
+    run_parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown reported as a regression")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two saved runs")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown reported as a regression")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record()
+        return 0
+
+    if args.command == "compare":
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        return 1 if compare(old, new, args.threshold) else 0
+
+    results = run(args.size or list(SIZES), args.repeat)
+    print(f"fixtures: {results['meta']['fixtures']}")
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            old = json.load(f)
+        print()
+        return 1 if compare(old, results, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
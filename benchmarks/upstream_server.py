@@ -0,0 +1,189 @@
+"""
+Local stand-in for the Sefaria and hebcal APIs, for offline and load testing.
+
+    python benchmarks/upstream_server.py --port 8081 --latency 80 --jitter 40 --error-rate 0.02
+    SEFARIA_API_URL=http://127.0.0.1:8081/api HEBCAL_URL=http://127.0.0.1:8081 python app.py
+
+Serves GET /api/texts/<ref>, /api/calendars and /converter. Responses recorded
+in fixtures/upstream/ are replayed as they were; anything not recorded is
+answered in the same shape from the local modules (texts from the verse store,
+readings from parasha_schedule, dates from hebrew_calendar). With --record,
+unrecorded requests are passed to the real APIs and saved instead.
+
+Every response waits --latency ms plus up to --jitter ms, and a fraction
+--error-rate of requests fail with a 503, which the app's client retries.
+To send verse lookups through it, run the app with SEFARIA_LIVE_FALLBACK=1
+and a VERSE_STORE_DIR that does not hold the books.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import hebrew_calendar  # noqa: E402
+import parasha_schedule  # noqa: E402
+import verse_store  # noqa: E402
+
+RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "upstream")
+REAL_UPSTREAMS = {"/api/": "https://www.sefaria.org", "/converter": "https://www.hebcal.com"}
+
+
+def recording_path(path, query):
+    """Recordings are keyed by path and sorted query, so parameter order does not matter."""
+    key = f"{path}?{'&'.join(f'{k}={v}' for k, v in sorted(query.items()))}"
+    return os.path.join(RECORDINGS, hashlib.sha256(key.encode("utf-8")).hexdigest()[:24] + ".json"), key
+
+
+def texts(ref):
+    data = verse_store.get_text(ref)
+    if data is None:
+        return 200, {"error": f"No text for {ref} in the verse store"}  # Sefaria reports errors with a 200
+    return 200, data
+
+
+def calendars(query):
+    try:
+        date = datetime.date(int(query["year"]), int(query["month"]), int(query["day"]))
+    except (KeyError, ValueError):
+        return 400, {"error": "year, month and day are required"}
+    reading = parasha_schedule.reading_for_date(date)
+    return 200, {
+        "date": date.isoformat(),
+        "calendar_items": [{
+            "title": {"en": "Parashat Hashavua", "he": "פרשת השבוע"},
+            "displayValue": {"en": reading.title, "he": reading.title},
+            "ref": reading.ref,
+            "category": "Tanakh",
+        }],
+    }
+
+
+def converter(query):
+    if query.get("h2g"):
+        months = {name: month for month, name in hebrew_calendar.MONTH_NAMES.items()}
+        try:
+            hy, hm, hd = int(query["hy"]), months[query["hm"]], int(query["hd"])
+        except (KeyError, ValueError):
+            return 400, {"error": "hy, hm and hd are required"}
+        date = hebrew_calendar.to_gregorian(hy, hm, hd)
+        return 200, {"gy": date.year, "gm": date.month, "gd": date.day,
+                     "hy": hy, "hm": query["hm"], "hd": hd}
+    try:
+        hd = hebrew_calendar.from_gregorian(int(query["gy"]), int(query["gm"]), int(query["gd"]))
+    except (KeyError, ValueError):
+        return 400, {"error": "gy, gm and gd are required"}
+    return 200, {"gy": int(query["gy"]), "gm": int(query["gm"]), "gd": int(query["gd"]),
+                 "hy": hd.year, "hm": hebrew_calendar.month_name(hd.month, hd.year), "hd": hd.day}
+
+
+def synthesize(path, query):
+    if path.startswith("/api/texts/"):
+        return texts(unquote(path[len("/api/texts/"):]))
+    if path == "/api/calendars":
+        return calendars(query)
+    if path == "/converter":
+        return converter(query)
+    return 404, {"error": f"Unknown endpoint {path}"}
+
+
+def fetch_real(path, raw_query):
+    import http_client
+    base = next((base for prefix, base in REAL_UPSTREAMS.items() if path.startswith(prefix)), None)
+    if base is None:
+        return 404, {"error": f"Unknown endpoint {path}"}
+    response = http_client.get(f"{base}{path}?{raw_query}")
+    return response.status_code, response.json()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    options = None
+    stats = {"requests": 0, "replayed": 0, "synthesized": 0, "recorded": 0, "errors_injected": 0}
+    stats_lock = threading.Lock()
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def do_GET(self):
+        options = self.options
+        self.count("requests")
+        time.sleep((options.latency + random.uniform(0, options.jitter)) / 1000)
+        if random.random() < options.error_rate:
+            self.count("errors_injected")
+            return self.send_json(503, {"error": "injected failure"})
+
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        query = dict(parse_qsl(url.query))
+        recording, key = recording_path(path, query)
+        try:
+            with open(recording, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.count("replayed")
+            return self.send_json(saved["status"], saved["body"])
+        except (OSError, ValueError):
+            pass
+
+        if options.record:
+            status, body = fetch_real(url.path, url.query)
+            os.makedirs(RECORDINGS, exist_ok=True)
+            with open(recording, "w", encoding="utf-8") as f:
+                json.dump({"request": key, "status": status, "body": body}, f, ensure_ascii=False)
+            self.count("recorded")
+        else:
+            status, body = synthesize(path, query)
+            self.count("synthesized")
+        self.send_json(status, body)
+
+    def send_json(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.options.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0, help="Added to every response, in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="Random extra latency of up to this many ms")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with a 503")
+    parser.add_argument("--record", action="store_true",
+                        help="Fetch unrecorded requests from the real APIs and save them")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    Handler.options = parser.parse_args()
+    # Texts come from the local store only, never back through SEFARIA_API_URL
+    verse_store.LIVE_FALLBACK = False
+
+    server = ThreadingHTTPServer((Handler.options.host, Handler.options.port), Handler)
+    server.daemon_threads = True
+    print(f"Upstream stand-in on http://{Handler.options.host}:{Handler.options.port} "
+          f"(SEFARIA_API_URL=http://{Handler.options.host}:{Handler.options.port}/api)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(Handler.stats))
+
+
+if __name__ == "__main__":
+    main()
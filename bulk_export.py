@@ -0,0 +1,247 @@
+"""
+Bulk deck export: the full-reading decks for a span of Shabbatot, or for a list
+of references, streamed as one ZIP.
+
+    python bulk_export.py --start 2026-10-17 --end 2027-10-09 -o season.zip
+    python bulk_export.py --ref "Genesis 1:1-6:8" --ref "Exodus 12:21-51" -o readings.zip
+
+The same export is served by /export in app.py. Texts are fetched and cleaned
+on a thread pool and the decks rendered in a pool of EXPORT_PROCESSES worker
+processes; each deck is written to the ZIP as soon as it is ready, and a
+manifest.json listing every reading (file, ref, slide count or error) comes
+last. Decks already in the deck cache are reused and new ones are stored there,
+so they are the same files /generate sends.
+
+start() holds the response back until the first deck is in the ZIP, so an
+export in which no deck can be rendered, or whose render workers die, fails
+with ExportFailed instead of sending an empty archive.
+"""
+import argparse
+import concurrent.futures
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import namedtuple
+from concurrent.futures.process import BrokenProcessPool
+
+import deck_cache
+import parasha_schedule
+import parashat_generator
+import range_plan
+
+PROCESSES = int(os.environ.get("EXPORT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+MAX_DECKS = int(os.environ.get("EXPORT_MAX_DECKS", "60"))
+FETCH_WORKERS = 8
+
+Job = namedtuple("Job", ["name", "title", "ref", "date"])
+
+_SLIDE_PART = re.compile(r"ppt/slides/slide\d+\.xml$")
+_pool = None
+
+
+class ExportFailed(Exception):
+    """The export cannot produce a usable ZIP: no deck rendered, or the render workers died."""
+
+
+def _file_name(*parts):
+    return re.sub(r"[^\w .-]+", "_", " ".join(parts)).strip() + ".pptx"
+
+
+def jobs_between(start, end):
+    """One job per Shabbat reading from the Shabbat on or after start up to end."""
+    jobs = []
+    shabbat = start + datetime.timedelta(days=(parasha_schedule.SATURDAY - start.weekday()) % 7)
+    while shabbat <= end:
+        reading = parasha_schedule.reading_for_date(shabbat)
+        jobs.append(Job(_file_name(shabbat.isoformat(), reading.title), reading.title, reading.ref,
+                        shabbat.isoformat()))
+        shabbat += datetime.timedelta(weeks=1)
+    return jobs
+
+
+def jobs_for_refs(refs):
+    return [Job(_file_name(f"{n:02d}", ref), ref, ref, None) for n, ref in enumerate(refs, start=1)]
+
+
+def slide_count(path):
+    with zipfile.ZipFile(path) as deck:
+        return sum(1 for name in deck.namelist() if _SLIDE_PART.match(name))
+
+
+def _render_pool():
+    """Worker processes for rendering, created on first use and kept for later exports."""
+    global _pool
+    if _pool is None or _pool._broken:  # replace a pool whose worker died
+        # spawn: the server's threads (fetch pool, prefetch) must not be forked
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _prepare(job, collect):
+    """Cached deck path, or the data to render; runs on the fetch threads."""
+    range_objs = range_plan.range_objs_for(job.ref)
+    if range_objs is None:
+        return {"error": f"Cannot parse reference {job.ref}"}
+    verse_ranges = json.dumps(range_objs)
+    deck_key = deck_cache.key_for(range_objs)
+    path = deck_cache.lookup(deck_key)
+    if path:
+        return {"path": path, "complete": True}
+    data, complete = collect(range_objs, range_objs[0]["book"], verse_ranges)
+    if not data["verses"]:
+        return {"error": f"No text for {job.ref}"}
+    return {"data": data, "verse_ranges": verse_ranges, "deck_key": deck_key, "complete": complete}
+
+
+class _ZipStream(io.RawIOBase):
+    """Unseekable sink for zipfile; what has been written is taken with drain()."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream(jobs, collect):
+    """
+    Yield the bytes of a ZIP holding a deck per job plus manifest.json. collect
+    is app.collect_deck: (range_objs, default_book, verse_ranges) ->
+    (parashat_data, complete). Raises ExportFailed if a render worker dies or
+    no deck at all could be added.
+    """
+    sink = _ZipStream()
+    archive = zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED)  # decks are already compressed
+    manifest = [{"title": job.title, "ref": job.ref, "date": job.date, "file": None} for job in jobs]
+
+    def add(index, path, complete):
+        try:
+            slides = slide_count(path)
+            archive.write(path, jobs[index].name)
+        except FileNotFoundError:  # evicted from the deck cache meanwhile
+            manifest[index]["error"] = "Deck was evicted while exporting; export again"
+            return
+        manifest[index].update(file=jobs[index].name, slides=slides, complete=complete)
+
+    # future -> (job index, what _prepare returned or None, spool path or None)
+    pending = {}
+    fetchers = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="export")
+    try:
+        for index, job in enumerate(jobs):
+            pending[fetchers.submit(_prepare, job, collect)] = (index, None, None)
+
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index, prepared, spool_path = pending.pop(future)
+                if future.exception() is not None:
+                    if spool_path:
+                        os.unlink(spool_path)
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        raise ExportFailed("The deck renderer stopped; export again") from future.exception()
+                    manifest[index]["error"] = str(future.exception())
+                elif prepared is None:
+                    # Text fetched and cleaned: use the cached deck or render it
+                    prepared = future.result()
+                    if "error" in prepared:
+                        manifest[index]["error"] = prepared["error"]
+                    elif "path" in prepared:
+                        add(index, prepared["path"], True)
+                    else:
+                        spool_path = deck_cache.spool()
+                        render = _render_pool().submit(parashat_generator.create_presentation, prepared["data"],
+                                                       spool_path, prepared["verse_ranges"])
+                        pending[render] = (index, prepared, spool_path)
+                elif prepared["complete"]:
+                    add(index, deck_cache.commit(prepared["deck_key"], spool_path), True)
+                else:
+                    add(index, spool_path, False)
+                    os.unlink(spool_path)
+            yield sink.drain()
+
+        if not any(entry["file"] for entry in manifest):
+            errors = sorted({entry["error"] for entry in manifest if entry.get("error")})
+            raise ExportFailed("No deck could be rendered: " + "; ".join(errors))
+        archive.writestr("manifest.json", json.dumps({"decks": manifest}, indent=2, ensure_ascii=False))
+        archive.close()
+        yield sink.drain()
+    finally:
+        # Reached early when the client goes away: drop the remaining work
+        fetchers.shutdown(wait=False, cancel_futures=True)
+        for future, (_, _, spool_path) in pending.items():
+            future.cancel()
+            if spool_path:
+                future.add_done_callback(lambda _, path=spool_path: os.path.exists(path) and os.unlink(path))
+
+
+def start(jobs, collect):
+    """
+    stream(), run until its first bytes are ready: raises ExportFailed before
+    anything has been sent, and returns an iterator over the whole ZIP.
+    """
+    chunks = stream(jobs, collect)
+    head = b""
+    for chunk in chunks:
+        head = chunk
+        if head:
+            break
+    return _resume(head, chunks)
+
+
+def _resume(head, chunks):
+    yield head
+    yield from chunks  # closing this closes stream() too, cancelling its work
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export full-reading decks as one ZIP.")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--ref", action="append", help="Export this reference instead (may be repeated)")
+    parser.add_argument("-o", "--output", required=True, help="ZIP file to write")
+    args = parser.parse_args(argv)
+
+    if args.ref:
+        jobs = jobs_for_refs(args.ref)
+    elif args.start and args.end:
+        jobs = jobs_between(args.start, args.end)
+    else:
+        parser.error("give --start and --end, or --ref")
+
+    os.environ.setdefault("PREFETCH_WEEKS", "0")  # a one-off export has no use for the scheduler
+    from app import collect_deck
+
+    try:
+        chunks = start(jobs, collect_deck)
+    except ExportFailed as e:
+        print(f"Export failed: {e}")
+        return 1
+    with open(args.output, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    with zipfile.ZipFile(args.output) as archive:
+        manifest = json.loads(archive.read("manifest.json"))["decks"]
+    failed = [entry for entry in manifest if entry.get("error")]
+    print(f"Wrote {len(manifest) - len(failed)} decks to {args.output}")
+    for entry in failed:
+        print(f"  {entry['title']} ({entry['ref']}): {entry['error']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""
+Per-upstream circuit breakers (Sefaria, hebcal).
+
+http_client passes every upstream call through the breaker for its host. A
+breaker opens when FAILURE_THRESHOLD of the last WINDOW calls failed, a call
+failing when it raised, answered 429 or 5xx, or took longer than
+SLOW_CALL_SECONDS. While it is open, calls fail at once with CircuitOpen
+instead of queueing behind a dead upstream, and http_cache serves what it last
+got, marked stale. After OPEN_SECONDS a single trial call is let through (the
+breaker is half-open): if it succeeds the breaker closes, if not it opens for
+another OPEN_SECONDS.
+
+Breakers are per process. Tunable with CIRCUIT_FAILURES, CIRCUIT_WINDOW,
+CIRCUIT_SLOW_SECONDS and CIRCUIT_OPEN_SECONDS.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURES", "5"))
+WINDOW = int(os.environ.get("CIRCUIT_WINDOW", "20"))
+SLOW_CALL_SECONDS = float(os.environ.get("CIRCUIT_SLOW_SECONDS", "5"))
+OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """An upstream call refused because its host's breaker is open."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} is unavailable (circuit open, retrying in {retry_in:.0f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class Breaker:
+    """The breaker for one upstream host; thread-safe."""
+
+    def __init__(self, host):
+        self.host = host
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=WINDOW)  # True for each failed call
+        self._opened_at = 0.0
+        self._trial = False  # a half-open trial call is in flight
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Whether a call may go out now. Every allowed call must be followed by record()."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() >= self._opened_at + OPEN_SECONDS:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok, seconds):
+        """Count a finished call; a slow call counts as failed."""
+        failed = not ok or seconds > SLOW_CALL_SECONDS
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            if self.state == CLOSED and sum(self._outcomes) >= FAILURE_THRESHOLD:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+
+    def retry_in(self):
+        """Seconds until a trial call will be let through (0 unless open)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + OPEN_SECONDS - time.monotonic())
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, "recent_failures": sum(self._outcomes), "trips": self.trips,
+                    "rejected": self.rejected}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def for_host(host):
+    """The breaker for a host, created on first use."""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(host, Breaker(host))
+    return breaker
+
+
+def for_url(url):
+    return for_host(requests.utils.urlparse(url).hostname)
+
+
+def stats():
+    """State and counters of every host's breaker."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.snapshot() for breaker in breakers}
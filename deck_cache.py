@@ -0,0 +1,142 @@
+"""
+Content-addressed cache of rendered PPTX decks.
+
+A deck depends only on its ranges (book and verse range, in order, as
+range_plan normalizes them), the text in the verse store and the slide layout,
+so those are hashed into a key that names the cached file and doubles as the
+deck's strong ETag. Files live under
+DECK_CACHE_DIR, shared by every worker on the host; when the directory grows
+past DECK_CACHE_MAX_MB the least recently served decks are removed.
+
+Decks are rendered straight into a spool file in the same directory and renamed
+into place, so they are sent from disk (with sendfile where the server has it)
+rather than held in memory.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import parashat_generator
+import range_plan
+import verse_store
+
+CACHE_DIR = os.environ.get("DECK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ljs-decks"))
+MAX_BYTES = int(float(os.environ.get("DECK_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+_stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def stats():
+    """Snapshot of the hit/miss counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _canonical_range(range_obj):
+    """
+    A range as the deck reads it, so "genesis" / " Genesis " and "1:1-2" /
+    "1:1-1:2" give the same key; ranges that do not parse are kept as given.
+    """
+    book, pieces = range_plan.normalize(range_obj["book"], range_obj["range"])
+    if pieces is None:
+        return [str(range_obj["book"]).strip(), str(range_obj["range"]).strip()]
+    return [book, [list(piece) for piece in pieces]]
+
+
+def key_for(range_objs):
+    """Content hash of everything a rendered deck depends on."""
+    manifest = verse_store.read_manifest()
+    inputs = {
+        "ranges": [_canonical_range(r) for r in range_objs],
+        "text": [verse_store.TEXT_VERSION, manifest.get("revision", 0)],
+        "layout": parashat_generator.LAYOUT_VERSION,
+        "compression": parashat_generator.COMPRESSION_LEVEL,
+    }
+    encoded = json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.pptx")
+
+
+def lookup(key):
+    """Return the path of the cached deck for a key, or None."""
+    path = _path(key)
+    try:
+        os.utime(path)  # mark as recently served for eviction
+    except OSError:
+        _count("misses")
+        return None
+    _count("hits")
+    return path
+
+
+def refresh(key):
+    """
+    Mark a cached deck as recently used without counting a hit or miss (for
+    the prefetcher). Returns whether it is cached.
+    """
+    try:
+        os.utime(_path(key))
+    except OSError:
+        return False
+    return True
+
+
+def spool():
+    """Path of a new, empty spool file to render a deck into."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+
+def commit(key, spool_path):
+    """Move a rendered spool file into the cache and return its cached path."""
+    path = _path(key)
+    os.replace(spool_path, path)
+    _count("stored")
+    _evict(keep=os.path.basename(path))
+    return path
+
+
+def _evict(keep=None):
+    entries = []
+    total = 0
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".pptx"):
+            continue
+        try:
+            st = os.stat(os.path.join(CACHE_DIR, name))
+        except OSError:
+            continue  # removed by another worker
+        total += st.st_size  # the deck being kept counts towards the limit too
+        if name != keep:
+            entries.append((st.st_mtime, st.st_size, name))
+
+    entries.sort()
+    for _, size, name in entries:
+        if total <= MAX_BYTES:
+            break
+        try:
+            os.unlink(os.path.join(CACHE_DIR, name))
+            _count("evicted")
+        except OSError:
+            pass
+        total -= size
+
+
+def clear():
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(".pptx"):
+                os.unlink(os.path.join(CACHE_DIR, name))
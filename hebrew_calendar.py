@@ -0,0 +1,303 @@
+"""
+In-process Gregorian -> Hebrew date conversion.
+
+Uses the standard arithmetic Hebrew calendar (molad of Tishrei plus the four
+postponement rules), as laid out in Dershowitz & Reingold's Calendrical
+Calculations. Dates are handled as Python proleptic Gregorian ordinals, which
+are the same "fixed" day numbers the book uses.
+
+Months are numbered from Nisan = 1 to Elul = 6, Tishrei = 7 to Adar (I) = 12,
+with Adar II = 13 in leap years. Month names match hebcal's converter output.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+HebrewDate = namedtuple("HebrewDate", ["year", "month", "day"])
+
+# Only used by verify() and record_hebcal(); overridable to check against a stand-in server
+HEBCAL_URL = os.environ.get("HEBCAL_URL", "https://www.hebcal.com").rstrip("/")
+# Conversions recorded from the hebcal.com converter, checked offline by verify()
+HEBCAL_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "benchmarks", "fixtures", "hebcal_dates.json")
+
+NISAN, IYYAR, SIVAN, TAMUZ, AV, ELUL = 1, 2, 3, 4, 5, 6
+TISHREI, CHESHVAN, KISLEV, TEVET, SHVAT, ADAR, ADAR_II = 7, 8, 9, 10, 11, 12, 13
+
+MONTH_NAMES = {
+    NISAN: "Nisan", IYYAR: "Iyyar", SIVAN: "Sivan", TAMUZ: "Tamuz", AV: "Av", ELUL: "Elul",
+    TISHREI: "Tishrei", CHESHVAN: "Cheshvan", KISLEV: "Kislev", TEVET: "Tevet",
+    SHVAT: "Sh'vat", ADAR: "Adar", ADAR_II: "Adar II",
+}
+
+# Fixed day number of 1 Tishrei AM 1 (Julian 7 October 3761 BCE)
+HEBREW_EPOCH = -1373427
+
+
+def is_leap_year(year):
+    """True if the Hebrew year has thirteen months."""
+    return (7 * year + 1) % 19 < 7
+
+
+def last_month_of_year(year):
+    return ADAR_II if is_leap_year(year) else ADAR
+
+
+def _elapsed_days(year):
+    """Days from the epoch to the molad of Tishrei, with the molad zaken and lo ADU rules."""
+    months_elapsed = (235 * year - 234) // 19
+    parts_elapsed = 12084 + 13753 * months_elapsed
+    days = 29 * months_elapsed + parts_elapsed // 25920
+    if (3 * (days + 1)) % 7 < 3:
+        days += 1
+    return days
+
+
+def _year_length_correction(year):
+    """Delay 1 Tishrei when the year would otherwise be 356 days or a leap year too short."""
+    ny0 = _elapsed_days(year - 1)
+    ny1 = _elapsed_days(year)
+    ny2 = _elapsed_days(year + 1)
+    if ny2 - ny1 == 356:
+        return 2
+    if ny1 - ny0 == 382:
+        return 1
+    return 0
+
+
+@lru_cache(maxsize=1024)
+def new_year(year):
+    """Fixed day number of 1 Tishrei (Rosh Hashanah) of the Hebrew year."""
+    return HEBREW_EPOCH + _elapsed_days(year) + _year_length_correction(year)
+
+
+def days_in_year(year):
+    return new_year(year + 1) - new_year(year)
+
+
+def days_in_month(month, year):
+    """Number of days in a Hebrew month."""
+    if month in (IYYAR, TAMUZ, ELUL, TEVET, ADAR_II):
+        return 29
+    if month == ADAR and not is_leap_year(year):
+        return 29
+    length = days_in_year(year)
+    if month == CHESHVAN and length % 10 != 5:
+        return 29
+    if month == KISLEV and length % 10 == 3:
+        return 29
+    return 30
+
+
+@lru_cache(maxsize=1024)
+def _month_starts(year):
+    """Fixed day number of the first day of every month in the Hebrew year, keyed by month."""
+    starts = {}
+    day = new_year(year)
+    for month in list(range(TISHREI, last_month_of_year(year) + 1)) + list(range(NISAN, TISHREI)):
+        starts[month] = day
+        day += days_in_month(month, year)
+    return starts
+
+
+def to_fixed(year, month, day):
+    """Fixed day number of a Hebrew date."""
+    return _month_starts(year)[month] + day - 1
+
+
+def from_fixed(fixed):
+    """HebrewDate for a fixed day number."""
+    approx = int((fixed - HEBREW_EPOCH) // (35975351 / 98496)) + 1
+    # The mean-year estimate can land a year either side near Rosh Hashanah
+    year = approx - 1
+    while new_year(year + 1) <= fixed:
+        year += 1
+    # Walk the months in calendar order, starting from Tishrei
+    starts = _month_starts(year)
+    month = TISHREI
+    for candidate, start in sorted(starts.items(), key=lambda item: item[1]):
+        if start > fixed:
+            break
+        month = candidate
+    return HebrewDate(year, month, fixed - starts[month] + 1)
+
+
+def from_gregorian(year, month, day):
+    """HebrewDate for a Gregorian date."""
+    return from_fixed(datetime.date(year, month, day).toordinal())
+
+
+def to_gregorian(year, month, day):
+    """Gregorian datetime.date for a Hebrew date."""
+    return datetime.date.fromordinal(to_fixed(year, month, day))
+
+
+def month_name(month, year):
+    """English month name as hebcal spells it ("Adar I" in leap years)."""
+    if month == ADAR and is_leap_year(year):
+        return "Adar I"
+    return MONTH_NAMES[month]
+
+
+def _molad_new_year(year):
+    """
+    Rosh Hashanah of a Hebrew year, worked out the traditional way.
+
+    Counts the molad of Tishrei in parts (halakim) from molad BaHaRaD and
+    applies the four dehiyyot by name. It shares nothing with new_year() but
+    is_leap_year(), so verify() can use it as an independent check.
+    """
+    day_parts, hour_parts = 25920, 1080
+    years = year - 1
+    months = 235 * (years // 19) + 12 * (years % 19) + (7 * (years % 19) + 1) // 19
+    molad = day_parts + 5 * hour_parts + 204 + months * (29 * day_parts + 12 * hour_parts + 793)
+    day, parts = divmod(molad, day_parts)  # day 0 is the Sunday before BaHaRaD
+    if parts >= 18 * hour_parts:  # molad zaken
+        day += 1
+    elif day % 7 == 2 and parts >= 9 * hour_parts + 204 and not is_leap_year(year):  # GaTaRaD
+        day += 2
+    elif day % 7 == 1 and parts >= 15 * hour_parts + 589 and is_leap_year(year - 1):  # BeTUTaKPaT
+        day += 1
+    if day % 7 in (0, 3, 5):  # lo ADU Rosh
+        day += 1
+    return HEBREW_EPOCH + day - 1
+
+
+def _hebcal_entry(date):
+    hd = from_gregorian(date.year, date.month, date.day)
+    return {"gregorian": date.isoformat(), "hy": hd.year, "hm": month_name(hd.month, hd.year),
+            "hd": hd.day}
+
+
+def load_hebcal_fixture(path=None):
+    """The recorded hebcal conversions, or [] if none have been recorded."""
+    path = path or HEBCAL_FIXTURE
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record_hebcal(samples, start_year=1600, end_year=2400, path=None):
+    """
+    Add that many random dates, as converted by hebcal.com, to the fixture.
+
+    Needs the network; verify() then checks the recorded answers offline.
+    Returns the number of entries in the fixture.
+    """
+    import http_client
+    entries = {entry["gregorian"]: entry for entry in load_hebcal_fixture(path)}
+    first = datetime.date(start_year, 1, 1).toordinal()
+    last = datetime.date(end_year, 12, 31).toordinal()
+    rng = random.Random(5785)
+    for _ in range(samples):
+        date = datetime.date.fromordinal(rng.randint(first, last))
+        url = (f"{HEBCAL_URL}/converter?cfg=json"
+               f"&gy={date.year}&gm={date.month}&gd={date.day}&g2h=1")
+        data = http_client.get(url).json()
+        entries[date.isoformat()] = {"gregorian": date.isoformat(), "hy": data.get("hy"),
+                                     "hm": data.get("hm"), "hd": data.get("hd")}
+    return _write_hebcal_fixture(entries, path or HEBCAL_FIXTURE)
+
+
+def record_hebcal_holidays(start_year=1900, end_year=2100, path=None):
+    """
+    Add Rosh Hashanah and the first day of Pesach for every Gregorian year
+    in the range, as hebcal.com dates them, to the fixture.
+
+    Needs the network. Returns the number of entries in the fixture.
+    """
+    import http_client
+    entries = {entry["gregorian"]: entry for entry in load_hebcal_fixture(path)}
+    for year in range(start_year, end_year + 1):
+        for hy, hm, hd in ((year + 3761, "Tishrei", 1), (year + 3760, "Nisan", 15)):
+            url = f"{HEBCAL_URL}/converter?cfg=json&hy={hy}&hm={hm}&hd={hd}&h2g=1"
+            data = http_client.get(url).json()
+            date = datetime.date(data["gy"], data["gm"], data["gd"])
+            entries[date.isoformat()] = {"gregorian": date.isoformat(), "hy": hy, "hm": hm,
+                                         "hd": hd}
+    return _write_hebcal_fixture(entries, path or HEBCAL_FIXTURE)
+
+
+def _write_hebcal_fixture(entries, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n" + ",\n".join("  " + json.dumps(entries[key]) for key in sorted(entries))
+                + "\n]\n")
+    return len(entries)
+
+
+def verify(start_year=1600, end_year=2400, hebcal_samples=0):
+    """
+    Self-check the converter across a Gregorian year range.
+
+    Checks every conversion recorded in the hebcal fixture, that every day
+    round-trips, that every year has a legal length and that Rosh Hashanah
+    matches the traditional molad-and-dehiyyot reckoning. With
+    hebcal_samples > 0, also compares that many random dates with the live
+    hebcal.com converter. Returns a list of failure messages.
+    """
+    failures = []
+    for entry in load_hebcal_fixture():
+        got = _hebcal_entry(datetime.date.fromisoformat(entry["gregorian"]))
+        if got != entry:
+            failures.append(f"{entry['gregorian']}: hebcal says "
+                            f"{(entry['hy'], entry['hm'], entry['hd'])}, "
+                            f"got {(got['hy'], got['hm'], got['hd'])}")
+
+    first = datetime.date(start_year, 1, 1).toordinal()
+    last = datetime.date(end_year, 12, 31).toordinal()
+    for fixed in range(first, last + 1):
+        hd = from_fixed(fixed)
+        if not 1 <= hd.day <= days_in_month(hd.month, hd.year) or to_fixed(*hd) != fixed:
+            failures.append(f"{datetime.date.fromordinal(fixed)}: {hd} does not round-trip")
+
+    for year in range(from_fixed(first).year, from_fixed(last).year + 1):
+        if new_year(year) != _molad_new_year(year):
+            failures.append(f"Rosh Hashanah {year}: {datetime.date.fromordinal(new_year(year))}, "
+                            f"the molad gives {datetime.date.fromordinal(_molad_new_year(year))}")
+        if days_in_year(year) not in (353, 354, 355, 383, 384, 385):
+            failures.append(f"Year {year} has {days_in_year(year)} days")
+
+    if hebcal_samples:
+        import http_client
+        rng = random.Random(5785)
+        for _ in range(hebcal_samples):
+            date = datetime.date.fromordinal(rng.randint(first, last))
+            url = (f"{HEBCAL_URL}/converter?cfg=json"
+                   f"&gy={date.year}&gm={date.month}&gd={date.day}&g2h=1")
+            data = http_client.get(url).json()
+            got = _hebcal_entry(date)
+            expected = (data.get("hy"), data.get("hm"), data.get("hd"))
+            if (got["hy"], got["hm"], got["hd"]) != expected:
+                failures.append(f"{date}: hebcal says {expected}, got {(got['hy'], got['hm'], got['hd'])}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify the Hebrew calendar engine.")
+    parser.add_argument("--start", type=int, default=1600, help="First Gregorian year to check")
+    parser.add_argument("--end", type=int, default=2400, help="Last Gregorian year to check")
+    parser.add_argument("--hebcal", type=int, default=0, metavar="N",
+                        help="Also compare N random dates against the live hebcal.com converter")
+    parser.add_argument("--record-hebcal", type=int, default=0, metavar="N",
+                        help="Add N random dates converted by hebcal.com to the offline fixture")
+    parser.add_argument("--record-holidays", action="store_true",
+                        help="Add hebcal.com's Rosh Hashanah and Pesach dates for every year "
+                             "from --start to --end to the offline fixture")
+    args = parser.parse_args()
+
+    if args.record_hebcal:
+        count = record_hebcal(args.record_hebcal, args.start, args.end)
+        print(f"{count} conversion(s) in {HEBCAL_FIXTURE}")
+    if args.record_holidays:
+        count = record_hebcal_holidays(args.start, args.end)
+        print(f"{count} conversion(s) in {HEBCAL_FIXTURE}")
+
+    problems = verify(args.start, args.end, args.hebcal)
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} problem(s) between {args.start} and {args.end}")
@@ -0,0 +1,424 @@
+"""
+Shared cache for upstream HTTP GETs (Sefaria, hebcal).
+
+Every upstream fetch goes through `get()`, which answers from the configured
+backend while an entry is fresh, revalidates it with If-None-Match /
+If-Modified-Since once it expires, and remembers known-bad references
+(404 and 400 responses and Sefaria's {"error": ...} payloads) for a shorter
+time.
+
+When the upstream cannot be reached (an error, a 5xx or any other 4xx such as
+408 or 429, or its circuit breaker is open) and an expired entry is still
+kept, that entry is returned instead, with stale=True, and the URL is fetched
+again in the background until the upstream answers.
+
+Backends:
+  memory  in-process LRU (default)
+  disk    one file per entry under HTTP_CACHE_DIR, shared by every worker on a host
+  redis   any Redis-compatible server at REDIS_URL, shared by every dyno
+
+Pick one with HTTP_CACHE_BACKEND.
+"""
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+import circuit_breaker
+import http_client
+import singleflight
+
+DAY = 24 * 60 * 60
+
+# First matching pattern wins. Texts never change in practice, calendars roll daily.
+TTL_RULES = [
+    (re.compile(r"/api/texts/"), 365 * DAY),
+    (re.compile(r"/api/calendars"), DAY),
+    (re.compile(r"hebcal\.com/converter"), 365 * DAY),
+]
+DEFAULT_TTL = 60 * 60
+NEGATIVE_TTL = DAY
+# The only error statuses that say something about the reference itself; every
+# other 4xx (408, 429, ...) is treated like a 5xx: not cached, and stale data is
+# served in its place
+NEGATIVE_STATUSES = (400, 404)
+
+# How long an expired entry is kept around so it can still be revalidated, or
+# served stale while the upstream is down
+STALE_GRACE = 30 * DAY
+# Background refetches of a URL served stale: the first after REFRESH_BACKOFF
+# seconds (or once its breaker lets a call through), doubling after each failure
+REFRESH_ATTEMPTS = 6
+REFRESH_BACKOFF = 5
+
+# Response headers worth keeping with an entry
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CachedResponse:
+    """The parts of a requests.Response the app uses, rebuilt from a cache entry."""
+
+    def __init__(self, url, status_code, headers, content, from_cache=False, stale=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+        self.stale = stale  # an expired entry, served because the upstream is down
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU."""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskBackend:
+    """One JSON file per entry; safe to share between processes."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] + STALE_GRACE < time.time():
+            return None
+        entry["body"] = base64.b64decode(entry["body"])
+        return entry
+
+    def set(self, key, entry):
+        stored = dict(entry, body=base64.b64encode(entry["body"]).decode("ascii"))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.unlink(os.path.join(self.directory, name))
+
+
+class RedisBackend:
+    """Entries stored as JSON strings in a Redis-compatible server."""
+
+    def __init__(self, url, prefix="ljs:http:"):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        entry["body"] = base64.b64decode(entry["body"])
+        return entry
+
+    def set(self, key, entry):
+        stored = dict(entry, body=base64.b64encode(entry["body"]).decode("ascii"))
+        lifetime = max(1, int(entry["expires_at"] - time.time() + STALE_GRACE))
+        self.client.set(self.prefix + key, json.dumps(stored), ex=lifetime)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+def _make_backend():
+    kind = os.environ.get("HTTP_CACHE_BACKEND", "memory").lower()
+    if kind == "disk":
+        directory = os.environ.get("HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ljs-http-cache"))
+        return DiskBackend(directory)
+    if kind == "redis":
+        return RedisBackend(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+    return MemoryBackend()
+
+
+backend = _make_backend()
+
+_stats = {"hits": 0, "misses": 0, "negative_hits": 0, "revalidated": 0, "stored": 0, "errors": 0, "stale": 0,
+          "refreshed": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """Snapshot of the hit/miss counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def ttl_for(url):
+    for pattern, ttl in TTL_RULES:
+        if pattern.search(url):
+            return ttl
+    return DEFAULT_TTL
+
+
+def _is_transient(status_code):
+    """Error responses that say nothing about the reference, only about the upstream right now."""
+    return status_code >= 400 and status_code not in NEGATIVE_STATUSES
+
+
+def _is_negative(status_code, content):
+    """Responses that mean "this reference does not exist"."""
+    if status_code in NEGATIVE_STATUSES:
+        return True
+    if status_code == 200 and content[:1] == b"{":
+        try:
+            return "error" in json.loads(content)
+        except ValueError:
+            return False
+    return False
+
+
+def _store(key, url, response, ttl):
+    if _is_transient(response.status_code):
+        return None
+    content = response.content
+    negative = _is_negative(response.status_code, content)
+    entry = {
+        "url": url,
+        "status": response.status_code,
+        "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+        "body": content,
+        "negative": negative,
+        "expires_at": time.time() + (min(ttl, NEGATIVE_TTL) if negative else ttl),
+    }
+    backend.set(key, entry)
+    _count("stored")
+    return entry
+
+
+def _response(entry, from_cache, stale=False):
+    return CachedResponse(entry["url"], entry["status"], entry["headers"], entry["body"], from_cache, stale)
+
+
+def _validators(entry):
+    """Conditional request headers for revalidating an entry."""
+    headers = {}
+    if entry is not None and not entry.get("negative"):
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+    return headers
+
+
+def _lookup(url, ttl, revalidate):
+    """
+    Return (key, entry, headers, cached_response). cached_response is set when
+    the entry can be served as is; otherwise headers hold the validators to send.
+    """
+    key = f"GET {url}"
+    entry = backend.get(key)
+
+    if entry is not None and not revalidate and entry["expires_at"] > time.time():
+        _count("negative_hits" if entry.get("negative") else "hits")
+        return key, entry, None, _response(entry, True)
+
+    _count("misses")
+    return key, entry, _validators(entry), None
+
+
+def _finish(key, url, entry, response, ttl):
+    """Fold an upstream response (requests or httpx) into the cache and return a CachedResponse."""
+    if response.status_code == 304 and entry is not None:
+        _count("revalidated")
+        entry["expires_at"] = time.time() + ttl
+        backend.set(key, entry)
+        return _response(entry, True)
+
+    stored = _store(key, url, response, ttl)
+    if stored is None:
+        return CachedResponse(url, response.status_code, dict(response.headers), response.content)
+    return _response(stored, False)
+
+
+def get(url, timeout=None, ttl=None, revalidate=False):
+    """
+    GET a URL through the cache and return a CachedResponse.
+
+    revalidate=True treats a fresh entry as expired, so the upstream is asked
+    (conditionally, when the entry has validators) whether it changed.
+    timeout is passed to http_client.get, which supplies the defaults.
+    Network errors (CircuitOpen among them) propagate as requests exceptions,
+    unless an expired entry can be served stale; revalidate=True callers
+    always see them.
+    """
+    ttl = ttl_for(url) if ttl is None else ttl
+    key, entry, headers, cached = _lookup(url, ttl, revalidate)
+    if cached is not None:
+        return cached
+
+    def fetch():
+        try:
+            response = http_client.get(url, headers=headers, timeout=timeout)
+        except requests.exceptions.RequestException:
+            _count("errors")
+            raise
+        return _finish(key, url, entry, response, ttl)
+
+    # Concurrent misses for the same URL share one upstream request
+    if revalidate:
+        return singleflight.do(f"{key} revalidate", fetch)[0]
+    try:
+        response = singleflight.do(key, fetch, check=lambda: _fresh(key))[0]
+    except requests.exceptions.RequestException:
+        if not _servable(entry):
+            raise
+        return _stale(key, url, entry, ttl)
+    if _is_transient(response.status_code) and _servable(entry):
+        return _stale(key, url, entry, ttl)
+    return response
+
+
+def _servable(entry):
+    """Whether an expired entry can stand in for the upstream while it is down."""
+    return entry is not None and not entry.get("negative")
+
+
+def _stale(key, url, entry, ttl):
+    _count("stale")
+    _refresh_later(key, url, ttl)
+    return _response(entry, True, stale=True)
+
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_later(key, url, ttl, attempt=0):
+    """Fetch a URL that is being served stale again in the background, once per key at a time."""
+    if attempt == 0:
+        with _refreshing_lock:
+            if key in _refreshing:
+                return
+            _refreshing.add(key)
+    delay = max(circuit_breaker.for_url(url).retry_in(), REFRESH_BACKOFF * 2 ** attempt)
+    timer = threading.Timer(delay, _refresh, (key, url, ttl, attempt))
+    timer.daemon = True
+    timer.start()
+
+
+def _refresh(key, url, ttl, attempt):
+    retry = False
+    try:
+        entry = backend.get(key)
+        response = http_client.get(url, headers=_validators(entry))
+        if not _is_transient(response.status_code):
+            _finish(key, url, entry, response, ttl)
+            _count("refreshed")
+        else:
+            retry = True
+    except requests.exceptions.RequestException:
+        _count("errors")
+        retry = True
+    finally:
+        if retry and attempt + 1 < REFRESH_ATTEMPTS:
+            _refresh_later(key, url, ttl, attempt + 1)
+        else:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+
+def _fresh(key):
+    """The cached response for a key if it is fresh (stored by another worker), else None."""
+    entry = backend.get(key)
+    if entry is not None and entry["expires_at"] > time.time():
+        return _response(entry, True)
+    return None
+
+
+async def get_async(url, ttl=None, revalidate=False):
+    """
+    Non-blocking get() for the ASGI server. Shares the backend, counters and
+    stale fallback with get(); network errors propagate as httpx exceptions,
+    or CircuitOpen while the upstream's breaker is open.
+    """
+    import httpx  # only installed for the ASGI server
+
+    ttl = ttl_for(url) if ttl is None else ttl
+    key, entry, headers, cached = _lookup(url, ttl, revalidate)
+    if cached is not None:
+        return cached
+
+    async def fetch():
+        try:
+            response = await http_client.get_async(url, headers=headers)
+        except (httpx.HTTPError, circuit_breaker.CircuitOpen):
+            _count("errors")
+            raise
+        return _finish(key, url, entry, response, ttl)
+
+    if revalidate:
+        return (await singleflight.do_async(f"{key} revalidate", fetch))[0]
+    try:
+        response = (await singleflight.do_async(key, fetch))[0]
+    except (httpx.HTTPError, circuit_breaker.CircuitOpen):
+        if not _servable(entry):
+            raise
+        return _stale(key, url, entry, ttl)
+    if _is_transient(response.status_code) and _servable(entry):
+        return _stale(key, url, entry, ttl)
+    return response
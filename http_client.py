@@ -0,0 +1,212 @@
+"""
+Shared, pooled HTTP client for every upstream call (Sefaria, hebcal).
+
+One requests.Session keeps TLS connections alive per host, so repeat calls skip
+the TCP and TLS handshakes. Every request gets default connect and read timeouts,
+idempotent GETs are retried with jittered exponential backoff, and each host is
+capped at a fixed number of open connections (callers wait for a free one rather
+than opening more).
+
+The ASGI server uses get_async(), the same policy on a shared httpx.AsyncClient,
+so a single event loop can keep many slow upstream calls in flight.
+
+Both go through the host's circuit breaker (circuit_breaker.py): while it is
+open they raise CircuitOpen at once instead of waiting on the upstream.
+
+Tunable with HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES,
+HTTP_MAX_CONNECTIONS_PER_HOST and HTTP_ASYNC_MAX_CONNECTIONS.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import circuit_breaker
+import tracing
+
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+ASYNC_MAX_CONNECTIONS = int(os.environ.get("HTTP_ASYNC_MAX_CONNECTIONS", "200"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_FACTOR = 0.25
+BACKOFF_JITTER = 0.25
+
+_stats = defaultdict(lambda: {"requests": 0, "connections_opened": 0})
+_stats_lock = threading.Lock()
+
+
+def _count(host, name):
+    with _stats_lock:
+        _stats[host][name] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count(self.host, "connections_opened")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count(self.host, "connections_opened")
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count the connections (and so handshakes) they open."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _make_session():
+    retry = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        status=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = _PooledAdapter(
+        pool_connections=4,  # distinct hosts kept warm
+        pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+        pool_block=True,
+        max_retries=retry,
+    )
+    new_session = requests.Session()
+    new_session.mount("https://", adapter)
+    new_session.mount("http://", adapter)
+    return new_session
+
+
+session = _make_session()
+
+
+def get(url, timeout=None, **kwargs):
+    """
+    GET through the shared session. timeout may be a number (read timeout) or
+    a (connect, read) tuple; it defaults to the module-wide timeouts.
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    elif not isinstance(timeout, tuple):
+        timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+    host = requests.utils.urlparse(url).hostname
+    breaker = _allow(host)
+    _count(host, "requests")
+    start = time.monotonic()
+    ok = False
+    try:
+        with tracing.span("upstream", host):
+            response = session.get(url, timeout=timeout, **kwargs)
+        ok = response.status_code not in RETRY_STATUSES
+        return response
+    finally:
+        breaker.record(ok, time.monotonic() - start)
+
+
+def _allow(host):
+    """The host's breaker, if it lets a call through; raises CircuitOpen if not."""
+    breaker = circuit_breaker.for_host(host)
+    if not breaker.allow():
+        raise circuit_breaker.CircuitOpen(host, breaker.retry_in())
+    return breaker
+
+
+_async_client = None
+
+
+def async_client():
+    """The shared httpx.AsyncClient, created on first use inside the running event loop."""
+    global _async_client
+    if _async_client is None:
+        import httpx  # only installed for the ASGI server
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_CONNECTIONS_PER_HOST),
+        )
+    return _async_client
+
+
+async def aclose():
+    """Close the async client's connections (on server shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def _retry_delay(attempt, response=None):
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    if retry_after.isdigit():
+        return float(retry_after)
+    return BACKOFF_FACTOR * 2 ** attempt + random.uniform(0, BACKOFF_JITTER)
+
+
+async def get_async(url, **kwargs):
+    """
+    Non-blocking GET with the same timeouts, retry policy, circuit breaker
+    and metrics as get(). Returns an httpx.Response; transport errors
+    propagate as httpx exceptions.
+    """
+    import httpx
+
+    host = httpx.URL(url).host
+    breaker = _allow(host)
+
+    async def trace(event_name, info):
+        if event_name == "connection.connect_tcp.started":
+            _count(host, "connections_opened")
+
+    _count(host, "requests")
+    start = time.monotonic()
+    ok = False
+    try:
+        with tracing.span("upstream", host):
+            for attempt in range(RETRIES + 1):
+                response = None
+                try:
+                    response = await async_client().get(url, extensions={"trace": trace}, **kwargs)
+                except httpx.TransportError:
+                    if attempt == RETRIES:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt == RETRIES:
+                        ok = response.status_code not in RETRY_STATUSES
+                        return response
+                await asyncio.sleep(_retry_delay(attempt, response))
+    except asyncio.CancelledError:
+        ok = True  # the client went away; says nothing about the upstream
+        raise
+    finally:
+        breaker.record(ok, time.monotonic() - start)
+
+
+def stats():
+    """Per-host request and connection counts, with the share of requests that reused a connection."""
+    with _stats_lock:
+        snapshot = {host: dict(counts) for host, counts in _stats.items()}
+    for counts in snapshot.values():
+        made = counts["requests"]
+        counts["connection_reuse"] = round(1 - counts["connections_opened"] / made, 3) if made else None
+    return snapshot
@@ -0,0 +1,232 @@
+"""
+Caching headers, validators and compression for the app's own responses.
+
+Every route gets a Cache-Control policy by path (POLICIES) for its successful
+responses; error responses get ERROR_POLICY. Cacheable JSON and HTML
+responses get a weak ETag computed from the uncompressed body, so one
+validator covers every encoding and If-None-Match is answered with a 304, and
+they are compressed with brotli (when the optional brotli package is
+installed) or gzip, as the client's Accept-Encoding allows. Compressed bodies
+are kept in a small LRU keyed by ETag, as the same verse JSON is sent over and
+over. Files (decks, static assets) are never recompressed on the fly; decks go
+out through sendfile as before.
+
+Static URLs built with url_for carry a content hash (?v=...), so they are
+served as immutable for a year; `python http_headers.py` writes .br/.gz copies
+of the static files next to them at build time (bin/post_compile), which are
+sent to clients that accept them while they are newer than the file.
+
+Responses built from upstream data that http_cache served stale (the upstream
+being down) carry a Warning header and are sent with STALE_POLICY instead, so
+no cache holds on to them once the upstream is back.
+
+app.py applies this to Flask responses in an after_request hook and asgi.py to
+its native routes.
+"""
+import datetime
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli  # optional dependency; without it only gzip is offered
+except ImportError:
+    brotli = None
+
+MAX_AGE = int(os.environ.get("RESPONSE_MAX_AGE", "3600"))
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+
+STATIC_IMMUTABLE = "public, max-age=31536000, immutable"
+# Readings and listings by week: their weeks count from the next Shabbat, so
+# they change when the week rolls over and are never cached past it
+WEEKLY_PREFIXES = ("/get_parashat_data/", "/get_parashat_names", "/get_next_4_weeks")
+# (path prefix, Cache-Control); the first match wins. Readings by reference
+# only change with the verse store.
+POLICIES = [
+    ("/static/", f"public, max-age={MAX_AGE}"),  # unversioned URLs; versioned ones are immutable
+    ("/get_special_readings", "public, max-age=86400"),
+    ("/get_custom_verses", "public, max-age=86400"),
+    ("/get_parashat_for_date", "public, max-age=86400"),
+    ("/cache_stats", "no-store"),
+    ("/jobs/", "no-store"),
+]
+PAGE_POLICY = "no-cache"  # "/": the page shows today's date, so always revalidate
+# Errors (a bad request, an upstream outage) must not outlive the moment
+ERROR_POLICY = "no-store"
+STALE_POLICY = "no-cache"
+STALE_WARNING = '110 - "Response is Stale"'
+
+COMPRESSIBLE = {"application/json", "text/html", "text/css", "text/plain", "text/javascript",
+                "application/javascript", "image/svg+xml"}
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_compressed = OrderedDict()
+_compressed_lock = threading.Lock()
+COMPRESSED_CACHE_SIZE = 64
+_versions = {}
+
+
+def until_rollover(now=None):
+    """
+    Seconds until the next week rollover: the midnight (server time) starting
+    Saturday, when parashat_generator.get_next_shabbat_date moves on a week.
+    """
+    now = now or datetime.datetime.now()
+    days = (5 - now.weekday()) % 7 or 7
+    rollover = datetime.datetime.combine(now.date() + datetime.timedelta(days=days), datetime.time())
+    return int((rollover - now).total_seconds())
+
+
+def policy(path, stale=False, status=200):
+    """
+    The Cache-Control value for a response to a path, or None to leave it
+    unset. Route policies only apply to 200 and 304 responses; errors are
+    never stored.
+    """
+    if status >= 400:
+        return ERROR_POLICY
+    if status not in (200, 304):
+        return None
+    if stale:
+        return STALE_POLICY
+    if path == "/":
+        return PAGE_POLICY
+    if path.startswith(WEEKLY_PREFIXES):
+        return f"public, max-age={min(MAX_AGE, until_rollover())}"
+    for prefix, value in POLICIES:
+        if path.startswith(prefix):
+            return value
+    return None
+
+
+def is_stale(headers):
+    return headers.get("Warning") == STALE_WARNING
+
+
+def cacheable(cache_control):
+    return cache_control is not None and "no-store" not in cache_control
+
+
+def compressible(mimetype):
+    return mimetype in COMPRESSIBLE
+
+
+def body_etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag value (unquoted)."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def negotiate(accept_encoding, offered=ENCODINGS):
+    """The first of the offered encodings the Accept-Encoding header allows, or None."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in offered:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding, etag=None):
+    """body compressed with encoding; cached by etag when one is given."""
+    key = (etag, encoding)
+    if etag is not None:
+        with _compressed_lock:
+            data = _compressed.get(key)
+            if data is not None:
+                _compressed.move_to_end(key)
+                return data
+    if encoding == "br":
+        data = brotli.compress(body, quality=5)  # fast enough to do per response
+    else:
+        data = gzip.compress(body, compresslevel=6, mtime=0)
+    if etag is not None:
+        with _compressed_lock:
+            _compressed[key] = data
+            while len(_compressed) > COMPRESSED_CACHE_SIZE:
+                _compressed.popitem(last=False)
+    return data
+
+
+def static_version(folder, filename):
+    """Short content hash of a static file for cache-busting URLs, or None if it is missing."""
+    path = os.path.join(folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    cached = _versions.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = _versions[path] = (mtime, hashlib.sha256(f.read()).hexdigest()[:12])
+    return cached[1]
+
+
+def _fresh_copy(source, copy):
+    """Whether a precompressed copy exists and is not older than its source."""
+    try:
+        return os.stat(copy).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except OSError:
+        return False
+
+
+def precompressed(folder, filename, accept_encoding):
+    """
+    (encoding, file name) of the best precompressed copy the client accepts, or
+    None. Copies older than the file itself (it changed since `python
+    http_headers.py` last ran) are ignored.
+    """
+    source = os.path.join(folder, filename)
+    offered = [e for e in ENCODINGS if _fresh_copy(source, source + SUFFIXES[e])]
+    encoding = negotiate(accept_encoding, offered) if offered else None
+    return (encoding, filename + SUFFIXES[encoding]) if encoding else None
+
+
+def precompress(folder):
+    """Write .br (with brotli installed) and .gz copies of the compressible static files."""
+    written = 0
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            if not compressible(mimetypes.guess_type(name)[0]):
+                continue
+            with open(path, "rb") as f:
+                body = f.read()
+            for encoding in ENCODINGS:
+                data = (brotli.compress(body, quality=11) if encoding == "br"
+                        else gzip.compress(body, compresslevel=9, mtime=0))
+                target = path + SUFFIXES[encoding]
+                if len(data) < len(body):
+                    with open(target, "wb") as f:
+                        f.write(data)
+                    written += 1
+                elif os.path.exists(target):
+                    os.unlink(target)  # no smaller than the original any more
+    return written
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    print(f"Wrote {precompress(folder)} precompressed files under {folder}")
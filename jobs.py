@@ -0,0 +1,146 @@
+"""
+Background deck generation jobs.
+
+A large /generate request can be run as a job instead: submit() returns a job
+id at once and the deck is built on a pool of JOB_WORKERS threads, separate
+from the threads serving requests. Each job's state (status, chapters fetched,
+slides rendered) is a small JSON file under JOBS_DIR and its finished deck sits
+next to it, so any worker on the host can answer the status polls and serve
+the download. Jobs and their decks are removed once they have not changed for
+JOB_TTL seconds.
+"""
+import concurrent.futures
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import deck_cache
+
+# Under the deck cache by default, so finished decks are hard links, not copies
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(deck_cache.CACHE_DIR, "jobs"))
+WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+TTL = float(os.environ.get("JOB_TTL", "3600"))
+# The page generates decks spanning more chapters than this as jobs
+THRESHOLD_CHAPTERS = int(os.environ.get("JOB_THRESHOLD_CHAPTERS", "12"))
+
+logger = logging.getLogger("jobs")
+
+_pool = concurrent.futures.ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="job")
+# State of the jobs running in this process; other workers read the files
+_running = {}
+_lock = threading.Lock()
+
+
+def _state_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+
+def deck_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.pptx")
+
+
+def _write(state):
+    tmp_path = f"{_state_path(state['id'])}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _state_path(state["id"]))
+
+
+def _update(job_id, **changes):
+    with _lock:
+        state = _running[job_id]
+        state.update(changes)
+        _write(state)
+
+
+def _expire():
+    # Go by the state file: a linked deck shares its mtime with the cached one
+    cutoff = time.time() - TTL
+    for name in os.listdir(JOBS_DIR):
+        job_id, _, suffix = name.partition(".")
+        if suffix != "json" or job_id in _running:
+            continue
+        try:
+            if os.stat(_state_path(job_id)).st_mtime >= cutoff:
+                continue
+            os.unlink(_state_path(job_id))
+            os.unlink(deck_path(job_id))
+        except OSError:
+            pass  # removed by another worker, or the job had no deck
+
+
+def submit(build, filename, etag):
+    """
+    Queue build(progress) -> (path, complete) and return the job id. build
+    reports with progress(stage, done, total), stage being "chapters" or
+    "slides". The returned path is linked into the job when it is complete
+    (a cached deck) and moved there when it is not (a spool file).
+    """
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    _expire()
+    job_id = uuid.uuid4().hex
+    state = {"id": job_id, "status": "queued", "submitted": time.time(), "filename": filename, "etag": etag,
+             "progress": {}, "complete": None, "error": None}
+    with _lock:
+        _running[job_id] = state
+        _write(state)
+    _pool.submit(_run, job_id, build)
+    return job_id
+
+
+def _run(job_id, build):
+    _update(job_id, status="running", started=time.time())
+    try:
+        path, complete = build(lambda stage, done, total: progress(job_id, stage, done, total))
+        if complete:
+            try:
+                os.link(path, deck_path(job_id))
+            except OSError:  # JOBS_DIR on another filesystem
+                shutil.copyfile(path, deck_path(job_id))
+        else:
+            shutil.move(path, deck_path(job_id))
+        _update(job_id, status="done", complete=complete, finished=time.time())
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        _update(job_id, status="failed", error=str(e), finished=time.time())
+    finally:
+        with _lock:
+            del _running[job_id]
+
+
+def progress(job_id, stage, done, total):
+    """
+    Record done of total for a stage. Callers may report from several threads
+    and out of order; the count never goes back, and the file is only
+    rewritten every 2% or so of the stage.
+    """
+    with _lock:
+        state = _running.get(job_id)
+        if state is None:  # a fetch that outlived its deadline
+            return
+        previous = state["progress"].get(stage, {}).get("done", -1)
+        if done <= previous:
+            return
+        state["progress"][stage] = {"done": done, "total": total}
+        if done == total or previous < 0 or done * 50 // total != previous * 50 // total:
+            _write(state)
+
+
+def status(job_id):
+    """A job's state as last written, or None for an unknown or expired job."""
+    if not job_id.isalnum():
+        return None
+    try:
+        with open(_state_path(job_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def stats():
+    with _lock:
+        return {"running": len(_running), "workers": WORKERS}
@@ -0,0 +1,255 @@
+"""
+Computed weekly Torah reading schedule (Israel and Diaspora).
+
+Given a Hebrew year, the schedule lays the 54 parashot over that year's
+Shabbatot. Festival Shabbatot get the festival reading instead, and the seven
+combinable pairs are joined when there are fewer Shabbatot than portions,
+following the fixed points of the traditional schedule:
+
+* Tzav is read on the Shabbat before Pesach in ordinary years
+* Devarim is read on the Shabbat before Tisha B'Av
+* Nitzavim is read on the Shabbat before Rosh Hashanah, joined by Vayeilech
+  when Rosh Hashanah falls on Thursday or Shabbat
+
+A whole year is computed at once and memoized, so lookups are dictionary reads.
+"""
+import datetime
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+import hebrew_calendar as hc
+
+Reading = namedtuple("Reading", ["date", "title", "ref", "parashot", "holiday"])
+
+# Sefaria display names and references for the 54 parashot
+PARASHOT = [
+    ("Bereshit", "Genesis 1:1-6:8"),
+    ("Noach", "Genesis 6:9-11:32"),
+    ("Lech Lecha", "Genesis 12:1-17:27"),
+    ("Vayera", "Genesis 18:1-22:24"),
+    ("Chayei Sara", "Genesis 23:1-25:18"),
+    ("Toldot", "Genesis 25:19-28:9"),
+    ("Vayetzei", "Genesis 28:10-32:3"),
+    ("Vayishlach", "Genesis 32:4-36:43"),
+    ("Vayeshev", "Genesis 37:1-40:23"),
+    ("Miketz", "Genesis 41:1-44:17"),
+    ("Vayigash", "Genesis 44:18-47:27"),
+    ("Vayechi", "Genesis 47:28-50:26"),
+    ("Shemot", "Exodus 1:1-6:1"),
+    ("Vaera", "Exodus 6:2-9:35"),
+    ("Bo", "Exodus 10:1-13:16"),
+    ("Beshalach", "Exodus 13:17-17:16"),
+    ("Yitro", "Exodus 18:1-20:23"),
+    ("Mishpatim", "Exodus 21:1-24:18"),
+    ("Terumah", "Exodus 25:1-27:19"),
+    ("Tetzaveh", "Exodus 27:20-30:10"),
+    ("Ki Tisa", "Exodus 30:11-34:35"),
+    ("Vayakhel", "Exodus 35:1-38:20"),
+    ("Pekudei", "Exodus 38:21-40:38"),
+    ("Vayikra", "Leviticus 1:1-5:26"),
+    ("Tzav", "Leviticus 6:1-8:36"),
+    ("Shmini", "Leviticus 9:1-11:47"),
+    ("Tazria", "Leviticus 12:1-13:59"),
+    ("Metzora", "Leviticus 14:1-15:33"),
+    ("Achrei Mot", "Leviticus 16:1-18:30"),
+    ("Kedoshim", "Leviticus 19:1-20:27"),
+    ("Emor", "Leviticus 21:1-24:23"),
+    ("Behar", "Leviticus 25:1-26:2"),
+    ("Bechukotai", "Leviticus 26:3-27:34"),
+    ("Bamidbar", "Numbers 1:1-4:20"),
+    ("Nasso", "Numbers 4:21-7:89"),
+    ("Beha'alotcha", "Numbers 8:1-12:16"),
+    ("Sh'lach", "Numbers 13:1-15:41"),
+    ("Korach", "Numbers 16:1-18:32"),
+    ("Chukat", "Numbers 19:1-22:1"),
+    ("Balak", "Numbers 22:2-25:9"),
+    ("Pinchas", "Numbers 25:10-30:1"),
+    ("Matot", "Numbers 30:2-32:42"),
+    ("Masei", "Numbers 33:1-36:13"),
+    ("Devarim", "Deuteronomy 1:1-3:22"),
+    ("Vaetchanan", "Deuteronomy 3:23-7:11"),
+    ("Eikev", "Deuteronomy 7:12-11:25"),
+    ("Re'eh", "Deuteronomy 11:26-16:17"),
+    ("Shoftim", "Deuteronomy 16:18-21:9"),
+    ("Ki Teitzei", "Deuteronomy 21:10-25:19"),
+    ("Ki Tavo", "Deuteronomy 26:1-29:8"),
+    ("Nitzavim", "Deuteronomy 29:9-30:20"),
+    ("Vayeilech", "Deuteronomy 31:1-30"),
+    ("Ha'Azinu", "Deuteronomy 32:1-52"),
+    ("V'Zot HaBerachah", "Deuteronomy 33:1-34:12"),
+]
+
+BERESHIT, TZAV, BAMIDBAR, DEVARIM, NITZAVIM, VAYEILECH, HAAZINU = 0, 24, 33, 43, 50, 51, 52
+
+# Combinable pairs, named by their first portion
+VAYAKHEL, TAZRIA, ACHREI_MOT, BEHAR, CHUKAT, MATOT = 21, 26, 28, 31, 38, 41
+
+# Festival readings when a festival day falls on Shabbat
+SHABBAT_CHOL_HAMOED = "Exodus 33:12-34:26"
+FESTIVALS = {
+    (hc.TISHREI, 1): ("Rosh Hashanah", "Genesis 21:1-34"),
+    (hc.TISHREI, 10): ("Yom Kippur", "Leviticus 16:1-34"),
+    (hc.TISHREI, 15): ("Sukkot", "Leviticus 22:26-23:44"),
+    (hc.TISHREI, 22): ("Shmini Atzeret", "Deuteronomy 14:22-16:17"),
+    (hc.NISAN, 15): ("Pesach", "Exodus 12:21-51"),
+    (hc.NISAN, 21): ("Pesach VII", "Exodus 13:17-15:26"),
+    (hc.NISAN, 22): ("Pesach VIII", "Deuteronomy 14:22-16:17"),
+    (hc.SIVAN, 7): ("Shavuot II", "Deuteronomy 14:22-16:17"),
+}
+# Israel keeps one day of each festival, and reads V'Zot HaBerachah on Shmini Atzeret
+ISRAEL_FESTIVALS = {key: value for key, value in FESTIVALS.items()
+                    if key not in ((hc.NISAN, 22), (hc.SIVAN, 7))}
+ISRAEL_FESTIVALS[(hc.TISHREI, 22)] = ("Shmini Atzeret", "Deuteronomy 33:1-34:12")
+
+ISRAEL = os.environ.get("PARASHA_SCHEDULE", "diaspora").lower() == "israel"
+
+SATURDAY = 5  # datetime.date.weekday()
+
+
+def _festival(month, day, israel):
+    """Festival title and reading for a Shabbat on this Hebrew date, or None."""
+    if (month == hc.TISHREI and 16 <= day <= 21) or (month == hc.NISAN and 16 <= day <= 20):
+        holiday = "Sukkot" if month == hc.TISHREI else "Pesach"
+        return f"{holiday} Shabbat Chol ha-Moed", SHABBAT_CHOL_HAMOED
+    return (ISRAEL_FESTIVALS if israel else FESTIVALS).get((month, day))
+
+
+def _shabbatot(start, end):
+    """Fixed day numbers of every Shabbat from start to end inclusive."""
+    first = start + (SATURDAY - datetime.date.fromordinal(start).weekday()) % 7
+    return list(range(first, end + 1, 7))
+
+
+def _fill(slots, first, last, pairs):
+    """
+    Spread portions first..last over the given Shabbatot, joining pairs in
+    priority order until they fit. Returns a list of portion tuples.
+    """
+    portions = last - first + 1
+    doubles = portions - slots
+    if not 0 <= doubles <= len(pairs):
+        raise ValueError(f"Cannot fit portions {first}-{last} into {slots} Shabbatot")
+    joined = set(pairs[:doubles])
+    readings = []
+    portion = first
+    while portion <= last:
+        if portion in joined:
+            readings.append((portion, portion + 1))
+            portion += 2
+        else:
+            readings.append((portion,))
+            portion += 1
+    return readings
+
+
+def _reading(fixed, parashot):
+    title = "-".join(PARASHOT[p][0] for p in parashot)
+    first_ref = PARASHOT[parashot[0]][1]
+    if len(parashot) == 1:
+        ref = first_ref
+    else:
+        # "Exodus 35:1-38:20" + "Exodus 38:21-40:38" -> "Exodus 35:1-40:38"
+        last_ref = PARASHOT[parashot[-1]][1]
+        end = last_ref.rsplit("-", 1)[1]
+        if ":" not in end:
+            end = f"{last_ref.rsplit(' ', 1)[1].split(':')[0]}:{end}"
+        ref = f"{first_ref.rsplit('-', 1)[0]}-{end}"
+    return Reading(datetime.date.fromordinal(fixed), title, ref, tuple(parashot), False)
+
+
+@lru_cache(maxsize=64)
+def year_schedule(hebrew_year, israel=ISRAEL):
+    """
+    Every Shabbat reading from 1 Tishrei to 29 Elul of a Hebrew year,
+    as a dict of datetime.date -> Reading.
+    """
+    start = hc.new_year(hebrew_year)
+    end = hc.new_year(hebrew_year + 1) - 1
+    schedule = {}
+    regular = []
+    for fixed in _shabbatot(start, end):
+        hd = hc.from_fixed(fixed)
+        festival = _festival(hd.month, hd.day, israel)
+        if festival:
+            title, ref = festival
+            schedule[datetime.date.fromordinal(fixed)] = Reading(
+                datetime.date.fromordinal(fixed), title, ref, (), True)
+        else:
+            regular.append(fixed)
+
+    # Tishrei, before Simchat Torah: Vayeilech (unless it was joined to
+    # Nitzavim last year) and Ha'Azinu
+    simchat_torah = hc.to_fixed(hebrew_year, hc.TISHREI, 22 if israel else 23)
+    tishrei = [f for f in regular if f < simchat_torah]
+    portions = [HAAZINU] if len(tishrei) == 1 else [VAYEILECH, HAAZINU]
+    for fixed, portion in zip(tishrei, portions):
+        schedule[datetime.date.fromordinal(fixed)] = _reading(fixed, (portion,))
+
+    # Bereshit to Nitzavim, split at the fixed points
+    weeks = [f for f in regular if f > simchat_torah]
+    leap = hc.is_leap_year(hebrew_year)
+    pesach = hc.to_fixed(hebrew_year, hc.NISAN, 15)
+    tisha_bav = hc.to_fixed(hebrew_year, hc.AV, 9)
+
+    def before(day):
+        return sum(1 for f in weeks if f <= day)
+
+    # Ordinary years are split at Pesach. After that, pairs are joined in the
+    # order that keeps Bamidbar before Shavuot whenever the year allows it;
+    # Israel, one Shabbat ahead after a second festival day falls on
+    # Shabbat in the Diaspora, catches up by reading the later pairs apart.
+    if not leap:
+        segments = [
+            (before(pesach), BERESHIT, TZAV, [VAYAKHEL]),
+            (before(tisha_bav), TZAV + 1, DEVARIM, [TAZRIA, ACHREI_MOT, MATOT, BEHAR, CHUKAT]),
+        ]
+    else:
+        segments = [
+            (before(tisha_bav), BERESHIT, DEVARIM,
+             [MATOT, CHUKAT, BEHAR, ACHREI_MOT, TAZRIA, VAYAKHEL]),
+        ]
+
+    rosh_hashanah_weekday = datetime.date.fromordinal(hc.new_year(hebrew_year + 1)).weekday()
+    last_pairs = [NITZAVIM] if rosh_hashanah_weekday in (3, SATURDAY) else []
+    last_portion = VAYEILECH if last_pairs else NITZAVIM
+    segments.append((len(weeks), DEVARIM + 1, last_portion, last_pairs))
+
+    used = 0
+    for upto, first, last, pairs in segments:
+        for fixed, parashot in zip(weeks[used:upto], _fill(upto - used, first, last, pairs)):
+            schedule[datetime.date.fromordinal(fixed)] = _reading(fixed, parashot)
+        used = upto
+
+    return schedule
+
+
+def reading_for_date(date, israel=ISRAEL):
+    """
+    The Shabbat reading for a date. Weekdays get the reading of the coming
+    Shabbat, the same as Sefaria's "Parashat Hashavua".
+    """
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    shabbat = date + datetime.timedelta(days=(SATURDAY - date.weekday()) % 7)
+    hebrew_year = hc.from_fixed(shabbat.toordinal()).year
+    return year_schedule(hebrew_year, israel)[shabbat]
+
+
+def upcoming(weeks, start=None, israel=ISRAEL):
+    """Readings for `weeks` consecutive Shabbatot from the Shabbat on or after start."""
+    start = start or datetime.date.today()
+    return [reading_for_date(start + datetime.timedelta(weeks=i), israel) for i in range(weeks)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print the weekly reading schedule for a Hebrew year.")
+    parser.add_argument("year", type=int, nargs="?", help="Hebrew year (default: current)")
+    parser.add_argument("--israel", action="store_true", help="Use the Israel schedule")
+    args = parser.parse_args()
+
+    year = args.year or hc.from_fixed(datetime.date.today().toordinal()).year
+    for day, reading in sorted(year_schedule(year, args.israel).items()):
+        print(f"{day.isoformat()}  {reading.title:<32} {reading.ref}")
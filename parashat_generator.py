@@ -1,38 +1,184 @@
-import requests
 import re
 import html
+import io
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
 from pptx import Presentation
-from pptx.util import Inches, Pt
+from pptx.opc.serialized import _ZipPkgWriter
+from pptx.util import Inches, Pt, lazyproperty
 from pptx.enum.text import PP_ALIGN
 import datetime
+import tracing
+import verse_store
+
+# Bump whenever create_presentation's output changes, so cached decks are not reused
+LAYOUT_VERSION = 1
+
+# zlib level for the .pptx zip: 0 stores parts uncompressed (fastest, largest),
+# 9 is smallest. Unset means zlib's default (6), python-pptx's own behaviour.
+_level = os.environ.get("PPTX_COMPRESSION_LEVEL", "")
+COMPRESSION_LEVEL = int(_level) if _level else None
+
+# Fixed member timestamps, so the same deck always zips to the same bytes
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+_zip_settings = threading.local()
+
+def _open_zip(output, level):
+    """A .pptx zip open for writing at the given compression level."""
+    return zipfile.ZipFile(
+        output, "w",
+        compression=zipfile.ZIP_STORED if level == 0 else zipfile.ZIP_DEFLATED,
+        compresslevel=level or None,
+        strict_timestamps=False,
+    )
+
+def _write_part(zf, name, blob):
+    """Write a part with a fixed timestamp instead of the time of the save."""
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.external_attr = 0o600 << 16
+    zf.writestr(info, blob, compress_type=zf.compression, compresslevel=zf.compresslevel)
+
+def _zipf(self):
+    """python-pptx's zip writer, opened with the compression level of the current save."""
+    return _open_zip(self._pkg_file, getattr(_zip_settings, "level", None))
+
+def _write(self, pack_uri, blob):
+    _write_part(self._zipf, pack_uri.membername, blob)
+
+# python-pptx always deflates at the default level and stamps parts with the
+# current time; let create_presentation choose the level and keep output reproducible.
+# _ZipPkgWriter is private, so python-pptx is pinned (requirements.txt) to the
+# version this was written against.
+_ZipPkgWriter._zipf = lazyproperty(_zipf)
+_ZipPkgWriter.write = _write
+
+# Footnotes (marker plus note, or a bare note) and every other tag, matched in one
+# pass. Footnote bodies are scanned tag to tag ("unrolled") rather than with a
+# lazy .*?, which retries the closing tag at every character.
+_MARKUP = re.compile(
+    r'<(?:sup class="footnote-marker">[^<]*(?:<(?!/sup>)[^<]*)*</sup>'
+    r'<i class="footnote">[^<]*(?:<(?!/i>)[^<]*)*</i>'
+    r'|i class="footnote">[^<]*(?:<(?!/i>)[^<]*)*</i>'
+    r'|[^>\n]*>)'
+)
+
+# The entities Sefaria's text actually uses, decoded with str.replace; anything
+# else falls through to html.unescape. None of them decodes to a character that
+# could complete another entity, so replacing them one by one is safe.
+_ENTITIES = (
+    ("&nbsp;", "\xa0"), ("&thinsp;", "\u2009"), ("&mdash;", "\u2014"), ("&ndash;", "\u2013"),
+    ("&ldquo;", "\u201c"), ("&rdquo;", "\u201d"), ("&lsquo;", "\u2018"), ("&rsquo;", "\u2019"),
+    ("&#8216;", "\u2018"), ("&#8217;", "\u2019"), ("&#8220;", "\u201c"), ("&#8221;", "\u201d"),
+    ("&#8212;", "\u2014"), ("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&hellip;", "\u2026"),
+)
 
 def clean_text(raw_text):
     """
     A more robust function to remove all HTML tags, entities, and footnote content.
+
+    Same output as the original multi-pass cleaner (benchmarks/clean_text.py
+    keeps it as the reference). Measured speedup over it: about 2x when every
+    verse carries footnotes and entities, 3.5x to 6x at Sefaria's usual density
+    of one marked-up verse in several; the regex scan over the markup is most
+    of what is left.
     """
     # Validate input
     if not isinstance(raw_text, str):
         print(f"Warning: clean_text received non-string input: {raw_text} (type: {type(raw_text)})")
         return str(raw_text) if raw_text is not None else ""
-    
-    # 1. Specifically target and remove the common footnote structure first.
-    text = re.sub(r'<sup class="footnote-marker">.*?</sup><i class="footnote">.*?</i>', '', raw_text, flags=re.DOTALL)
-    text = re.sub(r'<i class="footnote">.*?</i>', '', text, flags=re.DOTALL)
-    
-    # 2. Then, remove any other remaining HTML tags (like sup, b, span, br).
-    text = re.sub(r'<.*?>', '', text)
-    
-    # 3. Un-escape any lingering HTML entities like &nbsp; or &thinsp;
-    text = html.unescape(text)
-    
-    # 4. Remove any standalone footnote markers that might be left
-    text = text.replace('*', '')
+    return _clean(raw_text).strip()
+
+def clean_many(raw_texts):
+    """
+    clean_text for a list of verses (a chapter or more) in one call.
+    """
+    return [_clean(text).strip() if isinstance(text, str) else clean_text(text) for text in raw_texts]
+
+# Cleaned verses keyed by (book, chapter, verse, text version). Each entry also
+# keeps the raw text it was cleaned from, and is only used for that same text.
+VERSE_CACHE_SIZE = int(os.environ.get("VERSE_CACHE_SIZE", "20000"))
+_verse_cache = OrderedDict()
+_verse_cache_lock = threading.Lock()
+_verse_cache_stats = {"hits": 0, "misses": 0}
+
+@dataclass(slots=True)
+class Verse:
+    """
+    One cleaned verse, in a third of the memory of a dict. The verse cache
+    hands the same objects to every caller rather than copies, so they must
+    not be changed. Flask serializes a Verse as the dict it replaced:
+    {"chapter", "en", "he", "verse"}.
+    """
+    chapter: int
+    verse: int
+    en: str
+    he: str
+
+def clean_verses(book, chapter, numbered):
+    """
+    Verses for one chapter from (verse, en, he) tuples of raw text. Verses
+    cleaned before for the same text version come from the cache; the rest are
+    cleaned with one clean_many call per language and cached.
+    """
+    version = verse_store.text_version(book)
+    records = []
+    missing = []
+    with _verse_cache_lock:
+        for verse_num, en, he in numbered:
+            key = (book, chapter, verse_num, version)
+            entry = _verse_cache.get(key)
+            if entry is not None and entry[0] == en and entry[1] == he:
+                _verse_cache.move_to_end(key)
+                records.append(entry[2])
+            else:
+                records.append(None)
+                missing.append((len(records) - 1, key, en, he))
+        _verse_cache_stats["hits"] += len(records) - len(missing)
+        _verse_cache_stats["misses"] += len(missing)
 
-    # 5. Clean up any strange artifacts that might result from cleaning, like double commas.
-    text = text.replace(',,', ',')
+    if missing:
+        with tracing.span("clean", book, chapter, len(missing)):
+            en_clean = clean_many([en for _, _, en, _ in missing])
+            he_clean = clean_many([he for _, _, _, he in missing])
+        with _verse_cache_lock:
+            for (index, key, en, he), clean_en, clean_he in zip(missing, en_clean, he_clean):
+                record = Verse(chapter, key[2], clean_en, clean_he)
+                records[index] = record
+                _verse_cache[key] = (en, he, record)
+            while len(_verse_cache) > VERSE_CACHE_SIZE:
+                _verse_cache.popitem(last=False)
+    return records
 
-    # 6. Return the text with leading/trailing whitespace removed.
-    return text.strip()
+def verse_cache_stats():
+    """Snapshot of the cleaned-verse cache counters."""
+    with _verse_cache_lock:
+        return dict(_verse_cache_stats, size=len(_verse_cache))
+
+def clear_verse_cache():
+    """Drop every cleaned verse (the counters are kept)."""
+    with _verse_cache_lock:
+        _verse_cache.clear()
+
+def _clean(text):
+    # Strip footnotes and tags, then un-escape entities like &nbsp; or &thinsp;
+    if '<' in text:
+        text = _MARKUP.sub('', text)
+    if '&' in text:
+        for entity, char in _ENTITIES:
+            if entity in text:
+                text = text.replace(entity, char)
+        if '&' in text:
+            text = html.unescape(text)
+    # Drop leftover footnote markers and the double commas cleaning can leave behind
+    if '*' in text:
+        text = text.replace('*', '')
+    if ',,' in text:
+        text = text.replace(',,', ',')
+    return text
 
 def get_next_shabbat_date(weeks_ahead=0):
     """
@@ -54,111 +200,32 @@ def get_next_shabbat_date(weeks_ahead=0):
     target_date = today + datetime.timedelta(days=days_to_add)
     return target_date
 
-def get_parasha_data(weeks_ahead=0):
-    """Fetch the parasha for the specified week and return a clean list of verses."""
-    try:
-        # Calculate the target Shabbat date
-        target_date = get_next_shabbat_date(weeks_ahead)
-        year = target_date.year
-        month = target_date.month
-        day = target_date.day
-        
-        print(f"Fetching parasha for date: {year}-{month:02d}-{day:02d} (weeks_ahead: {weeks_ahead})")
-        
-        # We specify the desired translation version.
-        text_version = "vtitle=The_Contemporary_Torah,_JPS,_2006"
-        
-        # Use year, month, and day parameters as per Sefaria docs
-        initial_cal_url = f"https://www.sefaria.org/api/calendars?year={year}&month={month}&day={day}"
-        cal = requests.get(initial_cal_url).json()
-        parasha_item = next(i for i in cal["calendar_items"]
-                            if i["title"]["en"] == "Parashat Hashavua")
-
-        # Extract the Gregorian date of the Parasha
-        parasha_gregorian_date = cal.get("date")
-
-        # Get Hebrew date from the same API call
-        correct_hebrew_date = cal.get("hebrewDateStr", "")
-
-        ref = parasha_item["ref"]
-        print(f"Fetching parasha for date: {year}-{month:02d}-{day:02d} (weeks_ahead: {weeks_ahead})")
-        
-        # Parse the reference to get the correct chapter range
-        # Format: "Numbers 16:1-18:32"
-        ref_match = re.match(r'(\w+)\s+(\d+):(\d+)-(\d+):(\d+)', ref)
-        if ref_match:
-            book, start_chapter, start_verse, end_chapter, end_verse = ref_match.groups()
-            start_chapter, start_verse, end_chapter, end_verse = map(int, [start_chapter, start_verse, end_chapter, end_verse])
-        else:
-            start_chapter = end_chapter = 1
-        
-        # We fetch the raw text now and will clean it ourselves.
-        text_url = f"https://www.sefaria.org/api/texts/{ref}?{text_version}&context=0"
-        text_data = requests.get(text_url).json()
-
-        all_verses = []
-        # Use the correctly parsed chapter range instead of API sections
-        expected_chapters = list(range(start_chapter, end_chapter + 1))
-        
-        # Process all available text data instead of relying on sections array
-        text_chapters = text_data.get('text', [])
-        hebrew_chapters = text_data.get('he', [])
-        section_names = text_data.get('sectionNames', [])
-        
-        # Process each chapter of text data
-        for chap_idx in range(len(text_chapters)):
-            if chap_idx >= len(expected_chapters):
-                continue
-                
-            correct_chapter = expected_chapters[chap_idx]
-            
-            if chap_idx >= len(hebrew_chapters):
-                continue
-
-            en_verses_for_chap = text_chapters[chap_idx]
-            he_verses_for_chap = hebrew_chapters[chap_idx]
+VERSES_PER_SLIDE = 5
 
-            try:
-                if chap_idx < len(section_names):
-                    start_vs = int(section_names[chap_idx].split(':')[1])
-                else:
-                    start_vs = 1
-            except (IndexError, ValueError):
-                start_vs = 1
-
-            for verse_idx, (en, he) in enumerate(zip(en_verses_for_chap, he_verses_for_chap)):
-                verse_num = start_vs + verse_idx
-                all_verses.append({
-                    "chapter": correct_chapter,
-                    "verse": verse_num,
-                    "en": clean_text(en),
-                    "he": clean_text(he)
-                })
-
-        if not all_verses:
-             raise ValueError("No verses were parsed. Check API response.")
-
-        return {
-            "title_en": parasha_item["displayValue"]["en"],
-            "hebrew_date": correct_hebrew_date,
-            "gregorian_date": target_date.strftime("%A, %B %d, %Y"),
-            "parasha_ref": parasha_item["ref"],
-            "book": text_data["book"],
-            "verses": all_verses
-        }
-
-    except Exception as e:
-        print(f"An error occurred in get_parasha_data: {e}")
-        return None
+# "clone" builds decks from a prerendered slide prototype; "pptx" builds every
+# slide through the python-pptx object model. Both produce the same file.
+SLIDE_RENDERER = os.environ.get("SLIDE_RENDERER", "clone")
 
-def create_presentation(data, output, verse_ranges=None):
-    """Generates a PPTX file and saves it to the given output (path or stream)."""
-    prs = Presentation()
-    prs.slide_width = Inches(13.333)
-    prs.slide_height = Inches(7.5)
+def create_presentation(data, output, verse_ranges=None, compression_level=None, renderer=None, progress=None):
+    """
+    Generates a PPTX file and saves it to the given output (path or stream).
+    compression_level (0-9) defaults to COMPRESSION_LEVEL and renderer
+    ("clone" or "pptx") to SLIDE_RENDERER. progress, if given, is called with
+    (slides rendered, total slides) after each slide.
+    """
+    level = COMPRESSION_LEVEL if compression_level is None else compression_level
+    with tracing.span("layout"):
+        slides = list(iter_slides(data, verse_ranges))
+    if (renderer or SLIDE_RENDERER) == "clone" and all(map(_clonable, slides)):
+        _render_cloned(slides, output, level, progress)
+    else:
+        _render_pptx(slides, output, level, progress)
 
-    blank_layout = prs.slide_layouts[6]
-    verses_per_slide = 5
+def iter_slides(data, verse_ranges=None):
+    """
+    Yield (title_text, en_text, he_text) for every slide of the deck, in order.
+    """
+    verses_per_slide = VERSES_PER_SLIDE
 
     # If verse_ranges is provided, group verses by range
     if verse_ranges:
@@ -189,60 +256,73 @@ def create_presentation(data, output, verse_ranges=None):
         verses = group['verses']
         book_name = group.get('book', data.get('book', ''))
         
-        # Group verses by chapter to ensure each chapter starts on a new slide
-        current_chapter_verses = []
-        current_chapter = None
-        
-        for verse in verses:
-            # If we're starting a new chapter, create a slide for the previous chapter
-            if current_chapter is not None and verse['chapter'] != current_chapter:
-                # Create slide(s) for the previous chapter
-                for i in range(0, len(current_chapter_verses), verses_per_slide):
-                    verse_chunk = current_chapter_verses[i:i+verses_per_slide]
-                    slide = prs.slides.add_slide(blank_layout)
-                    
-                    # Title for this chunk
-                    if len(verse_chunk) == 1:
-                        v = verse_chunk[0]
-                        title_text = f"{book_name} {v['chapter']}:{v['verse']}"
-                    else:
-                        start = verse_chunk[0]
-                        end = verse_chunk[-1]
-                        title_text = f"{book_name} {start['chapter']}:{start['verse']}-{end['verse']}"
-                    
-                    # Add title and content to slide
-                    add_content_to_slide(slide, title_text, verse_chunk, book_name)
-                
-                # Start new chapter
-                current_chapter_verses = [verse]
-                current_chapter = verse['chapter']
-            else:
-                # Same chapter, add to current group
-                if current_chapter is None:
-                    current_chapter = verse['chapter']
-                current_chapter_verses.append(verse)
-        
-        # Don't forget the last chapter
-        if current_chapter_verses:
-            for i in range(0, len(current_chapter_verses), verses_per_slide):
-                verse_chunk = current_chapter_verses[i:i+verses_per_slide]
-                slide = prs.slides.add_slide(blank_layout)
+        # Each chapter starts on a new slide; slides are sliced straight from
+        # the group's verses
+        chapter_start = 0
+        while chapter_start < len(verses):
+            chapter = verses[chapter_start].chapter
+            chapter_end = chapter_start + 1
+            while chapter_end < len(verses) and verses[chapter_end].chapter == chapter:
+                chapter_end += 1
+
+            for i in range(chapter_start, chapter_end, verses_per_slide):
+                verse_chunk = verses[i:min(i + verses_per_slide, chapter_end)]
                 
                 # Title for this chunk
                 if len(verse_chunk) == 1:
                     v = verse_chunk[0]
-                    title_text = f"{book_name} {v['chapter']}:{v['verse']}"
+                    title_text = f"{book_name} {v.chapter}:{v.verse}"
                 else:
                     start = verse_chunk[0]
                     end = verse_chunk[-1]
-                    title_text = f"{book_name} {start['chapter']}:{start['verse']}-{end['verse']}"
+                    title_text = f"{book_name} {start.chapter}:{start.verse}-{end.verse}"
                 
-                # Add title and content to slide
-                add_content_to_slide(slide, title_text, verse_chunk, book_name)
+                en_text, he_text = slide_text(verse_chunk)
+                yield title_text, en_text, he_text
+            chapter_start = chapter_end
 
-    prs.save(output)
+def slide_text(verse_chunk):
+    """English and Hebrew text of a slide, with "..." wherever verses are skipped."""
+    en_parts = []
+    he_parts = []
+    for j, verse in enumerate(verse_chunk):
+        if j > 0:
+            prev_verse = verse_chunk[j-1]
+            if (prev_verse.chapter == verse.chapter and verse.verse != prev_verse.verse + 1):
+                en_parts.append("...")
+                he_parts.append("...")
+            elif prev_verse.chapter != verse.chapter:
+                en_parts.append("...")
+                he_parts.append("...")
+        en_parts.append(verse.en)
+        he_parts.append(verse.he)
+    return " ".join(en_parts), " ".join(he_parts)
+
+def _new_presentation():
+    prs = Presentation()
+    prs.slide_width = Inches(13.333)
+    prs.slide_height = Inches(7.5)
+    return prs
+
+def _render_pptx(slides, output, level, progress=None):
+    """Build every slide through the python-pptx object model."""
+    with tracing.span("render", "pptx", len(slides)):
+        prs = _new_presentation()
+        blank_layout = prs.slide_layouts[6]
+        for number, (title_text, en_text, he_text) in enumerate(slides, start=1):
+            slide = prs.slides.add_slide(blank_layout)
+            add_content_to_slide(slide, title_text, en_text, he_text)
+            if progress:
+                progress(number, len(slides))
 
-def add_content_to_slide(slide, title_text, verse_chunk, book_name):
+    _zip_settings.level = level
+    try:
+        with tracing.span("save"):
+            prs.save(output)
+    finally:
+        _zip_settings.level = None
+
+def add_content_to_slide(slide, title_text, en_text, he_text):
     """Add title and content to a slide"""
     # Add title
     title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.4), width=Inches(12.333), height=Inches(0.75))
@@ -254,23 +334,6 @@ def add_content_to_slide(slide, title_text, verse_chunk, book_name):
     p.font.size = Pt(28)
     p.font.bold = True
 
-    # Add content
-    en_parts = []
-    he_parts = []
-    for j, verse in enumerate(verse_chunk):
-        if j > 0:
-            prev_verse = verse_chunk[j-1]
-            if (prev_verse['chapter'] == verse['chapter'] and verse['verse'] != prev_verse['verse'] + 1):
-                en_parts.append("...")
-                he_parts.append("...")
-            elif prev_verse['chapter'] != verse['chapter']:
-                en_parts.append("...")
-                he_parts.append("...")
-        en_parts.append(verse['en'])
-        he_parts.append(verse['he'])
-    en_text = " ".join(en_parts)
-    he_text = " ".join(he_parts)
-
     # English text
     en_box = slide.shapes.add_textbox(Inches(0.5), Inches(1.2), width=Inches(6.0), height=Inches(5.8))
     tf_en = en_box.text_frame
@@ -293,9 +356,108 @@ def add_content_to_slide(slide, title_text, verse_chunk, book_name):
     font.size = Pt(30)
     font.bold = True
 
+# Text the prototype slide is rendered with, replaced in every cloned slide
+_MARKERS = ("@@TITLE@@", "@@EN@@", "@@HE@@")
+_SLIDE_PART = re.compile(r'^ppt/slides/(_rels/)?slide1\.xml(\.rels)?$')
+_SLIDE_ID = '<p:sldId id="256" r:id="rId{}"/>'
+_SLIDE_REL = ('<Relationship Id="rId{}" Type="http://schemas.openxmlformats.org/officeDocument/'
+              '2006/relationships/slide" Target="slides/slide{}.xml"/>')
+_SLIDE_TYPE = ('<Override PartName="/ppt/slides/slide{}.xml" ContentType="application/'
+               'vnd.openxmlformats-officedocument.presentationml.slide+xml"/>')
+
+_prototype = None
+_prototype_lock = threading.Lock()
+
+def _clonable(slide):
+    # python-pptx rewrites control characters and empty text; leave those to it
+    return all(text and not _CONTROL_CHARS.search(text) for text in slide)
+
+_CONTROL_CHARS = re.compile(r'[\x00-\x1f]')
+
+def _xml_text(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").encode("utf-8")
+
+def _load_prototype():
+    """
+    Render a one-slide deck through python-pptx once and keep its parts: the
+    slide XML split around the marker text, and the package parts that list
+    slides, as templates for any number of slides.
+    """
+    global _prototype
+    with _prototype_lock:
+        if _prototype is not None:
+            return _prototype
+
+        buffer = io.BytesIO()
+        _render_pptx([_MARKERS], buffer, None)
+        with zipfile.ZipFile(buffer) as zf:
+            parts = [(name, zf.read(name)) for name in zf.namelist()]
+
+        names = [name for name, _ in parts]
+        first_slide = names.index("ppt/slides/slide1.xml")
+        slide_xml = dict(parts)["ppt/slides/slide1.xml"]
+        pieces = re.split(b"|".join(m.encode() for m in _MARKERS), slide_xml)
+
+        # Slides are related after every other presentation part
+        rels = dict(parts)["ppt/_rels/presentation.xml.rels"].decode("utf-8")
+        first_rid = int(re.search(r'Id="rId(\d+)"[^>]*Target="slides/slide1\.xml"', rels).group(1))
+
+        _prototype = {
+            "before": [part for part in parts[:first_slide] if not _SLIDE_PART.match(part[0])],
+            "after": [part for part in parts[first_slide:] if not _SLIDE_PART.match(part[0])],
+            "slide": pieces,
+            "slide_rels": dict(parts)["ppt/slides/_rels/slide1.xml.rels"],
+            "first_rid": first_rid,
+        }
+        return _prototype
+
+def _render_cloned(slides, output, level, progress=None):
+    """
+    Build the deck zip directly: every slide is the prototype slide with its
+    text substituted, and the parts that list slides are extended to match.
+    Slides are rendered as they are written, so this is traced as one span.
+    """
+    with tracing.span("render", "clone", len(slides)):
+        _write_cloned(slides, output, level, progress)
+
+def _write_cloned(slides, output, level, progress=None):
+    proto = _load_prototype()
+    count = len(slides)
+    first_rid = proto["first_rid"]
+
+    def package_part(name, blob):
+        if name == "ppt/presentation.xml":
+            ids = "".join(f'<p:sldId id="{256 + i}" r:id="rId{first_rid + i}"/>' for i in range(count))
+            return blob.replace(_SLIDE_ID.format(first_rid).encode(), ids.encode())
+        if name == "ppt/_rels/presentation.xml.rels":
+            rels = "".join(_SLIDE_REL.format(first_rid + i, i + 1) for i in range(count))
+            return blob.replace(_SLIDE_REL.format(first_rid, 1).encode(), rels.encode())
+        if name == "[Content_Types].xml":
+            # Overrides are sorted by part name, so slide10 comes before slide2
+            partnames = sorted(f"/ppt/slides/slide{i}.xml" for i in range(1, count + 1))
+            types = "".join(_SLIDE_TYPE.format(p[len("/ppt/slides/slide"):-len(".xml")]) for p in partnames)
+            return blob.replace(_SLIDE_TYPE.format(1).encode(), types.encode())
+        return blob
+
+    head, after_title, after_en, tail = proto["slide"]
+    with _open_zip(output, level) as zf:
+        for name, blob in proto["before"]:
+            _write_part(zf, name, package_part(name, blob))
+        for number, (title_text, en_text, he_text) in enumerate(slides, start=1):
+            slide_xml = b"".join((head, _xml_text(title_text), after_title, _xml_text(en_text),
+                                  after_en, _xml_text(he_text), tail))
+            _write_part(zf, f"ppt/slides/slide{number}.xml", slide_xml)
+            _write_part(zf, f"ppt/slides/_rels/slide{number}.xml.rels", proto["slide_rels"])
+            if progress:
+                progress(number, count)
+        for name, blob in proto["after"]:
+            _write_part(zf, name, package_part(name, blob))
+
 if __name__ == "__main__":
-    print("Fetching weekly Parasha from Sefaria.org...")
-    parasha_data = get_parasha_data()
+    print("Reading this week's Parasha from the schedule and the verse store...")
+    os.environ.setdefault("PREFETCH_WEEKS", "0")  # a one-off deck has no use for the scheduler
+    from app import week_reading  # app imports this module
+    parasha_data = week_reading(0)
     if parasha_data:
         print(f"Found: {parasha_data['title_en']}")
         print(f"Total verses found: {len(parasha_data['verses'])}")
@@ -303,3 +465,5 @@ if __name__ == "__main__":
         print(f"Generating PowerPoint presentation: {file_name}")
         create_presentation(parasha_data, output=file_name)
         print("Presentation saved successfully.")
+    else:
+        print("No text for this week's Parasha; run `python verse_store.py sync` first.")
@@ -0,0 +1,76 @@
+"""
+Background warm-up of the upcoming weeks.
+
+Each worker starts one daemon thread that, at startup and then every
+PREFETCH_INTERVAL seconds, calls the app's warm function for weeks_ahead
+0 .. PREFETCH_WEEKS-1. The app's warm function builds the week's parasha data
+and pre-renders its full-parasha deck, so peak-time requests for those weeks
+are cache reads. Decks are shared through the deck cache on disk; a deck
+already rendered by another worker is not rendered again.
+
+PREFETCH_WEEKS=0 turns the scheduler off.
+"""
+import logging
+import os
+import threading
+import time
+
+WEEKS = int(os.environ.get("PREFETCH_WEEKS", "4"))
+INTERVAL = float(os.environ.get("PREFETCH_INTERVAL", "3600"))
+
+logger = logging.getLogger("prefetch")
+
+_stats = {"runs": 0, "weeks_warmed": 0, "failures": 0, "last_run": None, "last_run_seconds": None}
+_stats_lock = threading.Lock()
+_thread = None
+_wake = threading.Event()
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats, weeks=WEEKS, interval=INTERVAL)
+
+
+def run_once(warm, weeks=None):
+    """Warm weeks_ahead 0 .. weeks-1 now; returns how many succeeded."""
+    start = time.perf_counter()
+    warmed = failures = 0
+    for weeks_ahead in range(WEEKS if weeks is None else weeks):
+        try:
+            if warm(weeks_ahead):
+                warmed += 1
+            else:
+                failures += 1
+        except Exception:
+            logger.exception("Prefetch failed for weeks_ahead=%s", weeks_ahead)
+            failures += 1
+    seconds = time.perf_counter() - start
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["weeks_warmed"] += warmed
+        _stats["failures"] += failures
+        _stats["last_run"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        _stats["last_run_seconds"] = round(seconds, 3)
+    logger.info("Warmed %s of %s upcoming weeks in %.1fs", warmed, warmed + failures, seconds)
+    return warmed
+
+
+def _loop(warm):
+    while True:
+        run_once(warm)
+        _wake.wait(INTERVAL)
+        _wake.clear()
+
+
+def start(warm):
+    """Start the scheduler thread (once per process) unless PREFETCH_WEEKS is 0."""
+    global _thread
+    if WEEKS <= 0 or _thread is not None:
+        return
+    _thread = threading.Thread(target=_loop, args=(warm,), name="prefetch", daemon=True)
+    _thread.start()
+
+
+def trigger():
+    """Run the next warm-up now instead of waiting for the interval."""
+    _wake.set()
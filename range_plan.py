@@ -0,0 +1,163 @@
+"""
+Fetch planning for a deck's verse ranges.
+
+The ranges of a /generate request can overlap, repeat or run into each other
+("1:1-10", "1:5-20", "1:21-2:3"). plan() normalizes every range into
+per-chapter verse spans, merges the spans that overlap or touch, and lists
+every chapter the deck needs exactly once. Chapters are fetched whole, by
+their plain reference ("Genesis 5"), so no end-of-chapter sentinel is needed
+and every deck reading a chapter shares the same verse store slice and HTTP
+cache entry. assemble() then cleans each merged span once and fans the verses
+back out into the per-range groups create_presentation expects, in the order
+the ranges were given. A whole reading read in one piece is split into the
+same per-chapter texts with chapter_texts(), so it goes through the same
+cleaning.
+"""
+from collections import namedtuple
+
+import parashat_generator
+import verse_store
+
+# One range's share of a chapter; last is None for "to the end of the chapter"
+Piece = namedtuple("Piece", ["chapter", "first", "last"])
+# range_obj as given, its canonical book, and its pieces (None if it did not parse)
+Group = namedtuple("Group", ["range_obj", "book", "pieces"])
+Plan = namedtuple("Plan", ["groups", "spans"])
+
+
+def normalize(book, range_str):
+    """(canonical book, pieces) for one requested range, or (book, None) if it does not parse."""
+    parsed = verse_store.parse_ref(f"{book} {range_str}".strip())
+    if not parsed:
+        return book, None
+    book, start_chapter, start_verse, end_chapter, end_verse = parsed
+    if end_chapter < start_chapter or (end_chapter == start_chapter and end_verse is not None
+                                       and end_verse < start_verse):
+        return book, None
+    pieces = [Piece(chapter,
+                    start_verse if chapter == start_chapter else 1,
+                    end_verse if chapter == end_chapter else None)
+              for chapter in range(start_chapter, end_chapter + 1)]
+    return book, pieces
+
+
+def range_objs_for(ref):
+    """The /generate range list for a whole reference, or None if it does not parse."""
+    parsed = verse_store.parse_ref(ref)
+    if not parsed:
+        return None
+    book, start_chapter, start_verse, end_chapter, end_verse = parsed
+    if end_verse is None:
+        chapter = verse_store.get_chapter(book, end_chapter)
+        end_verse = len(chapter[0]) if chapter else 999
+    return [{"book": book, "range": f"{start_chapter}:{start_verse}-{end_chapter}:{end_verse}"}]
+
+
+def _merge(pieces):
+    """Merge overlapping and adjacent (first, last) spans; last None sorts after any verse."""
+    merged = []
+    for first, last in sorted(pieces, key=lambda span: (span[0], float("inf") if span[1] is None else span[1])):
+        if merged and (merged[-1][1] is None or first <= merged[-1][1] + 1):
+            previous_last = merged[-1][1]
+            if previous_last is not None and (last is None or last > previous_last):
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def plan(range_objs):
+    """
+    Plan the fetches for a list of {book, range} objects. spans maps every
+    (book, chapter) to fetch, in order of first use, to its merged verse spans.
+    """
+    groups = []
+    wanted = {}
+    for range_obj in range_objs:
+        book, pieces = normalize(range_obj['book'], range_obj['range'])
+        groups.append(Group(range_obj, book, pieces))
+        for piece in pieces or ():
+            wanted.setdefault((book, piece.chapter), []).append((piece.first, piece.last))
+    return Plan(groups, {key: _merge(spans) for key, spans in wanted.items()})
+
+
+def chapter_ref(book, chapter):
+    return f"{book} {chapter}"
+
+
+def _chapter_text(data):
+    """(first verse number, English verses, Hebrew verses) of a one-chapter text response."""
+    en, he = data.get('text', []), data.get('he', [])
+    if en and isinstance(en[0], list):  # nested when the source returned more than asked
+        en, he = en[0], he[0] if he else []
+    sections = data.get('sections') or [None, 1]
+    return (sections[1] if len(sections) > 1 else 1), en, he
+
+
+def chapter_texts(data):
+    """
+    Split the text response for a reference into {(book, chapter): that
+    chapter's text}, the shape assemble() takes. Responses for several
+    chapters hold nested lists, the first starting at sections[1].
+    """
+    sections = data.get('sections') or []
+    if not data.get('book') or not sections:
+        return {}
+    book, first_chapter = data['book'], sections[0]
+    en, he = data.get('text', []), data.get('he', [])
+    if not en or not isinstance(en[0], list):
+        return {(book, first_chapter): data}
+    return {
+        (book, first_chapter + index): {
+            'book': book,
+            'sections': [first_chapter + index, sections[1] if index == 0 and len(sections) > 1 else 1],
+            'text': chapter_en,
+            'he': chapter_he,
+        }
+        for index, (chapter_en, chapter_he) in enumerate(zip(en, he))
+    }
+
+
+def assemble(plan, texts):
+    """
+    Clean the planned verses and fan them out to the requested ranges.
+    texts maps (book, chapter) to its fetched text (or None if the fetch
+    failed). Returns (groups, complete): groups are create_presentation's
+    {range, book, verses} dicts for the ranges that have any verses, and
+    complete is False if any range could not be fetched in full.
+    """
+    verses_by_chapter = {}
+    complete = True
+    for (book, chapter), spans in plan.spans.items():
+        data = texts.get((book, chapter))
+        if not data:
+            complete = False
+            continue
+        offset, en, he = _chapter_text(data)
+        final = offset + min(len(en), len(he)) - 1  # a verse needs both languages
+        numbered = []
+        for first, last in spans:
+            last = final if last is None else min(last, final)
+            numbered.extend((number, en[number - offset], he[number - offset])
+                            for number in range(max(first, offset), last + 1))
+        verses_by_chapter[book, chapter] = {
+            verse.verse: verse for verse in parashat_generator.clean_verses(book, chapter, numbered)
+        }
+
+    groups = []
+    for group in plan.groups:
+        if group.pieces is None:
+            complete = False
+            continue
+        verses = []
+        for piece in group.pieces:
+            by_number = verses_by_chapter.get((group.book, piece.chapter))
+            if by_number is None:
+                continue
+            final = max(by_number, default=0)
+            last = final if piece.last is None else min(piece.last, final)
+            verses.extend(by_number[number] for number in range(piece.first, last + 1) if number in by_number)
+        if verses:
+            # The canonical book, so decks keyed alike by deck_cache also render alike
+            groups.append({'range': group.range_obj['range'], 'book': group.book, 'verses': verses})
+    return groups, complete
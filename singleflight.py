@@ -0,0 +1,140 @@
+"""
+Single-flight coalescing of identical concurrent work.
+
+do(key, fn) runs fn once for all the threads that ask for the same key at the
+same time: the first caller runs it and the others wait for its result (or its
+exception). do_async() does the same for coroutines on the ASGI event loop.
+Upstream fetches, week data builds and deck renders go through here, so a burst
+of identical requests costs one execution.
+
+With SINGLEFLIGHT_SCOPE=host the work is also coalesced across the workers on a
+host: the thread running it first takes a file lock for the key (one file per
+key hash under SINGLEFLIGHT_LOCK_DIR, removed when the work is done, so that
+unrelated keys and nested calls never wait on each other), and once it has the
+lock calls check() to pick up a result another worker stored in the meantime,
+e.g. a deck in the deck cache or a response in the disk or Redis HTTP cache.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+
+SCOPE = os.environ.get("SINGLEFLIGHT_SCOPE", "process").lower()
+LOCK_DIR = os.environ.get("SINGLEFLIGHT_LOCK_DIR", os.path.join(tempfile.gettempdir(), "ljs-locks"))
+
+_calls = {}
+_calls_lock = threading.Lock()
+_async_calls = {}
+
+_stats = {"executed": 0, "shared": 0, "from_other_workers": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """Snapshot of the counters: executions, callers that shared one, results found from other workers."""
+    with _stats_lock:
+        return dict(_stats, scope=SCOPE)
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def do(key, fn, check=None):
+    """
+    Run fn() once for every concurrent caller with the same key and return
+    (value, shared), where shared is True for callers that did not run it.
+    check() returns the finished result or None; it is only used for
+    host-wide coalescing.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        _count("shared")
+        if call.error is not None:
+            raise call.error
+        return call.value, True
+
+    try:
+        call.value = _run(key, fn, check)
+        return call.value, False
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+
+def _run(key, fn, check):
+    if SCOPE != "host" or check is None:
+        _count("executed")
+        return fn()
+
+    import fcntl  # host-wide mode is POSIX only
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    path = os.path.join(LOCK_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".lock")
+    while True:
+        lock_file = open(path, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        # The holder removed the file while we waited; lock the new one
+        lock_file.close()
+
+    try:
+        value = check()
+        if value is not None:
+            _count("from_other_workers")
+            return value
+        _count("executed")
+        return fn()
+    finally:
+        os.unlink(path)
+        lock_file.close()
+
+
+async def do_async(key, fn):
+    """
+    do() for the event loop: await fn() once for every concurrent caller with
+    the same key. Coalesces within the loop only.
+    """
+    loop_key = (asyncio.get_running_loop(), key)
+    future = _async_calls.get(loop_key)
+    if future is not None:
+        _count("shared")
+        return await asyncio.shield(future), True
+
+    future = _async_calls[loop_key] = asyncio.get_running_loop().create_future()
+    _count("executed")
+    try:
+        value = await fn()
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    else:
+        future.set_result(value)
+        return value, False
+    finally:
+        del _async_calls[loop_key]
@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the top of the repo; keep the prefetch scheduler
+# from starting when a test imports app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PREFETCH_WEEKS", "0")
+
+
+@pytest.fixture
+def verse_store_dir(tmp_path, monkeypatch):
+    """A synced verse store of placeholder text, 12 verses to a chapter, and an empty deck cache."""
+    import deck_cache
+    import verse_store
+    store = tmp_path / "verse_store"
+    store.mkdir()
+    for book, chapters in verse_store.TORAH_BOOKS.items():
+        record = {"schema": verse_store.SCHEMA_VERSION, "book": book, "en_version": verse_store.TEXT_VERSION,
+                  "synced_at": "2026-01-01T00:00:00+00:00", "checksum": book,
+                  "en": [[f"{book} {c}:{v} in English" for v in range(1, 13)] for c in range(1, chapters + 1)],
+                  "he": [[f"עברית {c}:{v}" for v in range(1, 13)] for c in range(1, chapters + 1)]}
+        (store / f"{book}.json").write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+    (store / "manifest.json").write_text(json.dumps({"schema": 1, "revision": 1, "books": {}}))
+    monkeypatch.setattr(verse_store, "STORE_DIR", str(store))
+    monkeypatch.setattr(verse_store, "_books", {})
+    monkeypatch.setattr(deck_cache, "CACHE_DIR", str(tmp_path / "decks"))
+    return store
@@ -0,0 +1,59 @@
+import concurrent.futures
+import datetime
+import io
+import json
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import app
+import bulk_export
+
+
+@pytest.fixture
+def client():
+    yield app.app.test_client()
+    if bulk_export._pool is not None:
+        bulk_export._pool.shutdown()
+        bulk_export._pool = None
+
+
+def test_export_of_a_date_range_holds_a_deck_per_shabbat(verse_store_dir, client):
+    jobs = bulk_export.jobs_between(datetime.date(2026, 10, 17), datetime.date(2026, 10, 31))
+    response = client.get("/export?start=2026-10-17&end=2026-10-31")
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        names = archive.namelist()
+        assert names[-1] == "manifest.json"
+        assert sorted(names[:-1]) == sorted(job.name for job in jobs)
+        manifest = json.loads(archive.read("manifest.json"))["decks"]
+        for entry in manifest:
+            assert "error" not in entry
+            with zipfile.ZipFile(io.BytesIO(archive.read(entry["file"]))) as deck:
+                slides = [name for name in deck.namelist() if bulk_export._SLIDE_PART.match(name)]
+            assert len(slides) == entry["slides"] > 0
+    assert [entry["date"] for entry in manifest] == ["2026-10-17", "2026-10-24", "2026-10-31"]
+
+
+def test_export_with_no_deck_rendered_is_an_error(verse_store_dir, client):
+    response = client.get("/export?ref=Judges 1:1-5")
+    assert response.status_code == 503
+    assert b"Cannot parse reference Judges 1:1-5" in response.data
+
+
+class BrokenPool:
+    def submit(self, *args):
+        future = concurrent.futures.Future()
+        future.set_exception(BrokenProcessPool("A worker died"))
+        return future
+
+
+def test_export_whose_render_workers_die_is_an_error(verse_store_dir, client, monkeypatch):
+    monkeypatch.setattr(bulk_export, "_render_pool", BrokenPool)
+    response = client.get("/export?ref=Genesis 1:1-5")
+    assert response.status_code == 503
+    assert b"renderer stopped" in response.data
+    assert [name for name in (verse_store_dir.parent / "decks").iterdir()] == []
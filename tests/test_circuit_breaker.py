@@ -0,0 +1,132 @@
+import pytest
+import requests
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, Breaker, CircuitOpen
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    monkeypatch.setattr(circuit_breaker, "FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(circuit_breaker, "SLOW_CALL_SECONDS", 2.0)
+    monkeypatch.setattr(circuit_breaker, "OPEN_SECONDS", 30.0)
+    monkeypatch.setattr(circuit_breaker, "WINDOW", 5)
+    return clock
+
+
+def fail(breaker, times=1):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+
+
+def trip(breaker):
+    fail(breaker, circuit_breaker.FAILURE_THRESHOLD)
+    assert breaker.state == OPEN
+
+
+def test_opens_after_the_failure_threshold(clock):
+    breaker = Breaker("example.org")
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.snapshot() == {"state": OPEN, "recent_failures": 3, "trips": 1, "rejected": 0}
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = Breaker("example.org")
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(True, 2.5)
+    assert breaker.state == OPEN
+
+
+def test_failures_age_out_of_the_window(clock):
+    breaker = Breaker("example.org")
+    fail(breaker, 2)
+    for _ in range(5):
+        assert breaker.allow()
+        breaker.record(True, 0.1)
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["recent_failures"] == 2
+
+
+def test_open_breaker_rejects_until_open_seconds_pass(clock):
+    breaker = Breaker("example.org")
+    trip(breaker)
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected"] == 2
+    clock.now += 10
+    assert breaker.retry_in() == pytest.approx(20)
+    clock.now += 20
+    assert breaker.retry_in() == 0
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = Breaker("example.org")
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # the trial is still in flight
+
+
+def test_successful_trial_closes(clock):
+    breaker = Breaker("example.org")
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["recent_failures"] == 0
+    fail(breaker, 2)  # earlier failures do not count against it any more
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_opens_again(clock):
+    breaker = Breaker("example.org")
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["trips"] == 2
+    assert breaker.retry_in() == pytest.approx(30)
+    assert not breaker.allow()
+
+
+def test_slow_trial_opens_again(clock):
+    breaker = Breaker("example.org")
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(True, 3.0)
+    assert breaker.state == OPEN
+
+
+def test_one_breaker_per_host(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    breaker = circuit_breaker.for_url("https://www.sefaria.org/api/texts/Genesis.1")
+    assert circuit_breaker.for_host("www.sefaria.org") is breaker
+    assert circuit_breaker.for_url("https://www.hebcal.com/converter") is not breaker
+    assert set(circuit_breaker.stats()) == {"www.sefaria.org", "www.hebcal.com"}
+
+
+def test_circuit_open_is_a_connection_error():
+    error = CircuitOpen("www.sefaria.org", 12.4)
+    assert isinstance(error, requests.exceptions.ConnectionError)
+    assert error.retry_in == 12.4
+    assert "www.sefaria.org" in str(error) and "12s" in str(error)
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+import app
+import deck_cache
+
+GENESIS_1 = "/generate?ref=Genesis&verse_ranges=1:1-5"
+
+
+@pytest.fixture
+def client(verse_store_dir):
+    return app.app.test_client()
+
+
+def key(*ranges):
+    return deck_cache.key_for([{"book": book, "range": verses} for book, verses in ranges])
+
+
+def test_key_ignores_how_a_range_is_written(verse_store_dir):
+    assert key(("Genesis", "1:1-2")) == key((" genesis ", "1:1-1:2"))
+    assert key(("Genesis", "1:1-2")) != key(("Genesis", "1:1-3"))
+    assert key(("Genesis", "1:1-2"), ("Exodus", "3:1")) != key(("Exodus", "3:1"), ("Genesis", "1:1-2"))
+
+
+def test_key_changes_with_the_stored_text(verse_store_dir):
+    before = key(("Genesis", "1:1-2"))
+    (verse_store_dir / "manifest.json").write_text(json.dumps({"schema": 1, "revision": 2, "books": {}}))
+    assert key(("Genesis", "1:1-2")) != before
+
+
+def test_spool_files_are_committed_into_the_cache(verse_store_dir):
+    spool_path = deck_cache.spool()
+    assert os.path.dirname(spool_path) == deck_cache.CACHE_DIR
+    assert os.path.getsize(spool_path) == 0
+    assert deck_cache.lookup("abc") is None
+
+    path = deck_cache.commit("abc", spool_path)
+    assert not os.path.exists(spool_path)
+    assert deck_cache.lookup("abc") == path == os.path.join(deck_cache.CACHE_DIR, "abc.pptx")
+
+
+def test_least_recently_served_decks_are_evicted(verse_store_dir, monkeypatch):
+    monkeypatch.setattr(deck_cache, "MAX_BYTES", 25)
+    for name in ("old", "served", "new"):
+        spool_path = deck_cache.spool()
+        with open(spool_path, "wb") as f:
+            f.write(b"x" * 10)
+        deck_cache.commit(name, spool_path)
+        if name == "served":
+            os.utime(os.path.join(deck_cache.CACHE_DIR, "old.pptx"), (0, 0))
+    assert deck_cache.lookup("old") is None
+    assert deck_cache.lookup("served") and deck_cache.lookup("new")
+
+
+def test_generate_tags_the_deck_with_its_content_hash(client):
+    response = client.get(GENESIS_1)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{key(("Genesis", "1:1-5"))}"'
+    assert os.listdir(deck_cache.CACHE_DIR) == [f"{key(('Genesis', '1:1-5'))}.pptx"]
+
+    hits = deck_cache.stats()["hits"]
+    again = client.get(GENESIS_1)
+    assert again.data == response.data
+    assert deck_cache.stats()["hits"] == hits + 1
+
+
+def test_generate_answers_a_matching_etag_with_304(client):
+    etag = client.get(GENESIS_1).headers["ETag"]
+    response = client.get(GENESIS_1, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+    assert client.get(GENESIS_1, headers={"If-None-Match": '"other"'}).status_code == 200
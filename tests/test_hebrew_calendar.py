@@ -0,0 +1,37 @@
+import datetime
+
+import pytest
+
+import hebrew_calendar as hc
+
+
+def test_verify_finds_no_problems_from_1900_to_2100():
+    assert hc.verify(1900, 2100) == []
+
+
+def test_fixture_conversions_match():
+    fixture = hc.load_hebcal_fixture()
+    assert fixture
+    for entry in fixture:
+        assert hc._hebcal_entry(datetime.date.fromisoformat(entry["gregorian"])) == entry
+
+
+def test_verify_reports_a_wrong_fixture_entry(tmp_path, monkeypatch):
+    path = tmp_path / "hebcal_dates.json"
+    path.write_text('[{"gregorian": "2024-10-03", "hy": 5785, "hm": "Tishrei", "hd": 2}]')
+    monkeypatch.setattr(hc, "HEBCAL_FIXTURE", str(path))
+    failures = hc.verify(2024, 2024)
+    assert len(failures) == 1
+    assert failures[0].startswith("2024-10-03: hebcal says (5785, 'Tishrei', 2)")
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("month, day", [(hc.TISHREI, 1), (hc.NISAN, 15)])
+def test_holidays_match_convertdate_from_1900_to_2100(month, day):
+    # convertdate is a separate implementation of the calendar; it checks
+    # Rosh Hashanah and Pesach for every year where the fixture is sparse
+    hebrew = pytest.importorskip("convertdate.hebrew")
+    for year in range(1900, 2101):
+        hy = year + 3761 if month == hc.TISHREI else year + 3760
+        assert hc.to_gregorian(hy, month, day) == datetime.date(
+            *hebrew.to_gregorian(hy, month, day)), (hy, month, day)
@@ -0,0 +1,211 @@
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+import http_cache
+import http_client
+
+TEXT_URL = "https://www.sefaria.org/api/texts/Genesis.1"
+CALENDAR_URL = "https://www.sefaria.org/api/calendars?year=2026&month=10&day=17"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class Response:
+    def __init__(self, status_code=200, content=b'{"text": []}', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class Upstream:
+    """Stands in for http_client.get: answers with the queued responses (or raises queued exceptions)."""
+
+    def __init__(self):
+        self.answers = []
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, headers or {}))
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def upstream(monkeypatch, clock):
+    upstream = Upstream()
+    monkeypatch.setattr(http_client, "get", upstream.get)
+    monkeypatch.setattr(http_cache, "backend", http_cache.MemoryBackend())
+    upstream.refreshes = []
+    monkeypatch.setattr(http_cache, "_refresh_later", lambda key, url, ttl: upstream.refreshes.append(url))
+    return upstream
+
+
+def test_ttl_rules():
+    assert http_cache.ttl_for(TEXT_URL) == 365 * http_cache.DAY
+    assert http_cache.ttl_for(CALENDAR_URL) == http_cache.DAY
+    assert http_cache.ttl_for("https://www.hebcal.com/converter?cfg=json") == 365 * http_cache.DAY
+    assert http_cache.ttl_for("https://example.org/other") == http_cache.DEFAULT_TTL
+
+
+def test_fresh_entries_are_served_from_the_cache(upstream, clock):
+    upstream.answers = [Response(content=b'{"he": []}')]
+    first = http_cache.get(CALENDAR_URL)
+    clock.now += http_cache.DAY - 1
+    second = http_cache.get(CALENDAR_URL)
+    assert not first.from_cache and second.from_cache
+    assert second.json() == {"he": []}
+    assert len(upstream.requests) == 1
+
+
+def test_expired_entries_are_revalidated(upstream, clock):
+    upstream.answers = [Response(headers={"ETag": '"v1"', "Last-Modified": "Sat, 17 Oct 2026 00:00:00 GMT"}),
+                        Response(304)]
+    http_cache.get(CALENDAR_URL)
+    clock.now += http_cache.DAY + 1
+    response = http_cache.get(CALENDAR_URL)
+    assert response.status_code == 200 and response.from_cache
+    assert upstream.requests[1][1] == {"If-None-Match": '"v1"',
+                                       "If-Modified-Since": "Sat, 17 Oct 2026 00:00:00 GMT"}
+
+    # The 304 made the entry fresh for another day
+    clock.now += http_cache.DAY - 1
+    assert http_cache.get(CALENDAR_URL).from_cache
+    assert len(upstream.requests) == 2
+
+
+@pytest.mark.parametrize("answer", [Response(404, b"Not found"), Response(400, b"Bad ref"),
+                                    Response(200, b'{"error": "Unknown ref"}')])
+def test_unknown_references_are_cached_for_the_negative_ttl(upstream, clock, answer):
+    upstream.answers = [answer, answer]
+    negative_hits = http_cache.stats()["negative_hits"]
+    assert http_cache.get(TEXT_URL).status_code == answer.status_code
+    clock.now += http_cache.NEGATIVE_TTL - 1
+    assert http_cache.get(TEXT_URL).from_cache
+    assert http_cache.stats()["negative_hits"] == negative_hits + 1
+
+    clock.now += 2
+    http_cache.get(TEXT_URL)
+    assert len(upstream.requests) == 2
+    assert upstream.requests[1][1] == {}  # negative entries are fetched again, not revalidated
+
+
+@pytest.mark.parametrize("status", [408, 429, 500, 503])
+def test_transient_errors_are_not_cached(upstream, status):
+    upstream.answers = [Response(status, b"Try later"), Response()]
+    assert http_cache.get(TEXT_URL).status_code == status
+    assert http_cache.get(TEXT_URL).status_code == 200
+    assert len(upstream.requests) == 2
+
+
+@pytest.mark.parametrize("failure", [requests.exceptions.ConnectionError("down"), Response(503, b"Down"),
+                                     Response(429, b"Slow down")])
+def test_expired_entries_are_served_stale_while_the_upstream_is_down(upstream, clock, failure):
+    upstream.answers = [Response(content=b'{"text": ["old"]}'), failure]
+    http_cache.get(CALENDAR_URL)
+    clock.now += http_cache.DAY + 1
+    response = http_cache.get(CALENDAR_URL)
+    assert response.stale and response.from_cache
+    assert response.json() == {"text": ["old"]}
+    assert upstream.refreshes == [CALENDAR_URL]
+
+
+def test_nothing_is_served_stale_without_an_entry(upstream):
+    upstream.answers = [requests.exceptions.ConnectionError("down")]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_cache.get(TEXT_URL)
+    assert upstream.refreshes == []
+
+
+def test_negative_entries_are_not_served_stale(upstream, clock):
+    upstream.answers = [Response(404, b"Not found"), requests.exceptions.ConnectionError("down")]
+    http_cache.get(TEXT_URL)
+    clock.now += http_cache.NEGATIVE_TTL + 1
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_cache.get(TEXT_URL)
+
+
+def test_revalidate_reports_errors_instead_of_serving_stale(upstream):
+    upstream.answers = [Response(), requests.exceptions.ConnectionError("down")]
+    http_cache.get(TEXT_URL)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_cache.get(TEXT_URL, revalidate=True)
+
+
+def test_background_refresh_replaces_the_stale_entry(upstream, clock):
+    upstream.answers = [Response(content=b'"old"'), Response(content=b'"new"')]
+    http_cache.get(CALENDAR_URL)
+    clock.now += http_cache.DAY + 1
+    refreshed = http_cache.stats()["refreshed"]
+    http_cache._refresh(f"GET {CALENDAR_URL}", CALENDAR_URL, http_cache.DAY, 0)
+    assert http_cache.stats()["refreshed"] == refreshed + 1
+    response = http_cache.get(CALENDAR_URL)
+    assert response.from_cache and not response.stale
+    assert response.json() == "new"
+
+
+def test_async_get_serves_stale_while_the_upstream_is_down(upstream, clock, monkeypatch):
+    async def down(url, **kwargs):
+        raise httpx.ConnectError("down")
+
+    monkeypatch.setattr(http_client, "get_async", down)
+    upstream.answers = [Response(content=b'"old"')]
+    http_cache.get(CALENDAR_URL)
+    clock.now += http_cache.DAY + 1
+    response = asyncio.run(http_cache.get_async(CALENDAR_URL))
+    assert response.stale and response.json() == "old"
+
+
+def entry(expires_at, body=b"\x00body"):
+    return {"url": TEXT_URL, "status": 200, "headers": {"ETag": '"v1"'}, "body": body, "negative": False,
+            "expires_at": expires_at}
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    if request.param == "disk":
+        return http_cache.DiskBackend(str(tmp_path))
+    return http_cache.MemoryBackend()
+
+
+def test_backends_round_trip_entries(backend, clock):
+    assert backend.get("GET a") is None
+    backend.set("GET a", entry(clock.now + 10))
+    assert backend.get("GET a") == entry(clock.now + 10)
+    backend.clear()
+    assert backend.get("GET a") is None
+
+
+def test_disk_backend_is_shared_and_drops_entries_past_the_grace(tmp_path, clock):
+    http_cache.DiskBackend(str(tmp_path)).set("GET a", entry(clock.now))
+    other_worker = http_cache.DiskBackend(str(tmp_path))
+    assert other_worker.get("GET a")["body"] == b"\x00body"
+    clock.now += http_cache.STALE_GRACE + 1
+    assert other_worker.get("GET a") is None
+
+
+def test_memory_backend_evicts_the_least_recently_used():
+    backend = http_cache.MemoryBackend(max_entries=2)
+    backend.set("GET a", entry(0))
+    backend.set("GET b", entry(0))
+    backend.get("GET a")
+    backend.set("GET c", entry(0))
+    assert backend.get("GET b") is None
+    assert backend.get("GET a") and backend.get("GET c")
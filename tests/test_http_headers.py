@@ -0,0 +1,56 @@
+import pytest
+
+import app as appmod
+import circuit_breaker
+import http_cache
+import http_headers
+
+
+@pytest.mark.parametrize("path", ["/get_parashat_for_date", "/get_custom_verses", "/get_parashat_data/0", "/"])
+@pytest.mark.parametrize("status", [400, 404, 500, 503])
+def test_errors_are_never_stored(path, status):
+    assert http_headers.policy(path, status=status) == "no-store"
+    assert http_headers.policy(path, stale=True, status=status) == "no-store"
+
+
+def test_route_policies_apply_to_successes():
+    assert http_headers.policy("/get_custom_verses") == "public, max-age=86400"
+    assert http_headers.policy("/get_custom_verses", status=304) == "public, max-age=86400"
+    assert http_headers.policy("/get_parashat_for_date", stale=True) == http_headers.STALE_POLICY
+    assert http_headers.policy("/get_custom_verses", status=302) is None
+
+
+def down(url, *args, **kwargs):
+    raise circuit_breaker.CircuitOpen("www.sefaria.org", 12)
+
+
+async def down_async(url, *args, **kwargs):
+    down(url)
+
+
+def test_flask_outage_is_not_cached(monkeypatch):
+    monkeypatch.setattr(http_cache, "get", down)
+    response = appmod.app.test_client().get("/get_parashat_for_date?date=2026-11-14")
+    assert response.status_code == 503
+    assert response.headers["Cache-Control"] == "no-store"
+    assert response.headers["Retry-After"] == "12"
+
+
+def test_flask_bad_request_is_not_cached():
+    response = appmod.app.test_client().get("/get_custom_verses?book=Genesis")
+    assert response.status_code == 400
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_asgi_outage_is_not_cached(monkeypatch):
+    testclient = pytest.importorskip("starlette.testclient")
+    import asgi
+
+    monkeypatch.setattr(http_cache, "get_async", down_async)
+    with testclient.TestClient(asgi.app) as client:
+        response = client.get("/get_parashat_for_date?date=2026-11-14")
+        assert response.status_code == 503
+        assert response.headers["Cache-Control"] == "no-store"
+        response = client.get("/get_custom_verses?book=Genesis")
+        assert response.status_code == 400
+        assert response.headers["Cache-Control"] == "no-store"
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+
+import pytest
+
+import app
+import jobs
+
+
+@pytest.fixture
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path / "jobs"))
+    return tmp_path / "jobs"
+
+
+def wait(job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = jobs.status(job_id)
+        if state["status"] in ("done", "failed"):
+            return state
+        time.sleep(0.01)
+    pytest.fail(f"Job {job_id} did not finish")
+
+
+def spool(tmp_path, name, data=b"deck"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_complete_deck_is_linked_into_the_job(jobs_dir, tmp_path):
+    cached = spool(tmp_path, "cached.pptx")
+    job_id = jobs.submit(lambda progress: (cached, True), "Genesis.pptx", "etag")
+    state = wait(job_id)
+    assert state["status"] == "done" and state["complete"] is True
+    assert state["filename"] == "Genesis.pptx" and state["etag"] == "etag"
+    assert os.path.samefile(jobs.deck_path(job_id), cached)
+    assert json.loads((jobs_dir / f"{job_id}.json").read_text()) == state
+
+
+def test_incomplete_deck_is_moved_into_the_job(jobs_dir, tmp_path):
+    partial = spool(tmp_path, "spool.tmp")
+    state = wait(jobs.submit(lambda progress: (partial, False), "Genesis.pptx", "etag"))
+    assert state["complete"] is False
+    assert not os.path.exists(partial)
+    assert open(jobs.deck_path(state["id"]), "rb").read() == b"deck"
+
+
+def test_failed_build_is_recorded(jobs_dir):
+    def build(progress):
+        raise ValueError("No text")
+
+    state = wait(jobs.submit(build, "Genesis.pptx", "etag"))
+    assert state["status"] == "failed" and state["error"] == "No text"
+    assert not os.path.exists(jobs.deck_path(state["id"]))
+
+
+def test_progress_never_goes_back(jobs_dir, tmp_path):
+    cached = spool(tmp_path, "cached.pptx")
+
+    def build(progress):
+        for done in (1, 3, 2, 100):
+            progress("slides", done, 100)
+        progress("chapters", 4, 4)
+        return cached, True
+
+    state = wait(jobs.submit(build, "Genesis.pptx", "etag"))
+    assert state["progress"] == {"slides": {"done": 100, "total": 100}, "chapters": {"done": 4, "total": 4}}
+
+
+@pytest.mark.parametrize("job_id", ["../secret", "..", "secret/..", "x.json", ""])
+def test_status_only_reads_job_ids(jobs_dir, job_id):
+    jobs_dir.mkdir()
+    (jobs_dir.parent / "secret.json").write_text('{"status": "done"}')
+    assert jobs.status(job_id) is None
+
+
+def test_old_jobs_are_removed(jobs_dir, tmp_path):
+    old = wait(jobs.submit(lambda progress: (spool(tmp_path, "a.pptx"), True), "a.pptx", "a"))
+    os.utime(jobs_dir / f"{old['id']}.json", (0, 0))
+    recent = wait(jobs.submit(lambda progress: (spool(tmp_path, "b.pptx"), True), "b.pptx", "b"))
+    wait(jobs.submit(lambda progress: (spool(tmp_path, "c.pptx"), True), "c.pptx", "c"))
+    assert jobs.status(old["id"]) is None
+    assert not os.path.exists(jobs.deck_path(old["id"]))
+    assert jobs.status(recent["id"])["status"] == "done"
+
+
+def test_generate_as_a_job(verse_store_dir, jobs_dir):
+    client = app.app.test_client()
+    response = client.get("/generate?ref=Genesis&verse_ranges=1:1-12&mode=job")
+    assert response.status_code == 202
+    job_id = response.json["job_id"]
+    assert response.json["status_url"] == f"/jobs/{job_id}"
+
+    wait(job_id)
+    state = client.get(f"/jobs/{job_id}").json
+    assert state["status"] == "done"
+    assert state["progress"]["slides"] == {"done": 3, "total": 3}
+    download = client.get(state["download_url"])
+    assert download.status_code == 200
+    assert download.data == client.get("/generate?ref=Genesis&verse_ranges=1:1-12").data
+    assert client.get("/jobs/0123abcd").status_code == 404
@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+
+import hebrew_calendar as hc
+import parasha_schedule as ps
+
+
+def titles(year, israel=False):
+    return {day: reading.title for day, reading in ps.year_schedule(year, israel).items()}
+
+
+def regular_portions(year, israel=False):
+    return [p for reading in ps.year_schedule(year, israel).values() for p in reading.parashot]
+
+
+def test_leap_year_reads_the_pairs_apart():
+    assert hc.is_leap_year(5784)
+    schedule = titles(5784)
+    assert schedule[datetime.date(2024, 3, 9)] == "Vayakhel"
+    assert schedule[datetime.date(2024, 3, 16)] == "Pekudei"
+    assert schedule[datetime.date(2024, 4, 13)] == "Tazria"
+    assert schedule[datetime.date(2024, 4, 20)] == "Metzora"
+
+
+def test_ordinary_year_joins_pairs():
+    assert not hc.is_leap_year(5785)
+    schedule = titles(5785)
+    assert schedule[datetime.date(2025, 5, 3)] == "Tazria-Metzora"
+    assert schedule[datetime.date(2025, 5, 24)] == "Behar-Bechukotai"
+
+
+def test_tzav_is_read_before_pesach_in_ordinary_years():
+    for year in (y for y in range(5770, 5800) if not hc.is_leap_year(y)):
+        pesach = hc.to_fixed(year, hc.NISAN, 15)
+        shabbat_before = max(day for day in ps.year_schedule(year) if day.toordinal() < pesach)
+        assert ps.year_schedule(year)[shabbat_before].title == "Tzav", year
+
+
+def test_nitzavim_and_vayeilech_join_before_a_thursday_rosh_hashanah():
+    # Rosh Hashanah 5785 fell on Thursday 3 October 2024
+    assert datetime.date.fromordinal(hc.new_year(5785)).weekday() == 3
+    assert ps.reading_for_date(datetime.date(2024, 9, 28)).title == "Nitzavim-Vayeilech"
+    # ...and 5786 on Tuesday, so they are read apart
+    assert ps.reading_for_date(datetime.date(2025, 9, 20)).title == "Nitzavim"
+    assert ps.reading_for_date(datetime.date(2025, 9, 27)).title == "Vayeilech"
+
+
+@pytest.mark.parametrize("israel", [False, True])
+@pytest.mark.parametrize("year", range(5770, 5800))
+def test_every_portion_is_read_once_a_year(year, israel):
+    portions = regular_portions(year, israel)
+    for portion in range(ps.BERESHIT, ps.NITZAVIM + 1):
+        assert portions.count(portion) == 1, (year, ps.PARASHOT[portion][0])
+    # Devarim on the last Shabbat on or before Tisha B'Av
+    tisha_bav = hc.to_fixed(year, hc.AV, 9)
+    devarim = next(day for day, reading in ps.year_schedule(year, israel).items()
+                   if reading.parashot[:1] == (ps.DEVARIM,))
+    assert 0 <= tisha_bav - devarim.toordinal() < 7
+
+
+def test_israel_runs_ahead_after_pesach_viii_on_shabbat():
+    # 22 Nisan 5782 was Shabbat: a festival day abroad, Achrei Mot in Israel
+    diaspora, israel = titles(5782), titles(5782, israel=True)
+    assert diaspora[datetime.date(2022, 4, 23)] == "Pesach VIII"
+    assert israel[datetime.date(2022, 4, 23)] == "Achrei Mot"
+    assert diaspora[datetime.date(2022, 4, 30)] == "Achrei Mot"
+    # The Diaspora catches up by joining Matot-Masei, which Israel reads apart
+    assert diaspora[datetime.date(2022, 7, 30)] == "Matot-Masei"
+    assert israel[datetime.date(2022, 7, 23)] == "Matot"
+    assert israel[datetime.date(2022, 7, 30)] == "Masei"
+    later = [day for day in diaspora if day > datetime.date(2022, 7, 30)]
+    assert later and all(diaspora[day] == israel[day] for day in later)
+
+
+def test_israel_runs_ahead_after_shavuot_ii_on_shabbat():
+    diaspora, israel = titles(5786), titles(5786, israel=True)
+    assert diaspora[datetime.date(2026, 5, 23)] == "Shavuot II"
+    assert israel[datetime.date(2026, 5, 23)] == "Nasso"
+    assert diaspora[datetime.date(2026, 6, 27)] == "Chukat-Balak"
+    assert israel[datetime.date(2026, 6, 27)] == "Balak"
+    assert diaspora[datetime.date(2026, 7, 4)] == israel[datetime.date(2026, 7, 4)]
+
+
+def test_ordinary_weeks_match_in_a_year_without_festival_shabbatot():
+    assert titles(5785) == titles(5785, israel=True)
+
+
+def test_weekdays_get_the_coming_shabbat():
+    shabbat = ps.reading_for_date(datetime.date(2025, 5, 3))
+    assert ps.reading_for_date(datetime.date(2025, 4, 27)) == shabbat
+    assert ps.reading_for_date(datetime.datetime(2025, 5, 2, 18, 30)) == shabbat
+    assert shabbat.ref == "Leviticus 12:1-15:33"
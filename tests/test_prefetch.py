@@ -0,0 +1,60 @@
+import pytest
+
+import app
+import deck_cache
+import http_cache
+import prefetch
+
+
+@pytest.fixture
+def calendar_fetches(monkeypatch):
+    """Records the calendar URLs warm_week fetches; also starts each test with no week data cached."""
+    fetched = []
+    monkeypatch.setattr(http_cache, "get", fetched.append)
+    monkeypatch.setattr(app, "_week_cache", {})
+    return fetched
+
+
+def test_run_once_counts_warmed_and_failed_weeks():
+    def warm(weeks_ahead):
+        if weeks_ahead == 2:
+            raise RuntimeError("boom")
+        return weeks_ahead != 1
+
+    before = prefetch.stats()
+    assert prefetch.run_once(warm, weeks=4) == 2
+    after = prefetch.stats()
+    assert after["runs"] == before["runs"] + 1
+    assert after["weeks_warmed"] == before["weeks_warmed"] + 2
+    assert after["failures"] == before["failures"] + 2
+    assert after["last_run"] is not None
+
+
+def test_scheduler_is_off_with_no_weeks(monkeypatch):
+    monkeypatch.setattr(prefetch, "WEEKS", 0)
+    monkeypatch.setattr(prefetch, "_thread", None)
+    prefetch.start(lambda weeks_ahead: pytest.fail("warmed"))
+    assert prefetch._thread is None
+
+
+def test_warm_week_prerenders_the_deck_generate_serves(verse_store_dir, calendar_fetches):
+    assert app.warm_week(0)
+    stored = deck_cache.stats()["stored"]
+    assert len(calendar_fetches) == 1 and "/calendars?" in calendar_fetches[0]
+
+    # Warming again only refreshes the cached deck
+    assert app.warm_week(0)
+    assert deck_cache.stats()["stored"] == stored
+
+    hits = deck_cache.stats()["hits"]
+    response = app.app.test_client().get("/generate?weeks_ahead=0")
+    assert response.status_code == 200
+    assert deck_cache.stats()["hits"] == hits + 1
+
+
+def test_warm_week_without_text_fails(verse_store_dir, calendar_fetches):
+    for book in verse_store_dir.glob("*.json"):
+        if book.name != "manifest.json":
+            book.unlink()
+    assert not app.warm_week(0)
+    assert calendar_fetches == []
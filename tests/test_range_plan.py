@@ -0,0 +1,121 @@
+import pytest
+
+import range_plan
+from range_plan import Piece
+
+
+def chapter(book, number, verses, first=1):
+    """A one-chapter text response with verses first..first+verses-1."""
+    numbers = range(first, first + verses)
+    return {"book": book, "sections": [number, first],
+            "text": [f"en {number}:{v}" for v in numbers], "he": [f"he {number}:{v}" for v in numbers]}
+
+
+def numbers(group):
+    return [(v.chapter, v.verse) for v in group["verses"]]
+
+
+@pytest.mark.parametrize("book, range_str", [("Genesis", "1:1-1:2"), ("genesis", "1:1-2"), (" Genesis ", "1:1-2 ")])
+def test_normalize_spellings_agree(book, range_str):
+    assert range_plan.normalize(book, range_str) == ("Genesis", [Piece(1, 1, 2)])
+
+
+def test_normalize_splits_chapters():
+    assert range_plan.normalize("Genesis", "1:30-3:2") == (
+        "Genesis", [Piece(1, 30, None), Piece(2, 1, None), Piece(3, 1, 2)])
+    assert range_plan.normalize("Genesis", "5") == ("Genesis", [Piece(5, 1, None)])
+
+
+@pytest.mark.parametrize("book, range_str", [("Genesis", "2:1-1:5"), ("Genesis", "1:9-3"), ("Joshua", "1:1-5"),
+                                             ("Genesis", "garbage")])
+def test_normalize_rejects(book, range_str):
+    assert range_plan.normalize(book, range_str)[1] is None
+
+
+@pytest.mark.parametrize("spans, merged", [
+    ([(1, 10), (5, 20)], [(1, 20)]),            # overlapping
+    ([(1, 10), (11, 15)], [(1, 15)]),           # adjacent
+    ([(1, 10), (12, 15)], [(1, 10), (12, 15)]),  # a gap stays
+    ([(5, 20), (1, 10)], [(1, 20)]),            # given out of order
+    ([(1, 20), (3, 4)], [(1, 20)]),             # contained
+    ([(3, None), (1, 2)], [(1, None)]),         # to the end of the chapter
+    ([(1, 5), (4, None), (8, 9)], [(1, None)]),
+    ([(2, 2), (2, 2)], [(2, 2)]),               # repeated
+])
+def test_merge(spans, merged):
+    assert range_plan._merge(spans) == merged
+
+
+def test_plan_fetches_each_chapter_once():
+    plan = range_plan.plan([
+        {"book": "Genesis", "range": "1:1-10"},
+        {"book": "Genesis", "range": "1:5-20"},
+        {"book": "Genesis", "range": "1:21-2:3"},
+        {"book": "Numbers", "range": "28:9-15"},
+        {"book": "genesis", "range": "2:1-3"},
+    ])
+    assert plan.spans == {
+        ("Genesis", 1): [(1, None)],
+        ("Genesis", 2): [(1, 3)],
+        ("Numbers", 28): [(9, 15)],
+    }
+    assert list(plan.spans) == [("Genesis", 1), ("Genesis", 2), ("Numbers", 28)]
+    assert [group.book for group in plan.groups] == ["Genesis"] * 3 + ["Numbers", "Genesis"]
+
+
+def test_assemble_fans_overlapping_ranges_back_out():
+    range_objs = [{"book": "Genesis", "range": "1:1-3"}, {"book": "Genesis", "range": "1:2-2:2"},
+                  {"book": "genesis", "range": "2:1-2"}]
+    plan = range_plan.plan(range_objs)
+    texts = {("Genesis", 1): chapter("Genesis", 1, 4), ("Genesis", 2): chapter("Genesis", 2, 3)}
+    groups, complete = range_plan.assemble(plan, texts)
+    assert complete
+    assert [numbers(group) for group in groups] == [
+        [(1, 1), (1, 2), (1, 3)],
+        [(1, 2), (1, 3), (1, 4), (2, 1), (2, 2)],
+        [(2, 1), (2, 2)],
+    ]
+    assert [group["range"] for group in groups] == ["1:1-3", "1:2-2:2", "2:1-2"]
+    assert [group["book"] for group in groups] == ["Genesis"] * 3
+    assert groups[0]["verses"][0].en == "en 1:1"
+    # A verse shared by two ranges is cleaned once
+    assert groups[0]["verses"][1] is groups[1]["verses"][0]
+
+
+def test_assemble_clips_to_the_chapter():
+    plan = range_plan.plan([{"book": "Genesis", "range": "1:3-999"}])
+    groups, complete = range_plan.assemble(plan, {("Genesis", 1): chapter("Genesis", 1, 5)})
+    assert complete
+    assert numbers(groups[0]) == [(1, 3), (1, 4), (1, 5)]
+
+
+def test_assemble_numbers_a_chapter_that_starts_mid_way():
+    plan = range_plan.plan([{"book": "Genesis", "range": "1:4-6"}])
+    groups, _ = range_plan.assemble(plan, {("Genesis", 1): chapter("Genesis", 1, 5, first=3)})
+    assert numbers(groups[0]) == [(1, 4), (1, 5), (1, 6)]
+    assert groups[0]["verses"][0].en == "en 1:4"
+
+
+def test_assemble_needs_both_languages():
+    text = chapter("Genesis", 1, 5)
+    text["he"] = text["he"][:3]
+    groups, _ = range_plan.assemble(range_plan.plan([{"book": "Genesis", "range": "1"}]), {("Genesis", 1): text})
+    assert numbers(groups[0]) == [(1, 1), (1, 2), (1, 3)]
+
+
+def test_assemble_reports_missing_text_and_bad_ranges():
+    plan = range_plan.plan([{"book": "Genesis", "range": "1:1-2"}, {"book": "Genesis", "range": "2:1-2"},
+                            {"book": "Genesis", "range": "garbage"}])
+    groups, complete = range_plan.assemble(plan, {("Genesis", 1): chapter("Genesis", 1, 3), ("Genesis", 2): None})
+    assert not complete
+    assert [numbers(group) for group in groups] == [[(1, 1), (1, 2)]]
+
+
+def test_chapter_texts_splits_nested_responses():
+    data = {"book": "Genesis", "sections": [1, 30],
+            "text": [["en 1:30", "en 1:31"], ["en 2:1"]], "he": [["he 1:30", "he 1:31"], ["he 2:1"]]}
+    texts = range_plan.chapter_texts(data)
+    assert texts[("Genesis", 1)]["sections"] == [1, 30]
+    assert texts[("Genesis", 2)] == {"book": "Genesis", "sections": [2, 1], "text": ["en 2:1"], "he": ["he 2:1"]}
+    flat = chapter("Genesis", 3, 2)
+    assert range_plan.chapter_texts(flat) == {("Genesis", 3): flat}
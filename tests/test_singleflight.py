@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+import singleflight
+
+
+@pytest.fixture
+def host_scope(tmp_path, monkeypatch):
+    monkeypatch.setattr(singleflight, "SCOPE", "host")
+    monkeypatch.setattr(singleflight, "LOCK_DIR", str(tmp_path))
+    return tmp_path
+
+
+def same_stripe_keys(stripes=256):
+    """Two keys that shared a lock file when locks were striped by hash."""
+    seen = {}
+    for n in range(10000):
+        key = f"https://example.org/api/texts/Genesis.{n}"
+        stripe = int(hashlib.sha256(key.encode("utf-8")).hexdigest(), 16) % stripes
+        if stripe in seen:
+            return seen[stripe], key
+        seen[stripe] = key
+
+
+def run_with_timeout(target, timeout=5):
+    result = {}
+
+    def run():
+        result["value"] = target()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "singleflight.do() blocked"
+    return result["value"]
+
+
+def test_concurrent_callers_share_one_execution():
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(singleflight.do("key", fn)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while "key" not in singleflight._calls:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {value for value, _ in results} == {"value"}
+
+
+def test_nested_call_on_the_same_stripe_does_not_block(host_scope):
+    outer, inner = same_stripe_keys()
+
+    def fn():
+        return singleflight.do(inner, lambda: "inner", check=lambda: None)[0] + " in outer"
+
+    value = run_with_timeout(lambda: singleflight.do(outer, fn, check=lambda: None)[0])
+    assert value == "inner in outer"
+    assert os.listdir(host_scope) == []
+
+
+def test_keys_on_the_same_stripe_run_concurrently(host_scope):
+    first, second = same_stripe_keys()
+    both_running = threading.Barrier(2, timeout=5)
+
+    def fn():
+        both_running.wait()
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda k=key: results.append(
+                   singleflight.do(k, fn, check=lambda: None)[0]))
+               for key in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert results == ["done", "done"]
+
+
+def test_host_scope_picks_up_a_result_found_by_check(host_scope):
+    value, shared = singleflight.do("key", lambda: pytest.fail("fn ran"), check=lambda: "stored")
+    assert (value, shared) == ("stored", False)
+    assert os.listdir(host_scope) == []
@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+import pytest
+from pptx import Presentation
+from pptx.opc.serialized import _ZipPkgWriter
+
+import parashat_generator as pg
+from parashat_generator import Verse
+
+
+def deck_data(chapters):
+    verses = [Verse(chapter, verse, f"In the beginning {chapter}:{verse} & <more> \"quoted\"",
+                    f"בְּרֵאשִׁית {chapter}:{verse}")
+              for chapter, count in chapters for verse in range(1, count + 1)]
+    return {"book": "Genesis", "verses": verses}
+
+
+def render(data, renderer, level=None, verse_ranges=None):
+    buffer = io.BytesIO()
+    pg.create_presentation(data, buffer, verse_ranges, compression_level=level, renderer=renderer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("chapters", [[(1, 1)], [(1, 31), (2, 25)]])
+@pytest.mark.parametrize("level", [None, 0, 9])
+def test_clone_renderer_matches_python_pptx_byte_for_byte(chapters, level):
+    data = deck_data(chapters)
+    assert len(list(pg.iter_slides(data))) in (1, 12)
+    assert render(data, "clone", level) == render(data, "pptx", level)
+
+
+def test_clone_renderer_matches_python_pptx_with_ranges():
+    data = deck_data([(1, 12)])
+    assert render(data, "clone", verse_ranges="1:1-3,1:8-12") == render(data, "pptx", verse_ranges="1:1-3,1:8-12")
+
+
+def test_slides_clone_cannot_render_go_through_python_pptx():
+    data = {"book": "Genesis", "verses": [Verse(1, 1, "line\x0bbreak", ""), Verse(1, 2, "text", "טקסט")]}
+    slides = list(pg.iter_slides(data))
+    assert not all(map(pg._clonable, slides))
+    assert render(data, "clone") == render(data, "pptx")
+
+
+def test_deck_lists_every_slide_in_order():
+    data = deck_data([(1, 31), (2, 25)])
+    prs = Presentation(io.BytesIO(render(data, "clone")))
+    titles = [slide.shapes[0].text_frame.text.strip() for slide in prs.slides]
+    assert titles == [title for title, _, _ in pg.iter_slides(data)]
+    assert titles[5:8] == ["Genesis 1:26-30", "Genesis 1:31", "Genesis 2:1-5"]
+    assert len(titles) == 12
+
+
+def test_zip_patch_sets_level_and_fixed_timestamps():
+    # parashat_generator replaces python-pptx's private zip writer; this fails
+    # if a python-pptx upgrade renames what it patches
+    assert _ZipPkgWriter.write is pg._write
+    data = deck_data([(1, 6)])
+    for level, compression in ((0, zipfile.ZIP_STORED), (9, zipfile.ZIP_DEFLATED)):
+        with zipfile.ZipFile(io.BytesIO(render(data, "pptx", level))) as deck:
+            assert {info.compress_type for info in deck.infolist()} == {compression}
+            assert {info.date_time for info in deck.infolist()} == {pg.ZIP_DATE_TIME}
+    assert render(data, "pptx") == render(data, "pptx")
+
+
+def test_progress_is_reported_per_slide():
+    calls = []
+    buffer = io.BytesIO()
+    pg.create_presentation(deck_data([(1, 12)]), buffer, renderer="clone",
+                           progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(1, 3), (2, 3), (3, 3)]
@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import upstream_server  # noqa: E402
+
+
+@pytest.fixture
+def server(verse_store_dir, tmp_path, monkeypatch):
+    """The stand-in on a free port, with no recordings and no injected latency."""
+    monkeypatch.setattr(upstream_server, "RECORDINGS", str(tmp_path / "recordings"))
+    options = argparse.Namespace(latency=0, jitter=0, error_rate=0, record=False, verbose=False)
+    monkeypatch.setattr(upstream_server.Handler, "options", options)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), upstream_server.Handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_texts_come_from_the_verse_store(server):
+    data = requests.get(f"{server}/api/texts/Genesis.1:1-3").json()
+    assert data["text"] == ["Genesis 1:1 in English", "Genesis 1:2 in English", "Genesis 1:3 in English"]
+    assert requests.get(f"{server}/api/texts/Judges.1").json() == {"error": "No text for Judges.1 in the verse store"}
+
+
+def test_calendar_gives_the_week_reading(server):
+    data = requests.get(f"{server}/api/calendars", params={"year": 2026, "month": 10, "day": 17}).json()
+    assert data["calendar_items"][0]["displayValue"]["en"] == "Noach"
+    assert requests.get(f"{server}/api/calendars").status_code == 400
+
+
+def test_converter_answers_both_directions(server):
+    g2h = requests.get(f"{server}/converter", params={"cfg": "json", "gy": 2024, "gm": 10, "gd": 3, "g2h": 1}).json()
+    assert (g2h["hy"], g2h["hm"], g2h["hd"]) == (5785, "Tishrei", 1)
+    h2g = requests.get(f"{server}/converter",
+                       params={"cfg": "json", "hy": 5785, "hm": "Tishrei", "hd": 1, "h2g": 1}).json()
+    assert (h2g["gy"], h2g["gm"], h2g["gd"]) == (2024, 10, 3)
+
+
+def test_recordings_are_replayed_whatever_the_parameter_order(server):
+    path, key = upstream_server.recording_path("/converter", {"gy": "2024", "gm": "10", "gd": "3"})
+    os.makedirs(upstream_server.RECORDINGS)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"request": key, "status": 200, "body": {"recorded": True}}, f)
+    response = requests.get(f"{server}/converter?gd=3&gy=2024&gm=10")
+    assert response.json() == {"recorded": True}
+
+
+def test_error_rate_injects_503s(server):
+    upstream_server.Handler.options.error_rate = 1
+    response = requests.get(f"{server}/api/texts/Genesis.1")
+    assert response.status_code == 503
+    assert response.json() == {"error": "injected failure"}
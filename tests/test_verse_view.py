@@ -0,0 +1,109 @@
+import pytest
+
+from app import verse_view
+from parashat_generator import Verse
+
+# Three chapters of 4, 3 and 5 verses
+VERSES = [Verse(chapter, verse, f"en {chapter}:{verse}", f"he {chapter}:{verse}")
+          for chapter, count in ((1, 4), (2, 3), (3, 5)) for verse in range(1, count + 1)]
+
+
+def view(args, verses_by_default=True):
+    payload = {"title": "Reading", "total_verses": len(VERSES), "verses": VERSES}
+    return verse_view(payload, 200, args, verses_by_default)
+
+
+def numbers(payload):
+    return [(v.chapter, v.verse) for v in payload["verses"]]
+
+
+def test_all_verses_by_default():
+    payload, status = view({})
+    assert status == 200
+    assert payload["verses"] == VERSES
+    assert "page" not in payload
+
+
+def test_verses_only_on_request_when_not_by_default():
+    payload, _ = view({}, verses_by_default=False)
+    assert "verses" not in payload
+    payload, _ = view({"fields": "title,verses"}, verses_by_default=False)
+    assert payload == {"title": "Reading", "verses": VERSES}
+
+
+def test_preview_leaves_verses_out():
+    payload, _ = view({"preview": "1", "limit": "2"})
+    assert "verses" not in payload and "page" not in payload
+    assert payload["total_verses"] == len(VERSES)
+
+
+@pytest.mark.parametrize("chapter, expected", [("2", [(2, 1), (2, 2), (2, 3)]),
+                                               ("2-3", [(2, v) for v in range(1, 4)] + [(3, v) for v in range(1, 6)]),
+                                               ("9", [])])
+def test_chapter_filter(chapter, expected):
+    payload, _ = view({"chapter": chapter})
+    assert numbers(payload) == expected
+    assert payload["page"]["total"] == len(expected)
+
+
+def test_pages_follow_each_other():
+    seen = []
+    offset = 0
+    while offset is not None:
+        payload, _ = view({"offset": str(offset), "limit": "5"})
+        assert payload["page"]["limit"] == 5
+        assert payload["page"]["total"] == len(VERSES)
+        seen.extend(payload["verses"])
+        offset = payload["page"]["next_offset"]
+    assert seen == VERSES
+
+
+def test_page_within_a_chapter():
+    payload, _ = view({"chapter": "3", "offset": "1", "limit": "2"})
+    assert numbers(payload) == [(3, 2), (3, 3)]
+    assert payload["page"] == {"offset": 1, "limit": 2, "total": 5, "next_offset": 3}
+
+
+@pytest.mark.parametrize("args", [{"offset": "10", "limit": "5"}, {"limit": "12"}, {"offset": "11"}])
+def test_last_page_has_no_next_offset(args):
+    payload, _ = view(args)
+    assert payload["page"]["next_offset"] is None
+    assert numbers(payload) == [(v.chapter, v.verse) for v in VERSES[int(args.get("offset", 0)):]]
+
+
+def test_offset_past_the_end_is_an_empty_page():
+    payload, status = view({"offset": "50"})
+    assert status == 200
+    assert payload["verses"] == []
+    assert payload["page"] == {"offset": 50, "limit": None, "total": len(VERSES), "next_offset": None}
+
+
+@pytest.mark.parametrize("args", [{"offset": "-1"}, {"limit": "-5"}])
+def test_negative_bounds_are_rejected(args):
+    payload, status = view(args)
+    assert status == 400
+    assert "error" in payload
+
+
+@pytest.mark.parametrize("args", [{"offset": "a"}, {"limit": "1.5"}, {"chapter": "x"}, {"chapter": "1-y"}])
+def test_non_integers_are_rejected(args):
+    payload, status = view(args)
+    assert status == 400
+    assert "error" in payload
+
+
+def test_fields_select_top_level_keys():
+    payload, _ = view({"fields": "title, page", "limit": "1"})
+    assert payload == {"title": "Reading", "page": {"offset": 0, "limit": 1, "total": len(VERSES),
+                                                    "next_offset": 1}}
+
+
+def test_errors_pass_through_untouched():
+    error = {"error": "No verses found for the specified reference."}
+    assert verse_view(error, 500, {"limit": "-1", "fields": "title"}) == (error, 500)
+
+
+def test_payload_is_not_changed():
+    payload = {"title": "Reading", "verses": VERSES}
+    verse_view(payload, 200, {"limit": "1", "fields": "title"})
+    assert payload == {"title": "Reading", "verses": VERSES}
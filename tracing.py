@@ -0,0 +1,136 @@
+"""
+Request tracing: timed spans for the fetch -> clean -> render -> save pipeline.
+
+A trace is started for a sampled fraction of requests (TRACE_SAMPLE_RATE, 0 by
+default) and for any request sent with an `X-Debug-Trace` header equal to
+TRACE_DEBUG_TOKEN. When a request is not traced, span() returns a shared no-op
+and costs one context-variable lookup. Finished traces are logged as one line
+on the "trace" logger and returned to the client in a Server-Timing header.
+
+Debug traces also turn on the pipeline's detailed debug() log lines for that
+request alone, so range bugs can be diagnosed without logging every request.
+"""
+import contextvars
+import functools
+import itertools
+import logging
+import os
+import random
+import time
+
+SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0"))
+DEBUG_TOKEN = os.environ.get("TRACE_DEBUG_TOKEN", "")
+DEBUG_HEADER = "X-Debug-Trace"
+
+logger = logging.getLogger("trace")
+
+_current = contextvars.ContextVar("trace", default=None)
+_ids = itertools.count(1)
+
+
+class Trace:
+    def __init__(self, name, debug):
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.name = name
+        self.debug = debug
+        self.start = time.perf_counter()
+        self.spans = []  # (name, detail tuple, start offset, duration); appended from any thread
+
+    def summary(self):
+        total = (time.perf_counter() - self.start) * 1000
+        parts = [f"trace {self.id} {self.name} {total:.1f}ms"]
+        for name, detail, offset, duration in sorted(self.spans, key=lambda span: span[2]):
+            label = " ".join(map(str, (name,) + detail))
+            parts.append(f"{label} +{offset * 1000:.1f} {duration * 1000:.1f}ms")
+        return " | ".join(parts)
+
+    def server_timing(self):
+        """Total time per span name, as a Server-Timing header value."""
+        totals = {}
+        for name, _, _, duration in self.spans:
+            totals[name] = totals.get(name, 0) + duration
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+class _Span:
+    __slots__ = ("trace", "name", "detail", "start")
+
+    def __init__(self, trace, name, detail):
+        self.trace = trace
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.trace.spans.append((self.name, self.detail, self.start - self.trace.start, end - self.start))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def start(name, debug_token=None):
+    """
+    Begin a trace for the current request if it is sampled or asks for debug
+    mode. Returns a token for finish(), or None when the request is not traced.
+    """
+    debug = bool(DEBUG_TOKEN) and debug_token == DEBUG_TOKEN
+    if not debug and not (SAMPLE_RATE and random.random() < SAMPLE_RATE):
+        return None
+    return _current.set(Trace(name, debug))
+
+
+def finish(token):
+    """End the trace begun by start(), log it and return it."""
+    trace = _current.get()
+    _current.reset(token)
+    logger.info("%s", trace.summary())
+    return trace
+
+
+def current():
+    return _current.get()
+
+
+def span(name, *detail):
+    """
+    Time a block as part of the current trace (a no-op when there is none).
+    detail values are only turned into text when the trace is logged.
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, detail)
+
+
+def debug(log, msg, *args):
+    """
+    Log at DEBUG, or at INFO when the current request is traced in debug mode.
+    Arguments are only formatted if the line is emitted.
+    """
+    trace = _current.get()
+    if trace is not None and trace.debug:
+        log.info("[%s] " + msg, trace.id, *args)
+    elif log.isEnabledFor(logging.DEBUG):
+        log.debug(msg, *args)
+
+
+def propagate(fn):
+    """Wrap fn so it runs inside the current trace when called from another thread."""
+    if _current.get() is None:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
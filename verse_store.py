@@ -0,0 +1,373 @@
+"""
+Local, versioned store of the Torah text (Hebrew plus the JPS 2006 English).
+
+The store is a directory of one JSON file per book plus a manifest. It is filled
+once with `python verse_store.py sync` and refreshed with the same command, so
+verse lookups on the request path never have to wait on sefaria.org. Live
+Sefaria fetches are only made when SEFARIA_LIVE_FALLBACK is switched on.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+
+import requests
+
+import http_cache
+
+# Point at a stand-in server (benchmarks/upstream_server.py) for offline and load testing
+SEFARIA_API_URL = os.environ.get("SEFARIA_API_URL", "https://www.sefaria.org/api").rstrip("/")
+
+# English translation served everywhere in the app
+TEXT_VERSION = "The Contemporary Torah, JPS, 2006"
+TEXT_VERSION_PARAM = "vtitle=The_Contemporary_Torah,_JPS,_2006"
+
+STORE_DIR = os.environ.get(
+    "VERSE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "verse_store"),
+)
+LIVE_FALLBACK = os.environ.get("SEFARIA_LIVE_FALLBACK", "").lower() in ("1", "true", "yes")
+
+SCHEMA_VERSION = 1
+
+# Chapter counts for the five books of the Torah
+TORAH_BOOKS = {
+    "Genesis": 50,
+    "Exodus": 40,
+    "Leviticus": 27,
+    "Numbers": 36,
+    "Deuteronomy": 34,
+}
+
+# Matches "Numbers 16:1-18:32", "Exodus 12:1-51", "Genesis.1:1-1:999", "Leviticus 16"
+_REF_RE = re.compile(
+    r'^\s*([A-Za-z]+)[\s._]+(\d+)(?::(\d+))?(?:-(?:(\d+):)?(\d+))?\s*$'
+)
+
+logger = logging.getLogger("verse_store")
+
+_books = {}
+_books_lock = threading.Lock()
+
+
+def parse_ref(ref):
+    """
+    Parse a Sefaria-style reference into (book, start_chapter, start_verse, end_chapter, end_verse).
+    Returns None when the reference is not a simple chapter/verse range in the Torah.
+    An end verse of None means "to the end of the chapter".
+    """
+    match = _REF_RE.match(ref or '')
+    if not match:
+        return None
+    book, start_chapter, start_verse, end_chapter, end_part = match.groups()
+    book = book.capitalize()
+    if book not in TORAH_BOOKS:
+        return None
+
+    start_chapter = int(start_chapter)
+    if start_verse is None:
+        # Whole chapters: "Leviticus 16" or "Leviticus 16-17"
+        end_chapter = int(end_part) if end_part else start_chapter
+        return book, start_chapter, 1, end_chapter, None
+
+    start_verse = int(start_verse)
+    if end_part is None:
+        return book, start_chapter, start_verse, start_chapter, start_verse
+    end_chapter = int(end_chapter) if end_chapter else start_chapter
+    return book, start_chapter, start_verse, end_chapter, int(end_part)
+
+
+def _book_path(book):
+    return os.path.join(STORE_DIR, f"{book}.json")
+
+
+def _manifest_path():
+    return os.path.join(STORE_DIR, "manifest.json")
+
+
+def _stamp(stat):
+    """Identifies one version of a file; sync replaces files, so each sync gives a new stamp."""
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def load_book(book):
+    """
+    Return the stored record for a book, or None if it has not been synced.
+
+    Records are cached per process and reloaded when the book file changes, so
+    a sync run from another process (cron, a deploy step) is picked up without
+    a restart and the text always agrees with the manifest the cache keys use.
+    """
+    path = _book_path(book)
+    try:
+        stamp = _stamp(os.stat(path))
+    except OSError:
+        return None
+    cached = _books.get(book)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with _books_lock:
+        cached = _books.get(book)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8") as f:
+                # Stamp what was actually read, in case a sync replaced the file meanwhile
+                stamp = _stamp(os.fstat(f.fileno()))
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get("schema") != SCHEMA_VERSION:
+            return None
+        _books[book] = (stamp, record)
+    return record
+
+
+def missing_books():
+    """The books with no file in the store (all of them before the first sync)."""
+    return [book for book in TORAH_BOOKS if not os.path.exists(_book_path(book))]
+
+
+def text_version(book):
+    """Identifies the stored text of a book; it changes whenever a sync changes the text."""
+    record = load_book(book)
+    if record is None:
+        return f"live:{TEXT_VERSION}"
+    return f"{record.get('en_version', TEXT_VERSION)}:{record.get('checksum', '')}"
+
+
+def get_chapter(book, chapter):
+    """Return the raw (English, Hebrew) verse lists for one chapter, or None."""
+    record = load_book(book)
+    if not record or not 1 <= chapter <= len(record["en"]):
+        return None
+    return record["en"][chapter - 1], record["he"][chapter - 1]
+
+
+def get_text(ref):
+    """
+    Return the text for a reference, shaped like a Sefaria /api/texts response
+    requested with context=0 (flat lists for one chapter, nested lists for several).
+    Falls back to a live Sefaria fetch only when SEFARIA_LIVE_FALLBACK is enabled.
+    Returns None when the text is not available.
+    """
+    parsed = parse_ref(ref)
+    if parsed:
+        data = _slice(*parsed)
+        if data is not None:
+            return data
+    if LIVE_FALLBACK:
+        return fetch_live(ref)
+    return None
+
+
+async def get_text_async(ref):
+    """get_text() for the ASGI server: the live fallback, if enabled, does not block."""
+    parsed = parse_ref(ref)
+    if parsed:
+        data = _slice(*parsed)
+        if data is not None:
+            return data
+    if LIVE_FALLBACK:
+        return await fetch_live_async(ref)
+    return None
+
+
+def _slice(book, start_chapter, start_verse, end_chapter, end_verse):
+    record = load_book(book)
+    if not record:
+        return None
+
+    chapter_count = len(record["en"])
+    if not 1 <= start_chapter <= end_chapter <= chapter_count:
+        return {"error": f"{book} {start_chapter}-{end_chapter} is not a valid range."}
+
+    en_chapters = []
+    he_chapters = []
+    for chapter in range(start_chapter, end_chapter + 1):
+        en = record["en"][chapter - 1]
+        he = record["he"][chapter - 1]
+        first = start_verse if chapter == start_chapter else 1
+        last = len(en) if (chapter != end_chapter or end_verse is None) else min(end_verse, len(en))
+        en_chapters.append(en[first - 1:last])
+        he_chapters.append(he[first - 1:last])
+
+    last_verse = len(record["en"][end_chapter - 1])
+    if end_verse is not None:
+        last_verse = min(end_verse, last_verse)
+
+    if start_chapter == end_chapter:
+        text, he = en_chapters[0], he_chapters[0]
+        ref = f"{book} {start_chapter}:{start_verse}-{last_verse}"
+    else:
+        text, he = en_chapters, he_chapters
+        ref = f"{book} {start_chapter}:{start_verse}-{end_chapter}:{last_verse}"
+
+    return {
+        "ref": ref,
+        "book": book,
+        "sections": [start_chapter, start_verse],
+        "toSections": [end_chapter, last_verse],
+        "sectionNames": ["Chapter", "Verse"],
+        "versionTitle": record.get("en_version", TEXT_VERSION),
+        "text": text,
+        "he": he,
+    }
+
+
+def _live_url(ref):
+    return f"{SEFARIA_API_URL}/texts/{ref}?{TEXT_VERSION_PARAM}&context=0"
+
+
+def fetch_live(ref, timeout=10):
+    """Fetch a reference straight from Sefaria. Returns the JSON payload or None."""
+    url = _live_url(ref)
+    try:
+        response = http_cache.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning("Live Sefaria fetch failed for %s: %s", ref, e)
+        return None
+
+
+async def fetch_live_async(ref):
+    """Non-blocking fetch_live() for the ASGI server."""
+    import httpx  # only installed for the ASGI server
+    try:
+        response = await http_cache.get_async(_live_url(ref))
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, requests.exceptions.RequestException, ValueError) as e:
+        logger.warning("Live Sefaria fetch failed for %s: %s", ref, e)
+        return None
+
+
+def read_manifest():
+    """Return the store manifest, or an empty one if the store has never been synced."""
+    try:
+        with open(_manifest_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"schema": SCHEMA_VERSION, "revision": 0, "books": {}}
+
+
+def _write_json(path, payload):
+    """Write JSON atomically so readers never see a half-written file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _download_book(book, timeout=30):
+    en_chapters = []
+    he_chapters = []
+    for chapter in range(1, TORAH_BOOKS[book] + 1):
+        url = f"{SEFARIA_API_URL}/texts/{book}.{chapter}?{TEXT_VERSION_PARAM}&context=0"
+        # Revalidate so a re-sync picks up upstream corrections
+        response = http_cache.get(url, timeout=timeout, revalidate=True)
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise ValueError(f"Sefaria returned an error for {book} {chapter}: {data['error']}")
+        en_chapters.append(data.get("text", []))
+        he_chapters.append(data.get("he", []))
+    return en_chapters, he_chapters
+
+
+def sync(books=None, force=False, max_age_days=None):
+    """
+    Download books from Sefaria into the store.
+
+    Books already in the store are skipped unless force is set or they are older
+    than max_age_days. The manifest revision is bumped whenever any text changes.
+    """
+    os.makedirs(STORE_DIR, exist_ok=True)
+    manifest = read_manifest()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    changed = False
+
+    for book in books or TORAH_BOOKS:
+        entry = manifest["books"].get(book)
+        if entry and not force and os.path.exists(_book_path(book)):
+            synced_at = datetime.datetime.fromisoformat(entry["synced_at"])
+            if max_age_days is None or now - synced_at < datetime.timedelta(days=max_age_days):
+                print(f"{book}: up to date (synced {entry['synced_at']})")
+                continue
+
+        print(f"{book}: downloading {TORAH_BOOKS[book]} chapters from Sefaria...")
+        en_chapters, he_chapters = _download_book(book)
+        checksum = hashlib.sha256(
+            json.dumps([en_chapters, he_chapters], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+        record = {
+            "schema": SCHEMA_VERSION,
+            "book": book,
+            "en_version": TEXT_VERSION,
+            "synced_at": now.isoformat(),
+            "checksum": checksum,
+            "en": en_chapters,
+            "he": he_chapters,
+        }
+        _write_json(_book_path(book), record)
+        with _books_lock:
+            _books.pop(book, None)
+
+        if not entry or entry.get("checksum") != checksum:
+            changed = True
+            print(f"{book}: text updated")
+        manifest["books"][book] = {
+            "synced_at": record["synced_at"],
+            "checksum": checksum,
+            "chapters": len(en_chapters),
+        }
+
+    if changed:
+        manifest["revision"] = manifest.get("revision", 0) + 1
+    manifest["schema"] = SCHEMA_VERSION
+    _write_json(_manifest_path(), manifest)
+    print(f"Verse store at revision {manifest['revision']} in {STORE_DIR}")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local Torah verse store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = subparsers.add_parser("sync", help="Download or refresh books from Sefaria")
+    sync_parser.add_argument("--book", action="append", choices=list(TORAH_BOOKS),
+                             help="Only sync this book (may be repeated)")
+    sync_parser.add_argument("--force", action="store_true", help="Re-download books already in the store")
+    sync_parser.add_argument("--max-age-days", type=float,
+                             help="Re-download books synced more than this many days ago")
+
+    subparsers.add_parser("status", help="Show what is in the store")
+
+    args = parser.parse_args(argv)
+    if args.command == "sync":
+        sync(books=args.book, force=args.force, max_age_days=args.max_age_days)
+    else:
+        manifest = read_manifest()
+        print(f"Store: {STORE_DIR} (revision {manifest.get('revision', 0)})")
+        for book in TORAH_BOOKS:
+            entry = manifest["books"].get(book)
+            status = f"synced {entry['synced_at']}" if entry else "missing"
+            print(f"  {book}: {status}")
+        # Non-zero when books are missing, so deploy checks can use it
+        return 1 if missing_books() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())